@@ -0,0 +1,59 @@
+"""Add user targets and reference data versions
+
+Revision ID: 3c1e9a7b2d40
+Revises: 577b54cb0f45
+Create Date: 2025-11-10 09:12:41.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1e9a7b2d40'
+down_revision: Union[str, Sequence[str], None] = '577b54cb0f45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reference_data_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('user_targets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('demographic_group_id', sa.Integer(), nullable=False),
+    sa.Column('age_years', sa.Float(), nullable=False),
+    sa.Column('valid_until', sa.Date(), nullable=False),
+    sa.Column('bmi', sa.Float(), nullable=True),
+    sa.Column('bmi_category', sa.String(length=50), nullable=True),
+    sa.Column('bmr', sa.Float(), nullable=True),
+    sa.Column('tdee', sa.Float(), nullable=True),
+    sa.Column('energy_kcal', sa.Float(), nullable=False),
+    sa.Column('protein_g', sa.Float(), nullable=False),
+    sa.Column('fat_g', sa.Float(), nullable=False),
+    sa.Column('carbs_g', sa.Float(), nullable=False),
+    sa.Column('nutrient_goals', sa.JSON(), nullable=False),
+    sa.Column('reference_version', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['demographic_group_id'], ['demographic_groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_targets_id'), 'user_targets', ['id'], unique=False)
+    # Existing profiles get their target vector computed on first read.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_targets_id'), table_name='user_targets')
+    op.drop_table('user_targets')
+    op.drop_table('reference_data_versions')
@@ -0,0 +1,38 @@
+"""Add denormalized energy_kcal to foods
+
+Revision ID: 5b7e2c9d4a18
+Revises: 8d2f4b6a1c93
+Create Date: 2025-11-14 11:26:05.731902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d4a18'
+down_revision: Union[str, Sequence[str], None] = '8d2f4b6a1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('foods', sa.Column('energy_kcal', sa.Float(), server_default='0', nullable=False))
+    # Backfill from each food's "Energy" nutrient row
+    op.execute("""
+        UPDATE foods SET energy_kcal = COALESCE((
+            SELECT fn.value_per_100g
+            FROM food_nutrients fn
+            JOIN nutrients n ON n.id = fn.nutrient_id
+            WHERE fn.food_id = foods.id AND n.name = 'Energy'
+            LIMIT 1
+        ), 0)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('foods', 'energy_kcal')
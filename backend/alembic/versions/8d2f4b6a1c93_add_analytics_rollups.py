@@ -0,0 +1,49 @@
+"""Add analytics rollup tables
+
+Revision ID: 8d2f4b6a1c93
+Revises: 3c1e9a7b2d40
+Create Date: 2025-11-12 16:03:27.518240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4b6a1c93'
+down_revision: Union[str, Sequence[str], None] = '3c1e9a7b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('log_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('days_logged', sa.Integer(), nullable=False),
+    sa.Column('energy_kcal', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'period_start')
+    )
+    op.create_table('nutrient_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('nutrient_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['nutrient_id'], ['nutrients.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'period_start', 'nutrient_id')
+    )
+    # Backfill existing history with: python manage.py rebuild-rollups
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('nutrient_rollups')
+    op.drop_table('log_rollups')
@@ -0,0 +1,58 @@
+"""Add composite indexes for the hot-path queries
+
+Revision ID: 9a4c6e1f3b27
+Revises: 5b7e2c9d4a18
+Create Date: 2025-11-15 10:41:52.160384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c6e1f3b27'
+down_revision: Union[str, Sequence[str], None] = '5b7e2c9d4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, columns INCLUDEd on Postgres)
+INDEXES = [
+    ('ix_food_logs_user_id_log_date', 'food_logs', ['user_id', 'log_date'], ['food_id', 'quantity_grams', 'meal_type']),
+    ('ix_food_nutrients_food_id_nutrient_id', 'food_nutrients', ['food_id', 'nutrient_id'], ['value_per_100g']),
+    ('ix_rda_demographic_group_id_nutrient_id', 'rda', ['demographic_group_id', 'nutrient_id'], ['recommended_value']),
+    ('ix_demographic_groups_activity_level_age', 'demographic_groups', ['activity_level', 'age_min_years', 'age_max_years'], []),
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _is_postgres():
+        # CREATE INDEX CONCURRENTLY does not lock out writes, but cannot
+        # run inside a transaction.
+        with op.get_context().autocommit_block():
+            for name, table, columns, include in INDEXES:
+                op.create_index(
+                    name, table, columns, unique=False, if_not_exists=True,
+                    postgresql_concurrently=True, postgresql_include=include
+                )
+    else:
+        for name, table, columns, _ in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
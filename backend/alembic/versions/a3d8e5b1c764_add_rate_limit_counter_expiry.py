@@ -0,0 +1,29 @@
+"""Add rate limit counter expiry
+
+Revision ID: a3d8e5b1c764
+Revises: f6c1d9e3a258
+Create Date: 2025-12-03 16:05:48.917342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d8e5b1c764'
+down_revision: Union[str, Sequence[str], None] = 'f6c1d9e3a258'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing counters are short-lived; 0 lets the next prune remove them
+    op.add_column('rate_limit_counters', sa.Column('expires_at', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('rate_limit_counters', 'expires_at')
@@ -0,0 +1,41 @@
+"""Add user food stats
+
+Revision ID: a6c4e8f2d951
+Revises: f3a9d2b7c614
+Create Date: 2025-11-24 10:13:59.618302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c4e8f2d951'
+down_revision: Union[str, Sequence[str], None] = 'f3a9d2b7c614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_food_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('last_logged_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('typical_grams', sa.Float(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['food_id'], ['foods.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'food_id')
+    )
+    op.create_index('ix_user_food_stats_user_id_score', 'user_food_stats', ['user_id', 'score'], unique=False)
+    # Backfill from existing logs with `python manage.py rebuild-food-stats`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_food_stats_user_id_score', table_name='user_food_stats')
+    op.drop_table('user_food_stats')
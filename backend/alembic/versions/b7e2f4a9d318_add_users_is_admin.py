@@ -0,0 +1,28 @@
+"""Add users.is_admin
+
+Revision ID: b7e2f4a9d318
+Revises: a3d8e5b1c764
+Create Date: 2025-12-05 10:17:32.640158
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2f4a9d318'
+down_revision: Union[str, Sequence[str], None] = 'a3d8e5b1c764'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('is_admin', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'is_admin')
@@ -0,0 +1,38 @@
+"""Add food log archives
+
+Revision ID: c2d8f5a0e6b3
+Revises: 9a4c6e1f3b27
+Create Date: 2025-11-18 14:07:33.902716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d8f5a0e6b3'
+down_revision: Union[str, Sequence[str], None] = '9a4c6e1f3b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('food_log_archives',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'month')
+    )
+    # Partitioning food_logs by month is opt-in and Postgres-only:
+    # see `python manage.py partition-food-logs`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('food_log_archives')
@@ -0,0 +1,31 @@
+"""Store user_food_stats.score in log space
+
+Revision ID: c5d1e8f3a472
+Revises: b7e2f4a9d318
+Create Date: 2025-12-08 09:41:05.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d1e8f3a472'
+down_revision: Union[str, Sequence[str], None] = 'b7e2f4a9d318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE user_food_stats SET score = CASE WHEN score > 0 THEN ln(score) ELSE -1e300 END")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "UPDATE user_food_stats SET score = CASE WHEN score < -700 THEN 0 "
+        "WHEN score > 709 THEN 1e308 ELSE exp(score) END"
+    )
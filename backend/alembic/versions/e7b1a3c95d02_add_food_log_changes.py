@@ -0,0 +1,39 @@
+"""Add food log change feed for delta sync
+
+Revision ID: e7b1a3c95d02
+Revises: c2d8f5a0e6b3
+Create Date: 2025-11-20 09:55:18.447120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b1a3c95d02'
+down_revision: Union[str, Sequence[str], None] = 'c2d8f5a0e6b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('sync_seq', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('food_log_changes',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('log_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'seq')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('food_log_changes')
+    op.drop_column('users', 'sync_seq')
@@ -0,0 +1,58 @@
+"""Add meal templates
+
+Revision ID: f3a9d2b7c614
+Revises: e7b1a3c95d02
+Create Date: 2025-11-21 17:20:46.093551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d2b7c614'
+down_revision: Union[str, Sequence[str], None] = 'e7b1a3c95d02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('meal_templates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('meal_type', sa.String(length=50), nullable=False),
+    sa.Column('energy_kcal', sa.Float(), nullable=False),
+    sa.Column('nutrients', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_meal_templates_id'), 'meal_templates', ['id'], unique=False)
+    op.create_index(op.f('ix_meal_templates_user_id'), 'meal_templates', ['user_id'], unique=False)
+    op.create_table('meal_template_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('template_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('food_id', sa.Integer(), nullable=False),
+    sa.Column('quantity_grams', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['food_id'], ['foods.id'], ),
+    sa.ForeignKeyConstraint(['template_id'], ['meal_templates.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_meal_template_items_id'), 'meal_template_items', ['id'], unique=False)
+    op.create_index(op.f('ix_meal_template_items_template_id'), 'meal_template_items', ['template_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_meal_template_items_template_id'), table_name='meal_template_items')
+    op.drop_index(op.f('ix_meal_template_items_id'), table_name='meal_template_items')
+    op.drop_table('meal_template_items')
+    op.drop_index(op.f('ix_meal_templates_user_id'), table_name='meal_templates')
+    op.drop_index(op.f('ix_meal_templates_id'), table_name='meal_templates')
+    op.drop_table('meal_templates')
@@ -0,0 +1,138 @@
+"""
+Pluggable key/value cache backends.
+
+`MemoryCache` is a bounded LRU with per-entry TTLs, local to the process.
+`RedisCache` shares entries between Lambda containers and uvicorn workers.
+Pick one with the CACHE_URL environment variable:
+
+    CACHE_URL=memory://          (default)
+    CACHE_URL=redis://host:6379/0
+    CACHE_URL=none://            (disable caching)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheBackend:
+    """The interface every backend implements. Values are strings."""
+
+    def get(self, key: str) -> str | None:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Caches nothing. Every read is a miss."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    A bounded LRU with TTLs. Safe to share between threadpool workers.
+    When full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 10000, default_ttl: float | None = None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[str, float | None]] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """A cache shared by every instance, backed by Redis."""
+
+    def __init__(self, url: str = None, client=None, prefix: str = "nutritracker:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("CACHE_URL points at Redis but the 'redis' package is not installed") from e
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        if ttl is not None:
+            self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+        else:
+            self.client.set(self.prefix + key, value)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_cache_backend(url: str | None = None, max_entries: int = 10000) -> CacheBackend:
+    """Builds a backend from a CACHE_URL-style string."""
+    url = url or os.getenv("CACHE_URL", "memory://")
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisCache(url)
+    if url.startswith("none"):
+        return NullCache()
+    return MemoryCache(max_entries=max_entries)
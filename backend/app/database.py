@@ -32,4 +32,30 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def upsert(db, model, rows: list[dict], index_elements: list[str], increment=(), replace=(), merge=None, returning=None):
+    """
+    INSERT ... ON CONFLICT DO UPDATE for Postgres and SQLite.
+
+    - `increment` columns are added to the existing value (counter rollups),
+    - `replace` columns are overwritten with the new value,
+    - `merge` maps other columns to a function (table, excluded) -> expression.
+    Expressions see the existing row's values, before any of the updates.
+    Runs as a single statement (executemany when several rows are given).
+    `returning` is only supported for a single row.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = model.__table__
+    stmt = insert(table)
+    set_ = {col: table.c[col] + stmt.excluded[col] for col in increment}
+    set_.update({col: stmt.excluded[col] for col in replace})
+    set_.update({col: expression(table.c, stmt.excluded) for col, expression in (merge or {}).items()})
+    stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+    if returning is not None:
+        return db.execute(stmt.values(**rows[0]).returning(*returning))
+    return db.execute(stmt, rows)
@@ -1,11 +1,13 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from jose import JWTError
 from pydantic import ValidationError  # <-- THIS IS THE FIX
 from . import schemas, services, models
 from .database import get_db
-from .security import SECRET_KEY, ALGORITHM
+from .security import decode_access_token
+from .services.principal_cache import principal_cache
+from .services.revocation_service import revocation_list
 
 # This is the "Guard's Hand".
 # It's an object that knows how to find the "Bearer" token.
@@ -15,53 +17,108 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 def get_current_user(
     token: str = Depends(oauth2_scheme), 
     db: Session = Depends(get_db)
-) -> models.User:
+) -> schemas.Principal:
     """
     This is the "Security Guard" dependency.
     It will be run on every protected endpoint.
     
     1. Gets the token from the Authorization header (via oauth2_scheme).
-    2. Gets a DB session (via get_db).
-    3. Decodes the token.
-    4. Fetches the user from the DB.
-    5. Returns the user model, or raises an error.
+    2. Gets a DB session (via get_db), used only on a cache miss.
+    3. Decodes the token and its signed claims (email, user id, active flag).
+    4. Looks the user up in the principal cache.
+    5. Returns a lightweight principal, or raises an error.
+    
+    Endpoints that need the full User row depend on `get_current_user_row`.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    inactive_exception = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Inactive user"
+    )
     
     try:
-        # 3. Decode the token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # 3. Decode the token (verified once, then served from the token cache)
+        payload = decode_access_token(token)
         
-        # 4. Extract the email (which we stored in the 'sub' field)
+        # Extract the email (which we stored in the 'sub' field)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
             
-        # 5. Validate the data with our schema
-        token_data = schemas.TokenData(email=email)
+        # Validate the data with our schema
+        token_data = schemas.TokenData(
+            email=email,
+            user_id=payload.get("uid"),
+            is_active=payload.get("act")
+        )
         
     except (JWTError, ValidationError): # <-- FIXED (was schemas.ValidationError)
         # Catches bad signatures, expired tokens, or bad data
         raise credentials_exception
+    
+    jti = payload.get("jti")
+    if jti is not None and revocation_list.is_revoked(db, jti):
+        # Logged out (or revoked) before it expired
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if token_data.is_active is False:
+        # Issued to an inactive user: no need to ask the database
+        raise inactive_exception
         
-    # 6. Fetch the user from the DB
-    user = services.get_user_by_email(db, email=token_data.email)
+    # 4. Fetch the principal
+    if token_data.user_id is not None:
+        principal = principal_cache.load(db, token_data.user_id)
+    else:
+        # Tokens issued before the 'uid' claim: look the user up by email
+        user = services.get_user_by_email(db, email=token_data.email)
+        principal = schemas.Principal.model_validate(user) if user else None
     
-    if user is None:
+    if principal is None:
         # If user was deleted after token was issued
         raise credentials_exception
         
-    if not user.is_active:
+    if not principal.is_active:
         # If user was deactivated
+        raise inactive_exception
+        
+    # 5. Return the principal
+    return principal
+
+def get_current_user_row(
+    principal: schemas.Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> models.User:
+    """
+    Loads the full User model of the authenticated user, for endpoints
+    that need more than the principal (names, profile, ...).
+    """
+    user = db.get(models.User, principal.id)
+    if user is None:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        
-    # 7. Return the full User model
     return user
 
+def get_current_admin(
+    user: models.User = Depends(get_current_user_row)
+) -> models.User:
+    """
+    The authenticated user, if they are an admin. The flag is read from
+    the User row rather than the token, so revoking it applies at once.
+    """
+    if not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return user
@@ -1,42 +1,17 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from dotenv import load_dotenv
 import os
-import time
-from collections import defaultdict
 
 # Load environment variables
 load_dotenv()
 
-# Rate limiting storage
-request_counts = defaultdict(list)
-RATE_LIMIT = 60  # requests per minute
-WINDOW_SIZE = 60  # seconds
-
-async def rate_limit_middleware(request: Request, call_next):
-    """Rate limiting middleware to prevent DDoS and control costs"""
-    client_ip = request.client.host
-    current_time = time.time()
-    
-    # Clean old requests outside the window
-    request_counts[client_ip] = [
-        req_time for req_time in request_counts[client_ip] 
-        if current_time - req_time < WINDOW_SIZE
-    ]
-    
-    # Check if rate limit exceeded
-    if len(request_counts[client_ip]) >= RATE_LIMIT:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    
-    # Add current request
-    request_counts[client_ip].append(current_time)
-    
-    response = await call_next(request)
-    return response
-
 # 1. Import the 'router' object from our new file
-from .routers import general, foods, users, auth, foodLog, dashboard, profile, recipe, recommendations # <-- This is correct
+from .routers import general, foods, users, auth, foodLog, dashboard, profile, recipe, recommendations, analytics, day, sync, mealTemplate, export, admin # <-- This is correct
+from .rate_limit import rate_limit_middleware
+from .services.log_batcher import log_batcher
+from .services.email_outbox import EMAIL_OUTBOX_WORKER, outbox_worker
 
 # 2. Create the main FastAPI app instance
 app = FastAPI(
@@ -83,6 +58,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the frontend read rate limit state and back off
+    expose_headers=["Retry-After", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy"],
 )
 # 3. "Include" the router
 app.include_router(general.router)
@@ -94,6 +71,26 @@ app.include_router(dashboard.router)
 app.include_router(profile.router)
 app.include_router(recipe.router)
 app.include_router(recommendations.router)
+app.include_router(analytics.router)
+app.include_router(day.router)
+app.include_router(sync.router)
+app.include_router(mealTemplate.router)
+app.include_router(export.router)
+app.include_router(admin.router)
+
+@app.on_event("startup")
+def start_outbox_worker():
+    if EMAIL_OUTBOX_WORKER:
+        outbox_worker.start()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    # Commit any queued write-behind entries before the process exits
+    log_batcher.close()
+    outbox_worker.stop()
+    # The bulk-hash pool is left alone: Mangum runs these hooks on every
+    # Lambda invocation, and the pool is meant to outlive them.
+
 # AWS Lambda handler
 from mangum import Mangum
 handler = Mangum(app)
@@ -0,0 +1,51 @@
+"""
+A tiny in-process metrics registry.
+
+Counters and observations (count/sum/max) are kept per process and
+exposed as JSON through `GET /metrics`. It is deliberately simple:
+enough to see hit rates and latencies without a metrics dependency.
+"""
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._observations = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Adds `value` to a counter."""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """Records one observation (e.g. a latency or a batch size)."""
+        with self._lock:
+            stats = self._observations.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["max"] = max(stats["max"], value)
+
+    def ratio(self, hits: str, misses: str) -> float:
+        """hits / (hits + misses), or 0.0 before any traffic."""
+        with self._lock:
+            total = self._counters[hits] + self._counters[misses]
+            return self._counters[hits] / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            observations = {
+                name: {**stats, "avg": stats["sum"] / stats["count"] if stats["count"] else 0.0}
+                for name, stats in self._observations.items()
+            }
+            return {"counters": dict(self._counters), "observations": observations}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+metrics = Metrics()
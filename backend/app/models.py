@@ -1,7 +1,8 @@
 import enum
 from sqlalchemy import (
-    Column, Integer, String, Float, ForeignKey, Boolean, DateTime, Date, 
-    Enum # We still use this for Gender/Activity
+    Column, Integer, String, Float, ForeignKey, Boolean, DateTime, Date, JSON, LargeBinary, PrimaryKeyConstraint, Index, Text, BigInteger,
+    Enum, # We still use this for Gender/Activity
+    false
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -42,11 +43,14 @@ class User(Base):
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
     is_active = Column(Boolean, default=False)
+    is_admin = Column(Boolean, nullable=False, default=False, server_default=false()) # Grant with `manage.py grant-admin`
     
     verification_otp = Column(String(10), nullable=True)
     otp_expires_at = Column(DateTime(timezone=True), nullable=True)
+    sync_seq = Column(Integer, nullable=False, default=0, server_default="0") # Last food_log_changes.seq handed out
 
     profile = relationship("UserProfile", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    target = relationship("UserTarget", back_populates="user", uselist=False, cascade="all, delete-orphan")
     food_logs = relationship("FoodLog", back_populates="user", cascade="all, delete-orphan")
 
 class UserProfile(Base):
@@ -84,6 +88,8 @@ class Food(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), unique=True, nullable=False, index=True)
     category_id = Column(Integer, ForeignKey("food_categories.id"))
+    # Denormalized from the food's "Energy" FoodNutrient row; see food_service.sync_food_energy
+    energy_kcal = Column(Float, nullable=False, default=0.0, server_default="0")
     
     category = relationship("FoodCategory", back_populates="foods")
     nutrients = relationship("FoodNutrient", back_populates="food", cascade="all, delete-orphan")
@@ -105,6 +111,11 @@ class FoodNutrient(Base):
     nutrient_id = Column(Integer, ForeignKey("nutrients.id"), nullable=False)
     value_per_100g = Column(Float, nullable=False)
     
+    # Nutrient lookups by food; covering on Postgres
+    __table_args__ = (
+        Index("ix_food_nutrients_food_id_nutrient_id", "food_id", "nutrient_id", postgresql_include=["value_per_100g"]),
+    )
+    
     food = relationship("Food", back_populates="nutrients")
     nutrient = relationship("Nutrient", back_populates="food_associations")
 
@@ -120,6 +131,11 @@ class DemographicGroup(Base):
     age_min_years = Column(Float, nullable=False)
     age_max_years = Column(Float, nullable=False)
     
+    # Profile writes match a group on (activity_level, age range)
+    __table_args__ = (
+        Index("ix_demographic_groups_activity_level_age", "activity_level", "age_min_years", "age_max_years"),
+    )
+    
     rda_values = relationship("RDA", back_populates="demographic_group", cascade="all, delete-orphan")
 
 class RDA(Base):
@@ -129,9 +145,59 @@ class RDA(Base):
     nutrient_id = Column(Integer, ForeignKey("nutrients.id"), nullable=False)
     recommended_value = Column(Float, nullable=False)
     
+    __table_args__ = (
+        Index("ix_rda_demographic_group_id_nutrient_id", "demographic_group_id", "nutrient_id", postgresql_include=["recommended_value"]),
+    )
+    
     demographic_group = relationship("DemographicGroup", back_populates="rda_values")
     nutrient = relationship("Nutrient", back_populates="rda_associations")
 
+class ReferenceDataVersion(Base):
+    """
+    A version counter per reference dataset (e.g. "rda").
+    The seeder bumps it whenever it changes the data, which tells
+    readers that anything derived from the old data is stale.
+    """
+    __tablename__ = "reference_data_versions"
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class UserTarget(Base):
+    """
+    The user's personalized daily target vector.
+    Computed once when the profile is written, and read by the
+    dashboard and recommendations instead of recomputing per request.
+    """
+    __tablename__ = "user_targets"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+    demographic_group_id = Column(Integer, ForeignKey("demographic_groups.id"), nullable=False)
+
+    # The inputs the vector was computed for
+    age_years = Column(Float, nullable=False)
+    valid_until = Column(Date, nullable=False) # Next birthday: the age-dependent goals change then
+    bmi = Column(Float, nullable=True)
+    bmi_category = Column(String(50), nullable=True)
+    bmr = Column(Float, nullable=True)
+    tdee = Column(Float, nullable=True)
+
+    # The "big 4" goals, after BMI modifiers
+    energy_kcal = Column(Float, nullable=False)
+    protein_g = Column(Float, nullable=False)
+    fat_g = Column(Float, nullable=False)
+    carbs_g = Column(Float, nullable=False)
+
+    # Every RDA goal: [{"nutrient_id", "name", "unit", "goal"}, ...]
+    nutrient_goals = Column(JSON, nullable=False)
+
+    # The "rda" ReferenceDataVersion this vector was computed against
+    reference_version = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    user = relationship("User", back_populates="target")
+    demographic_group = relationship("DemographicGroup", lazy="joined")
+
 # --- TRACKER MODELS ---
 
 class FoodLog(Base):
@@ -150,6 +216,208 @@ class FoodLog(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Every per-user day query filters on (user_id, log_date); covering on Postgres
+    __table_args__ = (
+        Index("ix_food_logs_user_id_log_date", "user_id", "log_date", postgresql_include=["food_id", "quantity_grams", "meal_type"]),
+    )
+    
     user = relationship("User", back_populates="food_logs")
     food = relationship("Food", back_populates="logs")
 
+
+# --- ANALYTICS ROLLUP MODELS ---
+# Maintained incrementally from log writes (see services/analytics_service.py),
+# so trends over months of history are a handful of indexed row reads.
+
+class LogRollup(Base):
+    """
+    Logging activity per user and period.
+    period is "day", "week" (ISO week, starting Monday) or "month".
+    """
+    __tablename__ = "log_rollups"
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period = Column(String(10), nullable=False)
+    period_start = Column(Date, nullable=False)
+    entries = Column(Integer, nullable=False, default=0)
+    days_logged = Column(Integer, nullable=False, default=0) # Distinct days with entries (1 or 0 for a "day")
+    energy_kcal = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (PrimaryKeyConstraint("user_id", "period", "period_start"),)
+
+class NutrientRollup(Base):
+    """Total nutrient intake per user, ISO week/month and nutrient."""
+    __tablename__ = "nutrient_rollups"
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period = Column(String(10), nullable=False)
+    period_start = Column(Date, nullable=False)
+    nutrient_id = Column(Integer, ForeignKey("nutrients.id"), nullable=False)
+    amount = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (PrimaryKeyConstraint("user_id", "period", "period_start", "nutrient_id"),)
+
+    nutrient = relationship("Nutrient")
+
+
+class UserFoodStat(Base):
+    """
+    How often and how recently a user logs each food, maintained on every
+    log write (see services/foodStats_service.py) for the quick-add list.
+    `score` is a frequency decayed by age, kept in log space: the natural log
+    of the sum of 2^(logged_day / half-life) over the logs, ranked by one
+    read of ix_user_food_stats_user_id_score.
+    """
+    __tablename__ = "user_food_stats"
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    food_id = Column(Integer, ForeignKey("foods.id"), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    last_logged_at = Column(DateTime(timezone=True), nullable=True)
+    typical_grams = Column(Float, nullable=False, default=0.0) # Mean quantity logged
+    score = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "food_id"),
+        Index("ix_user_food_stats_user_id_score", "user_id", "score"),
+    )
+
+    food = relationship("Food")
+
+# --- MEAL TEMPLATES ---
+
+class MealTemplate(Base):
+    """
+    A saved list of items the user logs together (e.g. "My usual breakfast").
+    `nutrients` holds the items' precomputed NutrientVector (see
+    services/analytics_service.py), so logging the template updates the
+    rollups without recomputing per item.
+    """
+    __tablename__ = "meal_templates"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    meal_type = Column(String(50), nullable=False)
+    energy_kcal = Column(Float, nullable=False, default=0.0)
+    nutrients = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    items = relationship(
+        "MealTemplateItem", back_populates="template", cascade="all, delete-orphan",
+        order_by="MealTemplateItem.position", lazy="selectin"
+    )
+
+class MealTemplateItem(Base):
+    __tablename__ = "meal_template_items"
+    id = Column(Integer, primary_key=True, index=True)
+    template_id = Column(Integer, ForeignKey("meal_templates.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    food_id = Column(Integer, ForeignKey("foods.id"), nullable=False)
+    quantity_grams = Column(Float, nullable=False)
+
+    template = relationship("MealTemplate", back_populates="items")
+    food = relationship("Food", lazy="selectin")
+
+# --- AUTH ---
+
+class RefreshToken(Base):
+    """
+    A refresh token, stored as an HMAC of the token (never the token).
+    Every refresh rotates it: the old row is marked used and a new one
+    joins the same family. Presenting a used token again means it was
+    copied, so the whole family is revoked (see services/token_service.py).
+    """
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    family_id = Column(String(32), nullable=False, index=True) # Shared by the chain of rotations of one login
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    used_at = Column(DateTime(timezone=True), nullable=True) # Set when rotated
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+class RevokedToken(Base):
+    """
+    An access token revoked before its expiry (by its 'jti' claim), e.g.
+    at logout. Rows can be deleted once `expires_at` has passed. Every
+    process mirrors this table into a Bloom filter (services/revocation_service.py).
+    """
+    __tablename__ = "revoked_tokens"
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class EmailOutbox(Base):
+    """
+    An email waiting to be sent. Requests only insert rows here, in their
+    own transaction; a background worker sends them in batches over pooled
+    SMTP connections (see services/email_outbox.py).
+    """
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(10), nullable=False, default="pending") # "pending", "sent" or "failed" (gave up)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    # The worker's poll: due pending rows, oldest first
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+# --- SYNC ---
+
+class FoodLogChange(Base):
+    """
+    One create/update/delete of a user's food log, numbered by a per-user
+    sequence (users.sync_seq), so clients can fetch what changed since
+    their last sync with one range read (see services/sync_service.py).
+    """
+    __tablename__ = "food_log_changes"
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    log_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False) # "upsert" or "delete"
+    payload = Column(JSON, nullable=True) # The log as of this change; None for deletes
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (PrimaryKeyConstraint("user_id", "seq"),)
+
+# --- COLD STORAGE ---
+
+class FoodLogArchive(Base):
+    """
+    One user's food logs for one month, moved out of food_logs by
+    `manage.py archive-food-logs`. `payload` is zlib-compressed JSON
+    (see services/archive_service.py); reads of an archived month
+    rehydrate it back into food_logs.
+    """
+    __tablename__ = "food_log_archives"
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(Date, nullable=False) # First day of the month
+    entries = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (PrimaryKeyConstraint("user_id", "month"),)
+
+# --- RATE LIMITING ---
+
+class RateLimitCounter(Base):
+    """
+    Requests (weighted by cost) per client key per fixed window, for
+    RATE_LIMIT_URL=sql:// (see app/rate_limit.py). `window_index` is the
+    Unix time divided by the window length. Only the current and previous
+    windows are read; once `expires_at` (Unix seconds) has passed,
+    `manage.py prune-rate-limits` deletes the row.
+    """
+    __tablename__ = "rate_limit_counters"
+    key = Column(String(255), nullable=False)
+    window_index = Column(BigInteger, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (PrimaryKeyConstraint("key", "window_index"),)
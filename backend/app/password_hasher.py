@@ -0,0 +1,61 @@
+"""
+Runs bcrypt off the request path.
+
+A bcrypt hash or check costs hundreds of milliseconds of CPU. Run inline,
+every login holds a request worker for that long, and a login storm
+starves every other endpoint. `password_hasher` runs them instead on a
+dedicated pool of PASSWORD_HASH_WORKERS threads (bcrypt releases the GIL
+while it works). Callers await the result without holding a worker.
+
+At most PASSWORD_HASH_MAX_PENDING jobs may be running or queued. Beyond
+that, `PasswordHasherBusy` is raised at once so the caller can answer
+503 instead of queueing without bound.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import metrics
+from .security import hash_password, verify_password
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 16)))
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many hashes are already running or queued."""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    async def _run(self, name: str, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            metrics.incr("password_hasher.rejected")
+            raise PasswordHasherBusy()
+        started = time.perf_counter()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        result = await asyncio.wrap_future(future)
+        metrics.observe(f"password_hasher.{name}_ms", (time.perf_counter() - started) * 1000)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,440 @@
+"""
+Per-client request rate limiting.
+
+Each client key gets a sliding-window counter: the count of the current
+fixed window plus the previous window's count weighted by how much of it
+still overlaps the sliding window. That is two numbers per client and
+O(1) work per request, whatever the limit, and it never lets a client
+double its budget at a window boundary the way plain fixed windows do.
+
+The counts live in a pluggable backend, chosen with RATE_LIMIT_URL:
+
+    RATE_LIMIT_URL=memory://              (default; per process)
+    RATE_LIMIT_URL=redis://host:6379/0    (shared; one pipelined round trip)
+    RATE_LIMIT_URL=sql://                 (shared; one upsert on DATABASE_URL)
+
+A per-process limit is multiplied by the number of warm Lambda
+containers or uvicorn workers; the shared backends enforce one budget.
+Every backend adds the request's cost and reads both windows in one
+atomic step, so denied requests count too. Once a client is denied, this
+process remembers it until its Retry-After has passed (the deny cache)
+and answers further requests without reaching the shared store.
+
+Behind API Gateway every request arrives from the gateway, so the key
+is taken from X-Forwarded-For (see `client_key`).
+
+Two layers use it. `rate_limit_middleware` is a coarse per-address
+flood guard over every request. `RateLimitPolicy` dependencies, attached
+to the routers that call Gemini, run bcrypt or stream large exports,
+charge a per-route cost against per-user and per-address budgets with
+their own burst allowance, so expensive endpoints are protected without
+throttling cheap reads. Responses carry RateLimit-* headers; 429s add
+Retry-After.
+"""
+import copy
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from jose import JWTError
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from . import models
+from .cache import MemoryCache
+from .database import engine as default_engine, upsert
+from .metrics import metrics
+from .security import decode_access_token
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true", "yes")
+RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL", "memory://")
+# The flood guard over every request; expensive routes have their own policies
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "300"))
+RATE_LIMIT_WINDOW_SECONDS = 60
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+RATE_LIMIT_DENY_CACHE_SIZE = int(os.getenv("RATE_LIMIT_DENY_CACHE_SIZE", "10000"))
+# How many proxies append to X-Forwarded-For in front of the app (API Gateway: 1).
+# 0 ignores the header and uses the socket peer.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "1"))
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until the request would be allowed; 0 when allowed
+    reset: float = 0.0  # seconds until the current window ends (or retry_after when denied)
+
+
+class RateLimitBackend:
+    """
+    The interface every backend implements. `incr` atomically adds `cost`
+    to the key's count for window `index` (of `window_seconds` each) and
+    returns the counts of windows `index` (including the cost) and `index - 1`.
+    """
+    # Whether `incr` does network I/O, and so belongs off the event loop
+    blocking = True
+
+    def incr(self, key: str, index: int, cost: int, window_seconds: float) -> tuple[int, int]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """Counts in this process, in an LRU of at most `max_clients` keys."""
+    blocking = False
+
+    def __init__(self, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        # key -> [window index, count in that window, count in the window before]
+        self._clients: OrderedDict[str, list] = OrderedDict()
+
+    def incr(self, key, index, cost, window_seconds):
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                entry = self._clients[key] = [index, 0, 0]
+                if len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(key)
+                if entry[0] != index:
+                    entry[2] = entry[1] if entry[0] == index - 1 else 0
+                    entry[1] = 0
+                    entry[0] = index
+            entry[1] += cost
+            return entry[1], entry[2]
+
+    def reset(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    One Redis key per client and window, expiring after two windows.
+    INCRBY, PEXPIRE and the GET of the previous window go out as one
+    MULTI/EXEC pipeline: a single round trip, applied atomically.
+    """
+
+    def __init__(self, url: str = None, client=None, prefix: str = "nutritracker:rl:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("RATE_LIMIT_URL points at Redis but the 'redis' package is not installed") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def incr(self, key, index, cost, window_seconds):
+        current_key = f"{self.prefix}{key}:{index}"
+        pipe = self.client.pipeline(transaction=True)
+        pipe.incrby(current_key, cost)
+        pipe.pexpire(current_key, int(window_seconds * 2 * 1000))
+        pipe.get(f"{self.prefix}{key}:{index - 1}")
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+    def reset(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class SQLBackend(RateLimitBackend):
+    """
+    Counts in the rate_limit_counters table: one INSERT ... ON CONFLICT DO
+    UPDATE that returns the new count together with the previous window's
+    (a scalar subquery), on an autocommit connection, so one round trip.
+    """
+
+    def __init__(self, engine=default_engine):
+        self.engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+    def incr(self, key, index, cost, window_seconds):
+        counters = models.RateLimitCounter
+        previous = select(counters.count).where(
+            counters.key == key, counters.window_index == index - 1
+        ).scalar_subquery()
+        with Session(self.engine) as db:
+            current, previous = upsert(
+                db, counters, [{
+                    "key": key, "window_index": index, "count": cost,
+                    # Read while it is the current or previous window
+                    "expires_at": math.ceil((index + 2) * window_seconds)
+                }],
+                index_elements=["key", "window_index"], increment=("count",),
+                returning=[counters.count, previous]
+            ).one()
+            db.commit()
+        return current, previous or 0
+
+    def reset(self):
+        with self.engine.connect() as connection:
+            connection.execute(delete(models.RateLimitCounter))
+
+    def prune(self) -> int:
+        """Deletes the counters of windows that are no longer read; returns how many."""
+        with self.engine.connect() as connection:
+            return connection.execute(
+                delete(models.RateLimitCounter).where(models.RateLimitCounter.expires_at < time.time())
+            ).rowcount
+
+
+def create_rate_limit_backend(url: str | None = None) -> RateLimitBackend:
+    """Builds a backend from a RATE_LIMIT_URL-style string."""
+    url = url or RATE_LIMIT_URL
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisBackend(url)
+    if url.startswith("sql"):
+        return SQLBackend()
+    return MemoryBackend()
+
+
+class SlidingWindowLimiter:
+    """
+    Allows `limit` units per `window_seconds` per key, counted in
+    `backend` (a MemoryBackend tracking `max_clients` keys by default).
+    Windows are numbered from the Unix epoch so every process agrees on
+    them. `hit` is thread-safe.
+    """
+
+    def __init__(
+        self,
+        limit: int = RATE_LIMIT_PER_MINUTE,
+        window_seconds: float = RATE_LIMIT_WINDOW_SECONDS,
+        max_clients: int = RATE_LIMIT_MAX_CLIENTS,
+        clock=time.time,
+        backend: RateLimitBackend | None = None,
+        deny_cache_size: int = RATE_LIMIT_DENY_CACHE_SIZE,
+    ):
+        self.limit = limit
+        self.window = window_seconds
+        self.backend = backend if backend is not None else MemoryBackend(max_clients)
+        self._clock = clock
+        self._denied = MemoryCache(max_entries=deny_cache_size, clock=clock)
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    def check_local(self, key: str) -> RateLimitResult | None:
+        """The denial, if this process already denied `key` and its Retry-After has not passed."""
+        blocked_until = self._denied.get(key)
+        if blocked_until is None:
+            return None
+        metrics.incr("rate_limit.local_denies")
+        retry_after = max(0.0, float(blocked_until) - self._clock())
+        return RateLimitResult(False, self.limit, 0, retry_after, retry_after)
+
+    def count(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Counts `cost` units against `key` in the backend and decides."""
+        now = self._clock()
+        position = now / self.window
+        index = int(position)
+        elapsed = position - index
+
+        try:
+            current, previous = self.backend.incr(key, index, cost, self.window)
+        except Exception:
+            # A rate limiter outage should not take the API down with it
+            metrics.incr("rate_limit.backend_errors")
+            return RateLimitResult(True, self.limit, 0, 0.0)
+
+        estimate = previous * (1 - elapsed) + current
+        if estimate > self.limit:
+            retry_after = self._retry_after(current, previous, elapsed, cost)
+            self._denied.set(key, repr(now + retry_after), ttl=retry_after)
+            metrics.incr("rate_limit.denied")
+            return RateLimitResult(False, self.limit, 0, retry_after, retry_after)
+        return RateLimitResult(True, self.limit, max(0, math.floor(self.limit - estimate)), 0.0, (1 - elapsed) * self.window)
+
+    def hit(self, key: str, cost: int = 1) -> RateLimitResult:
+        return self.check_local(key) or self.count(key, cost)
+
+    async def ahit(self, key: str, cost: int = 1) -> RateLimitResult:
+        """`hit` for async callers: a shared backend's round trip runs on the threadpool."""
+        result = self.check_local(key)
+        if result is None:
+            if self.backend.blocking:
+                result = await run_in_threadpool(self.count, key, cost)
+            else:
+                result = self.count(key, cost)
+        return result
+
+    def headers(self, result: RateLimitResult) -> dict:
+        """RateLimit-* headers (IETF draft) for a response, plus Retry-After when denied."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(result.remaining),
+            "RateLimit-Reset": str(math.ceil(result.reset)),
+            "RateLimit-Policy": f"{self.limit};w={math.ceil(self.window)}",
+        }
+        if not result.allowed:
+            headers["Retry-After"] = str(math.ceil(result.retry_after))
+        return headers
+
+    def _retry_after(self, current: int, previous: int, elapsed: float, cost: int) -> float:
+        """How long until `cost` more units fit, given counts that include this denied request."""
+        if cost > self.limit:
+            return self.window
+        if current + cost <= self.limit:
+            # Wait for enough of the previous window to slide out
+            needed = 1 - (self.limit - current - cost) / previous
+            return (needed - elapsed) * self.window
+        # Wait into the next window, where this window's count is the previous one
+        needed = max(0.0, 1 - (self.limit - cost) / current)
+        return (1 - elapsed + needed) * self.window
+
+    def reset(self) -> None:
+        self.backend.reset()
+        self._denied.clear()
+
+
+def client_key(request: Request, trusted_proxies: int = RATE_LIMIT_TRUSTED_PROXIES) -> str:
+    """
+    The client address. Each trusted proxy appends the address it received
+    the request from to X-Forwarded-For, so the client is the entry
+    `trusted_proxies` from the right; entries further left are supplied
+    by the client and could be forged.
+    """
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and trusted_proxies > 0:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(trusted_proxies, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+
+_backend = create_rate_limit_backend()
+rate_limiter = SlidingWindowLimiter(backend=_backend)
+
+async def rate_limit_middleware(request: Request, call_next):
+    """Rate limiting middleware to prevent DDoS and control costs"""
+    if not RATE_LIMIT_ENABLED:
+        return await call_next(request)
+    result = await rate_limiter.ahit(f"ip:{client_key(request)}")
+    if not result.allowed:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded"},
+            headers=rate_limiter.headers(result)
+        )
+    return await call_next(request)
+
+
+class Budget(NamedTuple):
+    """
+    A sustained rate plus a burst allowance, like a token bucket: at most
+    `burst` units at once, refilling at `per_minute`. It is enforced as a
+    sliding window of `burst` units over burst / per_minute minutes.
+    """
+    per_minute: float
+    burst: int
+
+    @property
+    def window_seconds(self) -> float:
+        return self.burst / self.per_minute * 60
+
+
+def _caller(request: Request) -> tuple[str, str]:
+    """("user", user id) for a request with a valid access token, else ("ip", address)."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = decode_access_token(token)
+        except JWTError:
+            pass
+        else:
+            user = claims.get("uid") or claims.get("sub")
+            if user:
+                return "user", str(user)
+    return "ip", client_key(request)
+
+
+class RateLimitPolicy:
+    """
+    A rate limit for a group of routes, used as a FastAPI dependency:
+
+        router = APIRouter(dependencies=[Depends(AI_POLICY)])
+
+        @router.post("/token", dependencies=[Depends(AUTH_POLICY.weighted(3))])
+
+    Authenticated requests are charged per user against `user`, others
+    per client address against `ip`. Without a `user` budget every caller
+    is charged per address, so a token cannot opt out of an `ip` budget;
+    without an `ip` budget anonymous callers are left to the global flood
+    guard. Each request costs `cost` units.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        user: Budget | None = None,
+        ip: Budget | None = None,
+        cost: int = 1,
+        backend: RateLimitBackend | None = None,
+        enabled: bool = RATE_LIMIT_ENABLED,
+        clock=time.time,
+    ):
+        self.name = name
+        self.budgets = {scope: budget for scope, budget in (("user", user), ("ip", ip)) if budget}
+        self.limiters = {
+            scope: SlidingWindowLimiter(
+                limit=budget.burst, window_seconds=budget.window_seconds,
+                backend=backend if backend is not None else _backend, clock=clock
+            )
+            for scope, budget in self.budgets.items()
+        }
+        self.enabled = enabled
+        self.cost = self._checked(cost)
+
+    def _checked(self, cost: int) -> int:
+        for scope, budget in self.budgets.items():
+            if cost > budget.burst:
+                raise ValueError(f"Rate limit policy {self.name!r}: cost {cost} exceeds the {scope} burst of {budget.burst}")
+        return cost
+
+    def weighted(self, cost: int) -> "RateLimitPolicy":
+        """The same budgets, charging `cost` units per request."""
+        policy = copy.copy(self)
+        policy.cost = self._checked(cost)
+        return policy
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        if not self.enabled:
+            return
+        if "user" in self.limiters:
+            scope, caller = _caller(request)
+        else:
+            scope, caller = "ip", client_key(request)
+        limiter = self.limiters.get(scope)
+        if limiter is None:
+            return
+        result = await limiter.ahit(f"{self.name}:{scope}:{caller}", self.cost)
+        headers = limiter.headers(result)
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=headers
+            )
+        response.headers.update(headers)
+
+
+# Logins and registrations run bcrypt (cost 3); OTP checks and refreshes are cheap
+AUTH_POLICY = RateLimitPolicy("auth", ip=Budget(per_minute=30, burst=12))
+# Every call is a Gemini request
+AI_POLICY = RateLimitPolicy("ai", user=Budget(per_minute=5, burst=2))
+# A full-history export holds a database cursor open for its whole download
+EXPORT_POLICY = RateLimitPolicy("export", user=Budget(per_minute=2, burst=2))
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from .. import schemas, services
+from ..database import get_db
+from ..dependencies import get_current_admin
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(get_current_admin)]
+)
+
+BULK_USERS_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": {"type": "array", "items": schemas.BulkUserIn.model_json_schema()}},
+        "text/csv": {"schema": {"type": "string", "example": "email,password,first_name,last_name\n"}},
+    },
+}
+
+@router.post(
+    "/users/bulk",
+    response_model=schemas.BulkUserReport,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+    openapi_extra={"requestBody": BULK_USERS_BODY}
+)
+async def bulk_create_users(
+    request: Request,
+    stream: bool = Query(False, description="Stream one NDJSON line per row as it is processed"),
+    db: Session = Depends(get_db)
+):
+    """
+    Onboards a cohort of users from a JSON array or a CSV file with the
+    columns email, password, first_name and last_name.
+    
+    Users are created inactive, like /auth/register, and each one is sent
+    an OTP email. Existing accounts and repeated emails are skipped, and
+    invalid rows are reported; neither stops the import. With
+    `?stream=true` the report is streamed as NDJSON while the import runs,
+    ending with a `{"summary": ...}` line.
+    """
+    rows = services.parse_bulk_users(await request.body(), request.headers.get("content-type", ""))
+    if not stream:
+        return await services.bulk_create_users(db, rows)
+
+    bind = db.get_bind()
+
+    async def progress():
+        # The request's session is closed when this handler returns,
+        # so the stream writes through a session of its own.
+        with Session(bind=bind) as bulk_db:
+            async for line in services.iter_bulk_create_ndjson(bulk_db, rows):
+                yield line
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
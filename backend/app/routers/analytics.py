@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from datetime import date
+
+from .. import schemas, services
+from ..database import get_db
+from ..dependencies import get_current_user
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    dependencies=[Depends(get_current_user)] # Protect ALL routes in this file
+)
+
+@router.get(
+    "/trends",
+    response_model=schemas.TrendsResponse
+)
+def get_trends(
+    period: str = Query("week", pattern="^(week|month)$"),
+    count: int = Query(12, ge=1, le=104),
+    end_date: date | None = None,
+    window: int = Query(4, ge=1, le=52),
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    Trend analytics over the last `count` ISO weeks or months
+    ending at `end_date` (default: today).
+    
+    Returns per-period averages per logged day, a `window`-period
+    rolling calorie average, the macro split, per-nutrient adequacy
+    against the user's goals, and logging streaks.
+    """
+    return services.get_trends(
+        db=db, user_id=current_user.id, period=period,
+        count=count, end_date=end_date, window=window
+    )
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from .. import schemas, services
 from ..database import get_db
-from ..security import create_access_token
+from ..security import create_access_token, decode_access_token, user_claims
+from ..dependencies import get_current_user, oauth2_scheme
+from ..rate_limit import AUTH_POLICY
 from fastapi.security import OAuth2PasswordRequestForm 
 router = APIRouter(
     prefix="/auth",  # All routes in this file will start with /auth
     tags=["Authentication"]
 )
-@router.post("/token", response_model=schemas.Token)
-def login_for_access_token(
+@router.post("/token", response_model=schemas.Token, dependencies=[Depends(AUTH_POLICY.weighted(3))])
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
     db: Session = Depends(get_db)
 ):
@@ -22,7 +25,7 @@ def login_for_access_token(
     """
     # 1. Authenticate the user (service layer)
     #    We use form_data.username as the email
-    user = services.authenticate_user(db, email=form_data.username, password=form_data.password)
+    user = await services.authenticate_user(db, email=form_data.username, password=form_data.password)
     
     if not user:
         # This is a generic error for security
@@ -33,19 +36,55 @@ def login_for_access_token(
         )
     
     # 2. Create the JWT
-    #    We store the user's email in the 'sub' (subject) field
-    token_data = {"sub": user.email}
+    #    We store the user's email in the 'sub' (subject) field,
+    #    with their id and active flag so requests need no user lookup
+    token_data = user_claims(user)
     access_token = create_access_token(data=token_data)
     
-    # 3. Return the token
-    return {"access_token": access_token, "token_type": "bearer"}
+    # 3. Start a refresh token family, so the client can renew the
+    #    access token without sending the password again
+    refresh_token = await run_in_threadpool(services.issue_refresh_token, db, user.id)
+    
+    # 4. Return the tokens
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh", response_model=schemas.Token, dependencies=[Depends(AUTH_POLICY)])
+def refresh_access_token(
+    refresh_in: schemas.RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Exchanges a refresh token for a new access token and a new refresh token.
+    
+    Each refresh token works once. Reusing one revokes the whole chain
+    it belongs to, and the user must log in again.
+    """
+    return services.refresh_access_token(db=db, refresh_token=refresh_in.refresh_token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    logout_in: schemas.LogoutRequest | None = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    Revokes the access token used for this request, and the refresh
+    token chain too when its `refresh_token` is sent.
+    """
+    services.logout(
+        db=db, user_id=current_user.id, claims=decode_access_token(token),
+        refresh_token=logout_in.refresh_token if logout_in else None
+    )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.post(
     "/register", 
     response_model=schemas.UserRegisterResponse, # <-- CHANGED response model
-    status_code=status.HTTP_201_CREATED
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(AUTH_POLICY.weighted(3))]
 )
-def register_user(
+async def register_user(
     user: schemas.UserCreate, # This is the Request Body
     db: Session = Depends(get_db)
 ):
@@ -57,11 +96,12 @@ def register_user(
     For this simulation, the OTP is returned in the response.
     """
     # Pass all the data to the service layer to do the work
-    return services.create_user(db=db, user=user)
+    return await services.create_user(db=db, user=user)
 
 @router.post(
     "/verify",
-    response_model=schemas.User
+    response_model=schemas.User,
+    dependencies=[Depends(AUTH_POLICY)]
 )
 def verify_user(
     verification_data: schemas.UserVerify, # <-- NEW Request Body
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
+from typing import List
 from sqlalchemy.orm import Session
 from datetime import date, datetime, timezone
 
-from .. import schemas, models, services
+from .. import schemas, services
 from ..database import get_db
 from ..dependencies import get_current_user
 
@@ -19,17 +20,27 @@ router = APIRouter(
 def get_dashboard_report(
     # The user can specify a date, or it defaults to *today*
     log_date: date | None = None,
+    include_meals: bool = False,
+    nutrients: List[str] = Query([], description="Extra nutrients to total per meal (with include_meals)"),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.Principal = Depends(get_current_user)
 ):
     """
     Provides a full nutritional gap analysis for the logged-in user
     for a specific date.
     
     If no date is provided, it defaults to the current date.
+    With `include_meals=true`, the response also breaks the main macros
+    (and any `nutrients` requested) down per meal type.
+    The payload is served from the dashboard cache when nothing
+    affecting it has changed.
     """
     if log_date is None:
         log_date = datetime.now(timezone.utc).date()
         
-    return services.get_dashboard_data(db=db, user=current_user, log_date=log_date)
+    payload = services.get_dashboard_json(
+        db=db, user=current_user, log_date=log_date,
+        include_meals=include_meals, meal_nutrients=nutrients
+    )
+    return Response(content=payload, media_type="application/json")
 
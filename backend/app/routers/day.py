@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+from datetime import date
+
+from .. import schemas, services
+from ..database import get_db
+from ..dependencies import get_current_user
+
+router = APIRouter(
+    prefix="/day",
+    tags=["Dashboard"],
+    dependencies=[Depends(get_current_user)]
+)
+
+@router.get(
+    "/{log_date}",
+    response_model=schemas.DayView
+)
+def get_day_view(
+    log_date: date,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    The gap analysis and the itemized food logs for one date, in one response.
+    
+    Replaces calling `GET /dashboard/` and `GET /food-logs/` side by side:
+    both halves are built from a single fetch of the day's logs.
+    """
+    payload = services.get_day_view_json(db=db, user=current_user, log_date=log_date)
+    return Response(content=payload, media_type="application/json")
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import date
+
+from .. import schemas, services
+from ..database import get_db
+from ..dependencies import get_current_user
+from ..rate_limit import EXPORT_POLICY
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export"],
+    dependencies=[Depends(get_current_user), Depends(EXPORT_POLICY)]
+)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@router.get(
+    "/logs",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}}
+)
+def export_logs(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    Downloads the user's full food log history, one row per log with the
+    nutrient amounts of the logged quantity, as NDJSON or CSV.
+    
+    The file is streamed as it is read, so large histories start
+    downloading immediately and never sit in memory.
+    """
+    user_id = current_user.id
+    bind = db.get_bind()
+
+    def stream():
+        # The request's session is closed when this handler returns,
+        # so the stream reads through a session of its own.
+        with Session(bind=bind) as export_db:
+            yield from services.iter_log_export(export_db, user_id, format)
+
+    filename = f"nutritracker-logs-{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        stream(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, status
+import asyncio
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import date
 
-from .. import schemas, models, services
+from .. import schemas, services
 from ..database import get_db
 from ..dependencies import get_current_user # <-- Our "Security Guard"
+from ..services.log_batcher import log_batcher
 
 # Create a new router
 router = APIRouter(
@@ -20,10 +23,10 @@ router = APIRouter(
     response_model=schemas.Log, 
     status_code=status.HTTP_201_CREATED
 )
-def create_log(
+async def create_log(
     log_in: schemas.LogCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.Principal = Depends(get_current_user)
 ):
     """
     Creates a new food log entry for the *currently authenticated user*.
@@ -31,19 +34,96 @@ def create_log(
     The user is identified by their JWT token.
     The log data is sent in the request body.
     """
+    # With write-behind enabled, the entry joins the next batched insert;
+    # we only answer once that batch has been committed. A full queue
+    # falls through to the synchronous write.
+    if log_batcher.enabled:
+        future = log_batcher.submit(current_user.id, log_in)
+        if future is not None:
+            return await asyncio.wrap_future(future)
+    
     # The 'current_user' is our fully validated User model from the dependency.
     # We pass their ID to the service layer to create the link.
-    return services.create_log_entry(
+    return await run_in_threadpool(
+        services.create_log_entry,
         db=db, 
         log_in=log_in, 
         user_id=current_user.id
     )
 
+@router.post(
+    "/bulk",
+    response_model=List[schemas.Log],
+    status_code=status.HTTP_201_CREATED
+)
+def create_logs_bulk(
+    logs_in: schemas.LogBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    Creates several food log entries in one transaction (e.g. every
+    ingredient of a recipe). If any food id is unknown, nothing is logged.
+    """
+    return services.create_log_entries(
+        db=db,
+        logs_in=logs_in.entries,
+        user_id=current_user.id
+    )
+
+@router.post(
+    "/copy",
+    response_model=List[schemas.FoodLogResponse],
+    status_code=status.HTTP_201_CREATED
+)
+def copy_logs(
+    copy_in: schemas.LogCopy,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    Copies the entries of `source_date` (or only its `meal_type` meal)
+    to `target_date`, e.g. "same as yesterday". Returns the new entries.
+    """
+    return services.copy_log_entries(db=db, copy_in=copy_in, user_id=current_user.id)
+
 @router.get("/", response_model=List[schemas.FoodLogResponse])
 def get_food_logs(
     log_date: date | None = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.Principal = Depends(get_current_user)
 ):
     """Get food logs for a specific date or today"""
-    return services.get_food_logs(db=db, user_id=current_user.id, log_date=log_date)
\ No newline at end of file
+    return services.get_food_logs(db=db, user_id=current_user.id, log_date=log_date)
+
+@router.get("/quick-add", response_model=List[schemas.QuickAddFood])
+def get_quick_add(
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    The user's most frequent foods, weighted towards recent ones,
+    with the quantity they usually log.
+    """
+    return services.get_quick_add(db=db, user_id=current_user.id, limit=limit)
+
+@router.put("/{log_id}", response_model=schemas.Log)
+def update_log(
+    log_id: int,
+    log_in: schemas.LogUpdate,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """Updates the fields sent for one of the user's log entries"""
+    return services.update_log_entry(db=db, log_id=log_id, log_in=log_in, user_id=current_user.id)
+
+@router.delete("/{log_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_log(
+    log_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """Deletes one of the user's log entries"""
+    services.delete_log_entry(db=db, log_id=log_id, user_id=current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from ..dependencies import get_current_admin
+from ..metrics import metrics
 
 # 1. Create a new APIRouter
 # This is like a "mini" FastAPI app
@@ -20,4 +22,20 @@ def read_health():
     A 'health check' endpoint that services can use
     to see if the API is alive.
     """
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@router.get("/metrics", dependencies=[Depends(get_current_admin)])
+def read_metrics():
+    """
+    In-process counters and observations (cache hit/miss counts,
+    batch sizes, latencies) for this instance, plus cache hit rates.
+    They describe the internals (revocations, refresh tokens, rate-limit
+    denials), so only admins can read them.
+    """
+    return {
+        **metrics.snapshot(),
+        "hit_rates": {
+            cache: metrics.ratio(f"{cache}.hits", f"{cache}.misses")
+            for cache in ("dashboard_cache", "principal_cache", "token_cache")
+        }
+    }
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, Response, status
+from sqlalchemy.orm import Session
+from typing import List
+
+from .. import schemas, services
+from ..database import get_db
+from ..dependencies import get_current_user
+
+router = APIRouter(
+    prefix="/meal-templates",
+    tags=["Meal Templates"],
+    dependencies=[Depends(get_current_user)]
+)
+
+@router.post("/", response_model=schemas.MealTemplate, status_code=status.HTTP_201_CREATED)
+def create_meal_template(
+    template_in: schemas.MealTemplateCreate,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """Saves a list of items to log together later"""
+    return services.create_template(db=db, template_in=template_in, user_id=current_user.id)
+
+@router.get("/", response_model=List[schemas.MealTemplate])
+def list_meal_templates(
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """The current user's meal templates"""
+    return services.get_templates(db=db, user_id=current_user.id)
+
+@router.get("/{template_id}", response_model=schemas.MealTemplate)
+def get_meal_template(
+    template_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    return services.get_template(db=db, template_id=template_id, user_id=current_user.id)
+
+@router.put("/{template_id}", response_model=schemas.MealTemplate)
+def update_meal_template(
+    template_id: int,
+    template_in: schemas.MealTemplateCreate,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """Replaces a template's name, meal type and items"""
+    return services.update_template(db=db, template_id=template_id, template_in=template_in, user_id=current_user.id)
+
+@router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_meal_template(
+    template_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    services.delete_template(db=db, template_id=template_id, user_id=current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.post("/{template_id}/log", response_model=List[schemas.Log], status_code=status.HTTP_201_CREATED)
+def log_meal_template(
+    template_id: int,
+    log_in: schemas.MealTemplateLog,
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    Logs every item of the template on `log_date`, in one transaction.
+    The template's meal type is used unless another one is given.
+    """
+    return services.log_template(db=db, template_id=template_id, log_in=log_in, user_id=current_user.id)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from .. import schemas, services, models
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, get_current_user_row
 from ..database import get_db
 
 router = APIRouter(
@@ -19,7 +19,7 @@ router = APIRouter(
 def create_or_update_current_user_profile(
     profile_in: schemas.ProfileCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user_row)
 ):
     """
     Create or update the profile for the currently authenticated user.
@@ -44,7 +44,7 @@ def create_or_update_current_user_profile(
     summary="Get User Profile"
 )
 def get_current_user_profile(
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user_row)
 ):
     """
     Retrieve the profile for the currently authenticated user.
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
-from .. import schemas, models
+from .. import schemas
 from ..database import get_db
 from ..dependencies import get_current_user
 from ..services.recipe_parser import parse_recipe_text
@@ -32,7 +32,7 @@ class RecipeResponse(BaseModel):
 def parse_recipe(
     request: RecipeRequest,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.Principal = Depends(get_current_user)
 ):
     """Parse natural language recipe into ingredients"""
     ingredients = parse_recipe_text(db, request.recipe_text)
@@ -52,11 +52,9 @@ def parse_recipe(
             }
             response_ingredients.append(ingredient_data)
             
-            # Calculate calories if food found
+            # Calculate calories if food found (kcal per 100 g is stored on the food)
             if ing['food']:
-                # Assuming 100g base nutrition data
-                calories_per_100g = 200  # Default estimate
-                total_calories += (ing['grams'] / 100) * calories_per_100g
+                total_calories += (ing['grams'] / 100) * ing['food'].energy_kcal
     
     return {
         'ingredients': response_ingredients,
@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.dependencies import get_db, get_current_user
-from app.models import User, UserProfile
+from app.models import UserProfile
+from app.rate_limit import AI_POLICY
+from app.schemas import Principal
 from app.services.recommendation_service import RecommendationService
+from app.services.target_service import get_user_targets
 
-router = APIRouter(prefix="/recommendations", tags=["recommendations"])
+router = APIRouter(prefix="/recommendations", tags=["recommendations"], dependencies=[Depends(AI_POLICY)])
 
 @router.get("/")
 async def get_recommendations(  # Keep async here
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get personalized weight loss recommendations"""
@@ -31,7 +34,11 @@ async def get_recommendations(  # Keep async here
         'preferred_cuisine': profile.preferred_cuisine or 'indian'
     }
     
+    # BMR/TDEE/BMI were computed once at profile write time
+    target = get_user_targets(db, current_user.id)
+    targets = {'bmr': target.bmr, 'tdee': target.tdee, 'bmi': target.bmi}
+    
     service = RecommendationService()
-    recommendations = await service.generate_recommendations(profile_data)  # Now with await
+    recommendations = await service.generate_recommendations(profile_data, targets)  # Now with await
     
     return recommendations
\ No newline at end of file
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.orm import Session
+
+from .. import schemas, services
+from ..database import get_db
+from ..dependencies import get_current_user
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["Sync"],
+    dependencies=[Depends(get_current_user)]
+)
+
+@router.get(
+    "/",
+    response_model=schemas.SyncResponse,
+    responses={204: {"description": "Nothing changed since `since`"}}
+)
+def sync_logs(
+    since: int = Query(0, ge=0, description="The next_since returned by the previous sync (0 for a full sync)"),
+    limit: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    Returns the user's food log changes (creates, updates and deletes)
+    after sequence number `since`, oldest first.
+    
+    Responds 204 with an empty body when nothing changed. When `has_more`
+    is true, call again with `since=next_since` to fetch the next page.
+    """
+    changes = services.get_changes(db=db, user_id=current_user.id, since=since, limit=limit)
+    if not changes.changes:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return changes
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
 from .. import schemas, models
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user_row
 
 router = APIRouter(
     prefix="/users",
@@ -15,7 +14,7 @@ router = APIRouter(
     response_model=schemas.User
 )
 def read_users_me(
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user_row)
 ):
     """
     Fetches the profile for the *currently authenticated user*.
@@ -1,5 +1,9 @@
 from .food import Food, FoodCreate, FoodBase, FoodCategory, FoodCategoryCreate, FoodCategoryBase
-from .auth import User, UserCreate, UserBase, UserRegisterResponse, UserVerify, Token, TokenData
-from .foodLog import MealTypeEnum, LogBase, Log, LogCreate, FoodLogResponse
-from .dashboard import DashboardResponse, NutrientReport
-from .profile import ProfileCreate, Profile, ProfileBase
\ No newline at end of file
+from .auth import User, UserCreate, UserBase, UserRegisterResponse, UserVerify, Token, TokenData, Principal, RefreshRequest, LogoutRequest
+from .foodLog import MealTypeEnum, LogBase, Log, LogCreate, LogBulkCreate, LogCopy, LogUpdate, FoodLogResponse, QuickAddFood
+from .dashboard import DashboardResponse, NutrientReport, MealBreakdown, DayView
+from .profile import ProfileCreate, Profile, ProfileBase
+from .analytics import TrendsResponse, TrendPeriod, MacroSplit, NutrientAdequacy
+from .sync import SyncResponse, SyncChange, SyncedLog
+from .mealTemplate import MealTemplate, MealTemplateCreate, MealTemplateItem, MealTemplateItemIn, MealTemplateLog
+from .admin import BulkUserIn, BulkUserResult, BulkUserReport
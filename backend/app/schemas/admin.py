@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from .auth import UserCreate
+
+# One user of a bulk import; unlike registration, names are required
+class BulkUserIn(UserCreate):
+    first_name: str
+    last_name: str
+
+# What happened to one row of a bulk import
+class BulkUserResult(BaseModel):
+    row: int # 1-based, not counting a CSV header
+    email: Optional[str] = None
+    status: str # "created", "exists", "duplicate" (earlier in the file) or "invalid"
+    user_id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkUserReport(BaseModel):
+    total: int
+    created: int
+    skipped: int # "exists" and "duplicate" rows
+    failed: int # "invalid" rows
+    results: List[BulkUserResult]
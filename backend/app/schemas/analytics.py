@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+class MacroSplit(BaseModel):
+    """Share of energy (from 4/4/9 kcal per g) coming from each macro."""
+    protein_pct: float
+    carbs_pct: float
+    fat_pct: float
+
+class NutrientAdequacy(BaseModel):
+    nutrient_name: str
+    unit: str
+    daily_average: float # Per logged day
+    goal: float
+    adequacy_pct: float # daily_average / goal
+
+# One ISO week or calendar month
+class TrendPeriod(BaseModel):
+    period_start: date
+    days_logged: int
+    entries: int
+    goal_achieved_days: int # Days reaching 80% of the energy goal
+    
+    avg_calories: float
+    avg_protein: float
+    avg_fat: float
+    avg_carbs: float
+    rolling_avg_calories: float # Over this and the previous logged periods in the window
+    
+    macro_split: MacroSplit
+    adequacy: List[NutrientAdequacy]
+
+class TrendsResponse(BaseModel):
+    period: str
+    periods: List[TrendPeriod]
+    current_streak: int
+    longest_streak: int
+    last_logged_date: Optional[date] = None
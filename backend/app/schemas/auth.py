@@ -42,9 +42,37 @@ class Token(BaseModel):
     """
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None # Exchange at /auth/refresh for a new pair
+
+class RefreshRequest(BaseModel):
+    """
+    The schema the client sends to the /refresh endpoint.
+    """
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    """
+    Optionally sent to /logout, to end the refresh token chain as well.
+    """
+    refresh_token: Optional[str] = None
 
 class TokenData(BaseModel):
     """
     The data we store *inside* the JWT (the payload).
+    Tokens issued before the `uid`/`act` claims only carry the email.
     """
     email: Optional[str] = None
+    user_id: Optional[int] = None # 'uid' claim
+    is_active: Optional[bool] = None # 'act' claim
+
+class Principal(BaseModel):
+    """
+    The authenticated user as most endpoints see it: built from the token
+    claims and the principal cache, without loading the User row.
+    """
+    id: int
+    email: str
+    is_active: bool
+    
+    class Config:
+        from_attributes = True
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import date
-from typing import List
+from typing import Dict, List, Optional
+from .foodLog import FoodLogResponse
 
 # This schema defines a single row in our final report
 class NutrientReport(BaseModel):
@@ -10,6 +11,15 @@ class NutrientReport(BaseModel):
     consumed: float
     gap: float # The difference (consumed - goal)
 
+# Totals for one meal type (Breakfast/Lunch/Dinner/Snack)
+class MealBreakdown(BaseModel):
+    meal_type: str
+    calories: float
+    protein: float
+    fat: float
+    carbs: float
+    nutrients: Dict[str, float] = {} # Any extra nutrients the client asked for
+
 # This is the main object our API will return
 class DashboardResponse(BaseModel):
     log_date: date
@@ -27,7 +37,15 @@ class DashboardResponse(BaseModel):
     
     # And a detailed breakdown of all nutrients
     detailed_analysis: List[NutrientReport]
+    
+    # Only present when requested with ?include_meals=true
+    meal_breakdown: Optional[List[MealBreakdown]] = None
 
     class Config:
         orm_mode = True
 
+
+# The dashboard and the itemized logs of one day, in one response
+class DayView(BaseModel):
+    dashboard: DashboardResponse
+    logs: List[FoodLogResponse]
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
 from datetime import date, datetime
 from enum import Enum
 from .food import Food  # Import the schema we'll use for nesting
@@ -22,6 +23,24 @@ class LogBase(BaseModel):
 class LogCreate(LogBase):
     pass
 
+# Bulk Create Schema: several entries logged in one request (e.g. a recipe)
+class LogBulkCreate(BaseModel):
+    entries: List[LogCreate] = Field(..., min_length=1, max_length=100)
+
+# Copy Schema: duplicate a day's (or one meal's) entries onto another date
+class LogCopy(BaseModel):
+    source_date: date
+    target_date: date
+    meal_type: Optional[MealTypeEnum] = None # Only copy this meal
+    target_meal_type: Optional[MealTypeEnum] = None # Log the copies as this meal instead
+
+# Update Schema: only the fields sent are changed
+class LogUpdate(BaseModel):
+    food_id: Optional[int] = None
+    quantity_grams: Optional[float] = None
+    log_date: Optional[date] = None
+    meal_type: Optional[MealTypeEnum] = None
+
 # 4. Response Schema: This is what our API will return
 #    It includes the database-generated fields (id, user_id, created_at)
 #    and the nested 'food' object for context.
@@ -48,3 +67,12 @@ class FoodLogResponse(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+
+# A quick-add suggestion: one of the user's most frequent recent foods
+class QuickAddFood(BaseModel):
+    food_id: int
+    food_name: str
+    count: int
+    last_logged_at: Optional[datetime] = None
+    typical_grams: float
+    calories: float # For typical_grams
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date
+from typing import List, Optional
+from .foodLog import MealTypeEnum
+
+# One item of a template, as sent by the client
+class MealTemplateItemIn(BaseModel):
+    food_id: int
+    quantity_grams: float = Field(..., gt=0)
+
+# Create/replace schema: PUT sends the whole template again
+class MealTemplateCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    meal_type: MealTypeEnum
+    items: List[MealTemplateItemIn] = Field(..., min_length=1, max_length=50)
+
+class MealTemplateItem(BaseModel):
+    food_id: int
+    food_name: str
+    quantity_grams: float
+
+class MealTemplate(BaseModel):
+    id: int
+    name: str
+    meal_type: str
+    calories: float # Total for all items, precomputed
+    items: List[MealTemplateItem]
+
+    model_config = ConfigDict(from_attributes=True)
+
+# Logging a template: the date, and optionally a different meal type
+class MealTemplateLog(BaseModel):
+    log_date: date
+    meal_type: Optional[MealTypeEnum] = None
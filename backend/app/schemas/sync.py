@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+# A log as stored by an offline client
+class SyncedLog(BaseModel):
+    id: int
+    food_id: int
+    food_name: str
+    quantity_grams: float
+    log_date: date
+    meal_type: str
+    calories: float
+
+# One change in the user's log feed
+class SyncChange(BaseModel):
+    seq: int
+    op: str # "upsert" or "delete"
+    log_id: int
+    log: Optional[SyncedLog] = None # The log after the change; absent for deletes
+
+class SyncResponse(BaseModel):
+    changes: List[SyncChange]
+    next_since: int # Pass as ?since= on the next sync
+    has_more: bool # More changes are waiting; sync again right away
@@ -1,22 +1,33 @@
 import bcrypt
+import hashlib
+import hmac
+import json
 import secrets
 import string
 import os
+import time
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from . import schemas # We'll need this for the token payload
+from .cache import MemoryCache
+from .metrics import metrics
 from dotenv import load_dotenv
 load_dotenv()
 # --- LOAD FROM .ENV WITH DEFAULTS ---
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key-for-testing")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# bcrypt work factor: each +1 doubles the cost of a hash and of a login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Verified tokens remembered by decode_access_token (LRU beyond this)
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
 
 
-def hash_password(password: str) -> str:
-    """Hashes a plain-text password using bcrypt."""
+def hash_password(password: str, rounds: int | None = None) -> str:
+    """Hashes a plain-text password using bcrypt at BCRYPT_ROUNDS."""
     # Generate a "salt" to make the hash unique
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     # Hash the password (must be encoded to bytes)
     hashed_pw = bcrypt.hashpw(password.encode('utf-8'), salt)
     # Return the hash as a string
@@ -32,6 +43,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(plain_bytes, hashed_bytes)
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a hash ("$2b$<rounds>$...") was made at another cost than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+def user_claims(user) -> dict:
+    """
+    The claims identifying a user in their access token: email ('sub'),
+    id ('uid') and active flag ('act'). The signature covers all three.
+    """
+    return {"sub": user.email, "uid": user.id, "act": user.is_active}
+
 # --- NEW FUNCTION ---
 def create_access_token(data: dict) -> str:
     """
@@ -39,10 +64,46 @@ def create_access_token(data: dict) -> str:
     """
     to_encode = data.copy()
     
-    # Add an expiry time
+    # Add an expiry time, and a unique id so the token can be revoked
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expires_at})
+    to_encode.update({"exp": expires_at, "jti": secrets.token_hex(16)})
     
     # Create the token
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def create_refresh_token() -> str:
+    """A new opaque refresh token (256 random bits)."""
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    """
+    The HMAC-SHA256 of a refresh token under SECRET_KEY: what we store
+    and look up. The tokens are random, so no salt or slow hash is needed,
+    and a leaked table cannot be replayed without the key.
+    """
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+# Claims of already-verified tokens, keyed by the token's SHA-256 so the
+# tokens themselves are never kept. Each entry lives until its token's
+# 'exp'; after that jwt.decode sees the token again and rejects it.
+_verified_tokens = MemoryCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
+
+def decode_access_token(token: str) -> dict:
+    """
+    jwt.decode, skipping the signature check and claim parsing for a
+    token that was already verified and has not expired.
+    Raises JWTError like jwt.decode.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    cached = _verified_tokens.get(key)
+    if cached is not None:
+        metrics.incr("token_cache.hits")
+        return json.loads(cached)
+
+    metrics.incr("token_cache.misses")
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        _verified_tokens.set(key, json.dumps(payload), ttl=expires_in)
+    return payload
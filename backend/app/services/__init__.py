@@ -14,16 +14,44 @@ from .auth_service import (
     verify_user_otp,
     get_user_by_email,
     authenticate_user)
+from .token_service import issue_refresh_token, refresh_access_token, logout
+from .onboarding_service import parse_bulk_users, bulk_create_users, iter_bulk_create_ndjson
 from .foodLog_service import (
     create_log_entry,
+    create_log_entries,
+    copy_log_entries,
+    update_log_entry,
+    delete_log_entry,
     get_food_logs
 )
+from .sync_service import get_changes
+from .export_service import iter_log_export
+from .foodStats_service import get_quick_add, rebuild_food_stats
+from .mealTemplate_service import (
+    create_template,
+    get_templates,
+    get_template,
+    update_template,
+    delete_template,
+    log_template
+)
 
-from .dashboard_service import get_dashboard_data
+from .dashboard_service import get_dashboard_data, get_dashboard_json, get_day_view, get_day_view_json
+from .dashboard_cache import dashboard_cache
 from .profile_service import (
     create_or_update_profile,
     get_profile
 )
+from .target_service import (
+    compute_user_targets,
+    get_user_targets,
+    get_reference_version,
+    bump_reference_version
+)
+from .analytics_service import (
+    get_trends,
+    rebuild_rollups
+)
 # The __all__ list controls what 'from app.services import *' would import
 # It's good practice, but this is where your error was.
 __all__ = [
@@ -36,9 +64,39 @@ __all__ = [
     "verify_user_otp",
     "get_user_by_email",
     "authenticate_user",
+    "issue_refresh_token",
+    "refresh_access_token",
+    "logout",
+    "parse_bulk_users",
+    "bulk_create_users",
+    "iter_bulk_create_ndjson",
     "create_log_entry",
+    "create_log_entries",
+    "copy_log_entries",
+    "update_log_entry",
+    "delete_log_entry",
     "get_food_logs",
     "get_dashboard_data", # <-- THIS COMMA WAS MISSING
+    "get_dashboard_json",
+    "get_day_view",
+    "get_day_view_json",
+    "dashboard_cache",
     "create_or_update_profile",
-    "get_profile"
+    "get_profile",
+    "compute_user_targets",
+    "get_user_targets",
+    "get_reference_version",
+    "bump_reference_version",
+    "get_trends",
+    "rebuild_rollups",
+    "get_changes",
+    "iter_log_export",
+    "get_quick_add",
+    "rebuild_food_stats",
+    "create_template",
+    "get_templates",
+    "get_template",
+    "update_template",
+    "delete_template",
+    "log_template"
 ]
@@ -0,0 +1,327 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable, List, NamedTuple
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..database import upsert
+from .target_service import get_user_targets
+
+PERIODS = ("week", "month")
+GOAL_ACHIEVED_RATIO = 0.8 # A day "meets the goal" at 80% of the energy target
+
+class NutrientVector(NamedTuple):
+    """Nutrient amounts keyed by nutrient id, plus the energy (kcal) among them."""
+    amounts: dict
+    energy_kcal: float
+
+    def scaled(self, factor: float) -> "NutrientVector":
+        return NutrientVector({k: v * factor for k, v in self.amounts.items()}, self.energy_kcal * factor)
+
+    def to_json(self) -> dict:
+        return {"amounts": {str(k): v for k, v in self.amounts.items()}, "energy_kcal": self.energy_kcal}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "NutrientVector":
+        return cls({int(k): v for k, v in data["amounts"].items()}, data["energy_kcal"])
+
+def period_start(period: str, day: date) -> date:
+    """The first day of the ISO week (Monday) or month containing `day`."""
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown period: {period}")
+
+def _previous_period_start(period: str, start: date) -> date:
+    if period == "week":
+        return start - timedelta(days=7)
+    return (start - timedelta(days=1)).replace(day=1)
+
+# --- INCREMENTAL MAINTENANCE (called from log writes) ---
+
+def food_nutrients(db: Session, food_ids: set) -> dict:
+    """{food_id: [(nutrient_id, value_per_100g, is_energy)]} with one query."""
+    rows = db.query(
+        models.FoodNutrient.food_id,
+        models.FoodNutrient.nutrient_id,
+        models.FoodNutrient.value_per_100g,
+        models.Nutrient.name
+    ).join(
+        models.Nutrient, models.FoodNutrient.nutrient_id == models.Nutrient.id
+    ).filter(models.FoodNutrient.food_id.in_(food_ids)).all()
+
+    per_food = defaultdict(list)
+    for food_id, nutrient_id, value, name in rows:
+        per_food[food_id].append((nutrient_id, value, name == "Energy"))
+    return per_food
+
+def _sum_nutrients(per_food: dict, items: Iterable[tuple[int, float]]) -> NutrientVector:
+    amounts = defaultdict(float)
+    energy = 0.0
+    for food_id, grams in items:
+        scale_factor = grams / 100.0
+        for nutrient_id, value, is_energy in per_food[food_id]:
+            amounts[nutrient_id] += value * scale_factor
+            if is_energy:
+                energy += value * scale_factor
+    return NutrientVector(dict(amounts), energy)
+
+def compute_nutrient_totals(db: Session, items: Iterable[tuple[int, float]]) -> NutrientVector:
+    """
+    Sums the nutrients of (food_id, quantity_grams) items with one query
+    for all the foods involved.
+    """
+    items = list(items)
+    food_ids = {food_id for food_id, _ in items}
+    if not food_ids:
+        return NutrientVector({}, 0.0)
+    return _sum_nutrients(food_nutrients(db, food_ids), items)
+
+def compute_nutrient_totals_by_date(db: Session, items: Iterable[tuple[date, int, float]]) -> dict:
+    """
+    Like `compute_nutrient_totals`, for (log_date, food_id, quantity_grams)
+    items spanning several days: returns {log_date: (entries, NutrientVector)},
+    still with one query.
+    """
+    by_date = defaultdict(list)
+    for log_date, food_id, grams in items:
+        by_date[log_date].append((food_id, grams))
+    if not by_date:
+        return {}
+    per_food = food_nutrients(db, {food_id for day in by_date.values() for food_id, _ in day})
+    return {
+        log_date: (len(day_items), _sum_nutrients(per_food, day_items))
+        for log_date, day_items in by_date.items()
+    }
+
+def record_log_delta(db: Session, user_id: int, log_date: date, vector: NutrientVector, entries: int) -> None:
+    """
+    Applies a log write to the user's day/week/month rollups.
+
+    `entries` is the number of log rows added (negative when removing),
+    and `vector` their nutrient totals (negated when removing).
+    Runs inside the caller's transaction; the caller commits.
+    """
+    if entries == 0 and not vector.amounts:
+        return
+
+    # 1. The day row tells us whether the day went from empty to logged (or back)
+    day_entries = upsert(
+        db, models.LogRollup,
+        [{"user_id": user_id, "period": "day", "period_start": log_date,
+          "entries": entries, "days_logged": 0, "energy_kcal": vector.energy_kcal}],
+        index_elements=["user_id", "period", "period_start"],
+        increment=("entries", "energy_kcal"),
+        returning=[models.LogRollup.entries]
+    ).scalar_one()
+    days_delta = int(day_entries > 0) - int(day_entries - entries > 0)
+    if days_delta:
+        db.query(models.LogRollup).filter_by(
+            user_id=user_id, period="day", period_start=log_date
+        ).update({"days_logged": int(day_entries > 0)}, synchronize_session=False)
+
+    # 2. The week and month rows
+    upsert(
+        db, models.LogRollup,
+        [{"user_id": user_id, "period": period, "period_start": period_start(period, log_date),
+          "entries": entries, "days_logged": days_delta, "energy_kcal": vector.energy_kcal}
+         for period in PERIODS],
+        index_elements=["user_id", "period", "period_start"],
+        increment=("entries", "days_logged", "energy_kcal")
+    )
+
+    # 3. Per-nutrient totals for the week and month
+    if vector.amounts:
+        upsert(
+            db, models.NutrientRollup,
+            [{"user_id": user_id, "period": period, "period_start": period_start(period, log_date),
+              "nutrient_id": nutrient_id, "amount": amount}
+             for period in PERIODS for nutrient_id, amount in vector.amounts.items()],
+            index_elements=["user_id", "period", "period_start", "nutrient_id"],
+            increment=("amount",)
+        )
+
+def rebuild_rollups(db: Session, user_id: int | None = None) -> int:
+    """
+    Recomputes rollups from food_logs (for one user, or everyone).
+    Used to backfill existing history; returns the number of days rebuilt.
+    """
+    rollups = (models.LogRollup, models.NutrientRollup)
+    for model in rollups:
+        query = db.query(model)
+        if user_id is not None:
+            query = query.filter(model.user_id == user_id)
+        query.delete(synchronize_session=False)
+
+    amount = models.FoodNutrient.value_per_100g * models.FoodLog.quantity_grams / 100.0
+    day_query = db.query(
+        models.FoodLog.user_id, models.FoodLog.log_date, func.count(models.FoodLog.id)
+    ).group_by(models.FoodLog.user_id, models.FoodLog.log_date)
+    nutrient_query = db.query(
+        models.FoodLog.user_id, models.FoodLog.log_date, models.FoodNutrient.nutrient_id,
+        models.Nutrient.name, func.sum(amount)
+    ).join(
+        models.FoodNutrient, models.FoodNutrient.food_id == models.FoodLog.food_id
+    ).join(
+        models.Nutrient, models.Nutrient.id == models.FoodNutrient.nutrient_id
+    ).group_by(
+        models.FoodLog.user_id, models.FoodLog.log_date, models.FoodNutrient.nutrient_id, models.Nutrient.name
+    )
+    if user_id is not None:
+        day_query = day_query.filter(models.FoodLog.user_id == user_id)
+        nutrient_query = nutrient_query.filter(models.FoodLog.user_id == user_id)
+
+    vectors = defaultdict(lambda: NutrientVector({}, 0.0))
+    for uid, log_date, nutrient_id, name, total in nutrient_query:
+        vector = vectors[(uid, log_date)]
+        vector.amounts[nutrient_id] = total
+        if name == "Energy":
+            vectors[(uid, log_date)] = vector._replace(energy_kcal=total)
+
+    days = 0
+    for uid, log_date, entries in day_query.all():
+        record_log_delta(db, uid, log_date, vectors[(uid, log_date)], entries)
+        days += 1
+    db.commit()
+    return days
+
+# --- TRENDS ---
+
+def _streaks(logged_days: set, end_date: date) -> tuple[int, int]:
+    """(current, longest). The current streak may end today or yesterday."""
+    longest = run = 0
+    previous = None
+    for day in sorted(logged_days):
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+
+    current = 0
+    day = end_date if end_date in logged_days else end_date - timedelta(days=1)
+    while day in logged_days:
+        current += 1
+        day -= timedelta(days=1)
+    return current, longest
+
+def get_trends(db: Session, user_id: int, period: str = "week", count: int = 12,
+               end_date: date | None = None, window: int = 4) -> schemas.TrendsResponse:
+    """
+    Server-side trend analytics over the last `count` weeks or months,
+    read from the rollup tables (a few indexed range reads, no per-day
+    dashboard computation).
+    """
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {', '.join(PERIODS)}")
+    end_date = end_date or date.today()
+
+    starts = [period_start(period, end_date)]
+    for _ in range(count - 1):
+        starts.append(_previous_period_start(period, starts[-1]))
+    starts.reverse()
+    first_start = starts[0]
+
+    # 1. Period rows
+    period_rows = {
+        row.period_start: row for row in db.query(models.LogRollup).filter(
+            models.LogRollup.user_id == user_id,
+            models.LogRollup.period == period,
+            models.LogRollup.period_start.between(first_start, starts[-1])
+        )
+    }
+
+    # 2. Nutrient totals for those periods
+    nutrient_rows = db.query(
+        models.NutrientRollup.period_start, models.NutrientRollup.amount, models.Nutrient.name
+    ).join(
+        models.Nutrient, models.Nutrient.id == models.NutrientRollup.nutrient_id
+    ).filter(
+        models.NutrientRollup.user_id == user_id,
+        models.NutrientRollup.period == period,
+        models.NutrientRollup.period_start.between(first_start, starts[-1])
+    ).all()
+    totals = defaultdict(dict)
+    for start, amount, name in nutrient_rows:
+        totals[start][name] = amount
+
+    # 3. Day rows, for streaks and goal achievement (at least a year back)
+    day_rows = db.query(models.LogRollup.period_start, models.LogRollup.energy_kcal).filter(
+        models.LogRollup.user_id == user_id,
+        models.LogRollup.period == "day",
+        models.LogRollup.entries > 0,
+        models.LogRollup.period_start.between(min(first_start, end_date - timedelta(days=366)), end_date)
+    ).all()
+    logged_days = {day for day, _ in day_rows}
+
+    # 4. Goals, when the user has a profile
+    try:
+        target = get_user_targets(db, user_id)
+    except HTTPException:
+        target = None
+    goals = target.nutrient_goals if target else []
+
+    achieved = defaultdict(int)
+    if target and target.energy_kcal:
+        for day, energy in day_rows:
+            if energy >= target.energy_kcal * GOAL_ACHIEVED_RATIO:
+                achieved[period_start(period, day)] += 1
+
+    periods: List[schemas.TrendPeriod] = []
+    recent_calories = []
+    for start in starts:
+        row = period_rows.get(start)
+        days_logged = row.days_logged if row else 0
+        period_totals = totals.get(start, {})
+
+        def daily(name):
+            return round(period_totals.get(name, 0.0) / days_logged, 2) if days_logged else 0.0
+
+        avg_calories = round(row.energy_kcal / days_logged, 2) if days_logged else 0.0
+        if days_logged:
+            recent_calories.append(avg_calories)
+        rolling = recent_calories[-window:]
+
+        macro_kcal = {
+            "protein": period_totals.get("Protein", 0.0) * 4,
+            "carbs": period_totals.get("Carbohydrate", 0.0) * 4,
+            "fat": period_totals.get("Fat", 0.0) * 9,
+        }
+        macro_total = sum(macro_kcal.values())
+
+        periods.append(schemas.TrendPeriod(
+            period_start=start,
+            days_logged=days_logged,
+            entries=row.entries if row else 0,
+            goal_achieved_days=achieved.get(start, 0),
+            avg_calories=avg_calories,
+            avg_protein=daily("Protein"),
+            avg_fat=daily("Fat"),
+            avg_carbs=daily("Carbohydrate"),
+            rolling_avg_calories=round(sum(rolling) / len(rolling), 2) if rolling else 0.0,
+            macro_split=schemas.MacroSplit(**{
+                f"{macro}_pct": round(kcal / macro_total * 100, 1) if macro_total else 0.0
+                for macro, kcal in macro_kcal.items()
+            }),
+            adequacy=[
+                schemas.NutrientAdequacy(
+                    nutrient_name=g["name"],
+                    unit=g["unit"],
+                    daily_average=daily(g["name"]),
+                    goal=round(g["goal"], 2),
+                    adequacy_pct=round(daily(g["name"]) / g["goal"] * 100, 1) if g["goal"] else 0.0
+                )
+                for g in goals
+            ] if days_logged else []
+        ))
+
+    current, longest = _streaks(logged_days, end_date)
+    return schemas.TrendsResponse(
+        period=period,
+        periods=periods,
+        current_streak=current,
+        longest_streak=longest,
+        last_logged_date=max(logged_days) if logged_days else None
+    )
@@ -0,0 +1,277 @@
+"""
+Cold storage for food_logs.
+
+Only recent days are read often, so old months are moved out of food_logs
+into `food_log_archives`: one zlib-compressed row per user and month.
+Reading a day in an archived month rehydrates that user-month back into
+food_logs first (`ensure_live`), so every query keeps working unchanged.
+
+On Postgres, food_logs can optionally be range-partitioned by month
+(`partition_food_logs`); archiving a month then detaches and drops its
+partition instead of deleting rows, which leaves no dead tuples to vacuum.
+Rows logged into such a month afterwards land in the default partition
+and are moved out of it when the month's partition is created again.
+The analytics rollups are not touched: they already summarize history.
+"""
+import json
+import os
+import zlib
+from datetime import date, datetime
+from itertools import groupby
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+from .. import models
+
+FOOD_LOG_HOT_MONTHS = int(os.getenv("FOOD_LOG_HOT_MONTHS", "12"))
+
+ARCHIVE_COLUMNS = ("id", "food_id", "quantity_grams", "log_date", "meal_type", "created_at")
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def hot_cutoff(today: date | None = None, months: int = FOOD_LOG_HOT_MONTHS) -> date:
+    """Months before this date are eligible for archiving."""
+    return add_months(month_start(today or date.today()), -months)
+
+# --- POSTGRES PARTITIONING ---
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+def _partition_name(month: date) -> str:
+    return f"food_logs_y{month.year}m{month.month:02d}"
+
+def is_partitioned(db: Session) -> bool:
+    if not _is_postgres(db):
+        return False
+    return db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'food_logs'"
+    )).first() is not None
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+def _is_attached(db: Session, name: str) -> bool:
+    return db.execute(text(
+        "SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE c.relname = :name"
+    ), {"name": name}).first() is not None
+
+def _create_partition(db: Session, month: date) -> None:
+    """
+    Creates the partition for `month`. Rows of that month already in the
+    default partition (logged after the month was archived and its
+    partition dropped) would make a plain CREATE ... PARTITION OF fail, so
+    they are moved into the new table before it is attached.
+    """
+    name = _partition_name(month)
+    bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    in_month = {"start": month, "end": add_months(month, 1)}
+
+    stray = False
+    if _table_exists(db, "food_logs_default"):
+        # Both statements below take this lock anyway; taking it first keeps
+        # new rows from reaching the default partition after the check
+        db.execute(text("LOCK TABLE food_logs_default IN ACCESS EXCLUSIVE MODE"))
+        stray = db.execute(text(
+            "SELECT 1 FROM food_logs_default WHERE log_date >= :start AND log_date < :end LIMIT 1"
+        ), in_month).first() is not None
+
+    if not stray:
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF food_logs FOR VALUES {bounds}"))
+        return
+    db.execute(text(f"CREATE TABLE {name} (LIKE food_logs INCLUDING DEFAULTS)"))
+    db.execute(text(
+        f"WITH moved AS (DELETE FROM food_logs_default WHERE log_date >= :start AND log_date < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), in_month)
+    db.execute(text(f"ALTER TABLE food_logs ATTACH PARTITION {name} FOR VALUES {bounds}"))
+
+def ensure_partitions(db: Session, start: date | None = None, end: date | None = None, months_ahead: int = 3) -> list[str]:
+    """
+    Creates the monthly partitions from `start` (default: this month) up to
+    `end` (default: `months_ahead` months ahead). Run it from a monthly cron
+    so inserts never land in the default partition. The caller commits.
+    """
+    month = month_start(start or date.today())
+    last = month_start(end) if end else add_months(month_start(date.today()), months_ahead)
+    created = []
+    while month <= last:
+        name = _partition_name(month)
+        if not _table_exists(db, name):
+            _create_partition(db, month)
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+def partition_food_logs(db: Session, months_ahead: int = 3) -> int:
+    """
+    Migrates food_logs to a table range-partitioned by month on log_date,
+    in one transaction. Returns the number of rows moved.
+
+    The primary key becomes (id, log_date), as Postgres requires the
+    partition key in it; ids keep coming from the same sequence.
+    """
+    if not _is_postgres(db):
+        raise RuntimeError("Partitioning food_logs requires Postgres")
+    if is_partitioned(db):
+        return 0
+
+    old_indexes = db.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'food_logs'"
+    )).scalars().all()
+    db.execute(text("ALTER TABLE food_logs RENAME TO food_logs_unpartitioned"))
+    for name in old_indexes:
+        db.execute(text(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned"))
+
+    db.execute(text(
+        "CREATE TABLE food_logs (LIKE food_logs_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (log_date)"
+    ))
+    db.execute(text("ALTER SEQUENCE food_logs_id_seq OWNED BY food_logs.id"))
+    db.execute(text("ALTER TABLE food_logs ADD CONSTRAINT food_logs_pkey PRIMARY KEY (id, log_date)"))
+    db.execute(text("ALTER TABLE food_logs ADD FOREIGN KEY (user_id) REFERENCES users (id)"))
+    db.execute(text("ALTER TABLE food_logs ADD FOREIGN KEY (food_id) REFERENCES foods (id)"))
+    db.execute(text("CREATE INDEX ix_food_logs_id ON food_logs (id)"))
+    db.execute(text("CREATE INDEX ix_food_logs_log_date ON food_logs (log_date)"))
+    db.execute(text(
+        "CREATE INDEX ix_food_logs_user_id_log_date ON food_logs (user_id, log_date) "
+        "INCLUDE (food_id, quantity_grams, meal_type)"
+    ))
+
+    first_day = db.execute(text("SELECT min(log_date) FROM food_logs_unpartitioned")).scalar()
+    ensure_partitions(db, start=first_day, months_ahead=months_ahead)
+    db.execute(text("CREATE TABLE food_logs_default PARTITION OF food_logs DEFAULT"))
+
+    moved = db.execute(text("INSERT INTO food_logs SELECT * FROM food_logs_unpartitioned")).rowcount
+    db.execute(text("DROP TABLE food_logs_unpartitioned"))
+    db.commit()
+    return moved
+
+# --- ARCHIVE ---
+
+def encode_archive(rows: list) -> bytes:
+    """A FoodLogArchive payload: ARCHIVE_COLUMNS rows as compressed JSON."""
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), 9)
+
+def decode_archive(payload: bytes) -> list:
+    """The ARCHIVE_COLUMNS rows of a FoodLogArchive payload."""
+    return json.loads(zlib.decompress(payload))
+
+def _archive_user_month(db: Session, user_id: int, month: date, rows: list) -> None:
+    archive = db.get(models.FoodLogArchive, (user_id, month))
+    if archive:
+        # Rows logged into an archived month after it was archived
+        rows = decode_archive(archive.payload) + rows
+    else:
+        archive = models.FoodLogArchive(user_id=user_id, month=month)
+        db.add(archive)
+    archive.entries = len(rows)
+    archive.payload = encode_archive(rows)
+
+def archive_food_logs(db: Session, before: date | None = None, batch_size: int = 5000) -> tuple[int, int]:
+    """
+    Moves every month of food_logs before `before` (default: the hot window,
+    FOOD_LOG_HOT_MONTHS) into food_log_archives, one month per transaction.
+    Returns (months archived, rows archived).
+
+    Only rows that were read into the archive are removed. A month's
+    partition is detached (and committed) before it is read: from then on
+    new rows for that month go to the default partition, and the detached
+    table is archived and dropped. Unpartitioned months are deleted by id.
+    """
+    before = month_start(before or hot_cutoff())
+    first_day = db.query(func.min(models.FoodLog.log_date)).scalar()
+    if first_day is None:
+        return 0, 0
+
+    partitioned = is_partitioned(db)
+    months = archived = 0
+    month = month_start(first_day)
+    while month < before:
+        next_month = add_months(month, 1)
+        name = _partition_name(month)
+        detached = partitioned and _table_exists(db, name)
+        if detached:
+            # A table left detached by an interrupted run is archived as well
+            if _is_attached(db, name):
+                db.execute(text(f"ALTER TABLE food_logs DETACH PARTITION {name}"))
+                db.commit()
+            rows = db.execute(
+                text(
+                    f"SELECT user_id, {', '.join(ARCHIVE_COLUMNS)} FROM {name} ORDER BY user_id, id"
+                ),
+                execution_options={"yield_per": batch_size}
+            )
+        else:
+            rows = db.query(
+                models.FoodLog.user_id,
+                *(getattr(models.FoodLog, column) for column in ARCHIVE_COLUMNS)
+            ).filter(
+                models.FoodLog.log_date >= month, models.FoodLog.log_date < next_month
+            ).order_by(models.FoodLog.user_id, models.FoodLog.id).yield_per(batch_size)
+
+        count = 0
+        ids = []
+        for user_id, user_rows in groupby(rows, key=lambda row: row[0]):
+            encoded = [
+                [log_id, food_id, grams, log_date.isoformat(), meal_type, created_at.isoformat() if created_at else None]
+                for _, log_id, food_id, grams, log_date, meal_type, created_at in user_rows
+            ]
+            _archive_user_month(db, user_id, month, encoded)
+            count += len(encoded)
+            if not detached:
+                ids.extend(row[0] for row in encoded)
+
+        if detached:
+            db.execute(text(f"DROP TABLE {name}"))
+        for start in range(0, len(ids), batch_size):
+            db.query(models.FoodLog).filter(
+                models.FoodLog.log_date >= month, models.FoodLog.log_date < next_month,
+                models.FoodLog.id.in_(ids[start:start + batch_size])
+            ).delete(synchronize_session=False)
+        if count:
+            months += 1
+            archived += count
+        db.commit()
+        month = next_month
+    return months, archived
+
+def rehydrate(db: Session, user_id: int, month: date) -> int:
+    """
+    Moves one archived user-month back into food_logs (with the original
+    ids). Returns the number of rows restored; the caller commits.
+    """
+    month = month_start(month)
+    archive = db.get(models.FoodLogArchive, (user_id, month))
+    if archive is None:
+        return 0
+    if is_partitioned(db):
+        ensure_partitions(db, start=month, end=month)
+
+    rows = [
+        {
+            **dict(zip(ARCHIVE_COLUMNS, row)),
+            "user_id": user_id,
+            "log_date": date.fromisoformat(row[3]),
+            "created_at": datetime.fromisoformat(row[5]) if row[5] else None,
+        }
+        for row in decode_archive(archive.payload)
+    ]
+    db.execute(insert(models.FoodLog), rows)
+    db.delete(archive)
+    return len(rows)
+
+def ensure_live(db: Session, user_id: int, log_date: date) -> None:
+    """
+    Called before reading a user's logs for a date. Dates inside the hot
+    window return immediately; older ones rehydrate their month if archived.
+    """
+    if log_date >= hot_cutoff():
+        return
+    if rehydrate(db, user_id, log_date):
+        db.commit()
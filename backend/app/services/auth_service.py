@@ -1,9 +1,13 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from .. import models, schemas
-from ..security import hash_password, create_otp, verify_password # <-- Add verify_password
+from ..security import create_otp, needs_rehash
+from ..password_hasher import PasswordHasherBusy, password_hasher
 from datetime import datetime, timedelta, timezone
 from .email import email_service
+from .email_outbox import outbox_worker
+from .principal_cache import principal_cache
 
 # --- NEW FUNCTION ---
 def get_user_by_email(db: Session, email: str) -> models.User | None:
@@ -12,16 +16,33 @@ def get_user_by_email(db: Session, email: str) -> models.User | None:
     """
     return db.query(models.User).filter(models.User.email == email).first()
 
+async def _hashed(job):
+    """Awaits a password_hasher job; a saturated hasher becomes a 503."""
+    try:
+        return await job
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress. Please retry shortly.",
+            headers={"Retry-After": "1"}
+        )
+
+def _save_password_hash(db: Session, user: models.User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+    db.refresh(user)
+
 # --- NEW FUNCTION ---
-def authenticate_user(db: Session, email: str, password: str) -> models.User | None:
+async def authenticate_user(db: Session, email: str, password: str) -> models.User | None:
     """
     Handles the core login logic:
     1. Find user by email.
     2. Check if account is active.
-    3. Verify the password.
+    3. Verify the password (on the password hasher, off the request path).
+    4. Re-hash it if it was hashed at another cost than BCRYPT_ROUNDS.
     Returns the User model if successful, else None.
     """
-    user = get_user_by_email(db, email)
+    user = await run_in_threadpool(get_user_by_email, db, email)
     
     if not user:
         # User not found
@@ -34,19 +55,43 @@ def authenticate_user(db: Session, email: str, password: str) -> models.User | N
             detail="Account not verified. Please check your email for an OTP."
         )
 
-    if not verify_password(password, user.hashed_password):
+    if not await _hashed(password_hasher.verify(password, user.hashed_password)):
         # Password was incorrect
         return None
     
+    if needs_rehash(user.hashed_password):
+        # The only moment we know the plain password: upgrade the hash now
+        new_hash = await _hashed(password_hasher.hash(password))
+        await run_in_threadpool(_save_password_hash, db, user, new_hash)
+    
     # All checks passed!
     return user
 
-def create_user(db: Session, user: schemas.UserCreate):
+async def create_user(db: Session, user: schemas.UserCreate):
     """
     Business logic for creating a new user.
     Now creates an INACTIVE user with an OTP.
+    
+    The password is hashed on the password hasher; the database work
+    run on the request threadpool. An email that is already registered
+    and active is turned away before the hash, so retries against it
+    cannot tie up the hasher. The OTP email is only queued in the
+    outbox, so registration does not wait on SMTP.
     """
-    # 1. Check if user with this email already exists
+    await run_in_threadpool(_check_not_registered, db, user.email)
+    hashed_pw = await _hashed(password_hasher.hash(user.password))
+    return await run_in_threadpool(_save_new_user, db, user, hashed_pw)
+
+def _check_not_registered(db: Session, email: str) -> None:
+    if db.query(models.User.is_active).filter(models.User.email == email).scalar():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered and active."
+        )
+
+def _save_new_user(db: Session, user: schemas.UserCreate, hashed_pw: str):
+    # 1. Check if user with this email already exists (again: it may have
+    # been verified while the password was hashing)
     existing_user = db.query(models.User).filter(models.User.email == user.email).first()
     if existing_user and existing_user.is_active:
         raise HTTPException(
@@ -54,14 +99,11 @@ def create_user(db: Session, user: schemas.UserCreate):
             detail="Email already registered and active."
         )
     
-    # 2. Hash the plain-text password
-    hashed_pw = hash_password(user.password)
-    
-    # 3. Generate OTP and expiry
+    # 2. Generate OTP and expiry
     otp = create_otp()
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=15) # 15 min expiry
     
-    # 4. Create or Update the User model
+    # 3. Create or Update the User model
     if existing_user:
         # User exists but is not active, update their password and OTP
         existing_user.hashed_password = hashed_pw
@@ -82,14 +124,15 @@ def create_user(db: Session, user: schemas.UserCreate):
         )
         db.add(db_user)
 
+    # Queue the OTP email in the same transaction as the user
+    email_service.enqueue_otp_email(db, db_user.email, otp, db_user.first_name)
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate(db_user.id)
+    outbox_worker.notify()
     
-    # Send OTP via email
-    email_sent = email_service.send_otp_email(db_user.email, otp, db_user.first_name)
-    
-    # Return OTP only if email wasn't sent (development mode)
-    return {"user": db_user, "otp": None if email_sent else otp}
+    # The OTP only ever travels by email
+    return {"user": db_user, "otp": None}
 
 def verify_user_otp(db: Session, verification: schemas.UserVerify):
     """
@@ -135,4 +178,5 @@ def verify_user_otp(db: Session, verification: schemas.UserVerify):
     
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
     return user
\ No newline at end of file
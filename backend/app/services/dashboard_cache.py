@@ -0,0 +1,92 @@
+import os
+import time
+from datetime import date
+from sqlalchemy.orm import Session
+from ..cache import CacheBackend, create_cache_backend
+from ..metrics import metrics
+from .target_service import get_reference_version
+
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "300"))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "10000"))
+DASHBOARD_REFERENCE_VERSION_TTL_SECONDS = float(os.getenv("DASHBOARD_REFERENCE_VERSION_TTL_SECONDS", "60"))
+
+
+class DashboardCache:
+    """
+    Caches serialized DashboardResponse payloads.
+
+    A dashboard is a pure function of the profile, the RDA data and the
+    day's logs, so the key is (user, date, data version). The data version
+    combines the RDA reference version with two generation stamps:
+    - a log write re-stamps that (user, date), retiring exactly that day,
+    - a profile write re-stamps the user, retiring all of their days,
+    - an RDA change bumps the reference version, retiring everyone's.
+    Retired entries are never read again and age out through the TTL/LRU.
+
+    The reference version is kept in the backend too, so a hit costs no
+    query. The seeder publishes a bump after committing it; a bump made
+    any other way is picked up once the stored copy expires.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = DASHBOARD_CACHE_TTL_SECONDS,
+                 reference_ttl: float = DASHBOARD_REFERENCE_VERSION_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.reference_ttl = reference_ttl
+
+    def _reference_version(self, db: Session) -> str:
+        version = self.backend.get("dashboard:reference_version")
+        if version is None:
+            version = str(get_reference_version(db))
+            self.backend.set("dashboard:reference_version", version, ttl=self.reference_ttl)
+        return version
+
+    def publish_reference_version(self, version: int) -> None:
+        """Called after an RDA version bump is committed: retires everyone's entries."""
+        self.backend.set("dashboard:reference_version", str(version), ttl=self.reference_ttl)
+
+    def _stamp(self, gen_key: str, ttl: float | None) -> str:
+        generation = self.backend.get(gen_key)
+        if generation is None:
+            # Start from the clock, not 0, so an evicted stamp can never
+            # come back to a value that old entries were stored under.
+            generation = str(time.time_ns())
+            self.backend.set(gen_key, generation, ttl=ttl)
+        return generation
+
+    def _key(self, db: Session, user_id: int, log_date: date, variant: str) -> str:
+        day = log_date.isoformat()
+        data_version = ".".join([
+            self._reference_version(db),
+            self._stamp(f"dashboard:gen:{user_id}", None),
+            self._stamp(f"dashboard:gen:{user_id}:{day}", self.ttl),
+        ])
+        return f"dashboard:{user_id}:{day}:{data_version}:{variant}"
+
+    def lookup(self, db: Session, user_id: int, log_date: date, variant: str = "") -> tuple[str, str | None]:
+        """Returns (key, payload). The payload is None on a miss."""
+        key = self._key(db, user_id, log_date, variant)
+        payload = self.backend.get(key)
+        metrics.incr("dashboard_cache.hits" if payload is not None else "dashboard_cache.misses")
+        return key, payload
+
+    def store(self, key: str, payload: str) -> None:
+        self.backend.set(key, payload, ttl=self.ttl)
+
+    def invalidate_day(self, user_id: int, log_date: date) -> None:
+        """Called after a log write: retires that user's entries for that date."""
+        self.backend.set(f"dashboard:gen:{user_id}:{log_date.isoformat()}", str(time.time_ns()), ttl=self.ttl)
+        metrics.incr("dashboard_cache.invalidations")
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Called after a profile write: retires every entry of the user."""
+        self.backend.set(f"dashboard:gen:{user_id}", str(time.time_ns()))
+        metrics.incr("dashboard_cache.invalidations")
+
+    def stats(self) -> dict:
+        return {"hit_rate": metrics.ratio("dashboard_cache.hits", "dashboard_cache.misses")}
+
+
+dashboard_cache = DashboardCache(
+    create_cache_backend(max_entries=DASHBOARD_CACHE_MAX_ENTRIES)
+)
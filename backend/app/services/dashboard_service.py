@@ -1,181 +1,206 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import date, datetime, timezone
 from collections import defaultdict
-from fastapi import HTTPException, status
+from typing import List
 from .. import models, schemas
+from .target_service import get_user_targets
+from .dashboard_cache import dashboard_cache
+from .archive_service import ensure_live
 
-def _calculate_age(birth_date: date) -> int:
-    """Calculates a user's age from their birth_date."""
-    today = date.today()
-    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-    return age
+MEAL_ORDER = [meal.value for meal in models.MealTypeEnum]
 
-def _get_user_profile(db: Session, user: models.User) -> models.UserProfile:
-    """Fetches a user's profile and validates it."""
-    profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == user.id).first()
-    
-    if not profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User profile not found. Please create your profile."
-        )
-    
-    if not all([profile.birth_date, profile.gender, profile.activity_level, profile.weight_kg]):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Profile is incomplete. Please set birth_date, gender, activity_level, and weight_kg."
-        )
-    return profile
-
-def _get_demographic_group(db: Session, profile: models.UserProfile, age: int) -> models.DemographicGroup:
-    """Matches a user's profile stats to a DemographicGroup in the database."""
-    
-    # Handle the simple, non-gendered groups first
-    if age < 18:
-        group_name_map = {
-            (0, 0.5): "Infants 0-6 months",
-            (0.5, 1): "Infants 6-12 months",
-            (1, 3): "Children 1-3 years",
-            (4, 6): "Children 4-6 years",
-            (7, 9): "Children 7-9 years",
-            (10, 12): "Boys 10-12 years" if profile.gender == 'male' else "Girls 10-12 years",
-            (13, 15): "Boys 13-15 years" if profile.gender == 'male' else "Girls 13-15 years",
-            (16, 17): "Boys 16-17 years" if profile.gender == 'male' else "Girls 16-17 years",
-        }
-        
-        for (age_min, age_max), name in group_name_map.items():
-            if age_min <= age <= age_max:
-                group = db.query(models.DemographicGroup).filter_by(name=name).first()
-                if group: return group
-
-    # Handle adult groups
-    else:
-        group = db.query(models.DemographicGroup).filter(
-            models.DemographicGroup.gender == profile.gender,
-            models.DemographicGroup.activity_level == profile.activity_level,
-            models.DemographicGroup.age_min_years <= age,
-            models.DemographicGroup.age_max_years >= age
-        ).first()
-        if group: return group
-
-    raise HTTPException(status_code=404, detail="Could not match your profile to a demographic group.")
-
-def _get_rda_goal(db: Session, group: models.DemographicGroup, profile: models.UserProfile) -> dict:
+def _get_consumption(db: Session, user: schemas.Principal, log_date: date) -> tuple[defaultdict, dict]:
     """
-    Fetches the RDA "Goal" for the matched group and applies BMI-based modifiers.
-    Returns a dictionary map: {nutrient_name: goal_value}
+    Calculates the "Score" (nutrient consumption) for a user on a specific date
+    with one aggregate query grouped by (meal_type, nutrient).
+    Returns ({nutrient_name: day_total}, {meal_type: {nutrient_name: total}}).
     """
-    rda_goals = {}
-    
-    # 1. Fetch all standard RDA values for this group
-    rda_entries = db.query(models.RDA).filter_by(demographic_group_id=group.id).all()
-    for entry in rda_entries:
-        rda_goals[entry.nutrient.name] = entry.recommended_value
-        
-    # 2. Apply "Smart" Modifiers (as we discussed)
-    if profile.height_cm and profile.weight_kg and profile.height_cm > 0:
-        height_m = profile.height_cm / 100
-        bmi = profile.weight_kg / (height_m * height_m)
-        
-        # Get the baseline energy goal
-        base_energy_goal = rda_goals.get("Energy", 2000) # Default to 2000 if not found
-        
-        if bmi > 25: # Overweight
-            # Set a 500 kcal deficit for weight loss
-            rda_goals["Energy"] = base_energy_goal - 500
-        elif bmi < 18.5: # Underweight
-            # Set a 300 kcal surplus for weight gain
-            rda_goals["Energy"] = base_energy_goal + 300
-        # Else: (18.5-25) - Healthy weight, no change to energy goal
-            
-    return rda_goals
-
-def _get_consumption(db: Session, user: models.User, log_date: date) -> defaultdict:
-    """
-    Calculates the total "Score" (nutrient consumption) for a user on a specific date.
-    Returns a dictionary map: {nutrient_name: consumed_value}
-    """
-    
-    # Find all logs for this user on this day
-    logs = db.query(models.FoodLog).filter(
+    consumed = models.FoodNutrient.value_per_100g * models.FoodLog.quantity_grams / 100.0
+    rows = db.query(
+        models.FoodLog.meal_type, models.Nutrient.name, func.sum(consumed)
+    ).join(
+        models.FoodNutrient, models.FoodNutrient.food_id == models.FoodLog.food_id
+    ).join(
+        models.Nutrient, models.Nutrient.id == models.FoodNutrient.nutrient_id
+    ).filter(
         models.FoodLog.user_id == user.id,
         models.FoodLog.log_date == log_date
-    ).all()
+    ).group_by(models.FoodLog.meal_type, models.Nutrient.name).all()
     
     # Use defaultdict to automatically handle new keys
     total_consumption = defaultdict(float)
-    
-    for log in logs:
-        # Get the scaling factor (e.g., 150g logged / 100g base = 1.5)
-        scale_factor = log.quantity_grams / 100.0
-        
-        # Get all nutrients for the food in this log
-        # We use .food to access the relationship
-        for fn in log.food.nutrients:
-            nutrient_name = fn.nutrient.name
-            base_value = fn.value_per_100g
+    meal_consumption = defaultdict(dict)
+    for meal_type, nutrient_name, amount in rows:
+        total_consumption[nutrient_name] += amount
+        meal_consumption[meal_type][nutrient_name] = amount
             
-            # Calculate the consumed value and add to our total
-            consumed_value = base_value * scale_factor
-            total_consumption[nutrient_name] += consumed_value
-            
-    return total_consumption
+    return total_consumption, meal_consumption
 
-def get_dashboard_data(db: Session, user: models.User, log_date: date) -> schemas.DashboardResponse:
-    """
-    Main service function to orchestrate the entire gap analysis.
-    """
-    
-    # 1. Get User Profile & Age
-    profile = _get_user_profile(db, user)
-    age = _calculate_age(profile.birth_date)
-    
-    # 2. Get "Goal" (RDA)
-    demographic_group = _get_demographic_group(db, profile, age)
-    rda_goals = _get_rda_goal(db, demographic_group, profile)
-    
-    # 3. Get "Score" (Consumption)
-    total_consumption = _get_consumption(db, user, log_date)
-    
-    # 4. Combine & Calculate "Gap"
+def _build_meal_breakdown(meal_consumption: dict, nutrients: List[str]) -> List[schemas.MealBreakdown]:
+    """Per-meal totals for the main macros plus any requested nutrients."""
+    meals = MEAL_ORDER + sorted(set(meal_consumption) - set(MEAL_ORDER))
+    breakdown = []
+    for meal_type in meals:
+        totals = meal_consumption.get(meal_type, {})
+        breakdown.append(schemas.MealBreakdown(
+            meal_type=meal_type,
+            calories=round(totals.get("Energy", 0.0), 2),
+            protein=round(totals.get("Protein", 0.0), 2),
+            fat=round(totals.get("Fat", 0.0), 2),
+            carbs=round(totals.get("Carbohydrate", 0.0), 2),
+            nutrients={name: round(totals.get(name, 0.0), 2) for name in nutrients}
+        ))
+    return breakdown
+
+def _build_dashboard(
+    target: models.UserTarget,
+    log_date: date,
+    total_consumption: dict,
+    meal_consumption: dict,
+    include_meals: bool,
+    meal_nutrients: List[str] | None
+) -> schemas.DashboardResponse:
+    """Combines the "Goal" and the "Score" into the gap analysis."""
+    # 1. Combine & Calculate "Gap"
     analysis_report: List[schemas.NutrientReport] = []
     
-    # Get a master list of all nutrients we have a goal for
-    all_goal_nutrients = db.query(models.Nutrient).filter(
-        models.Nutrient.name.in_(rda_goals.keys())
-    ).all()
-
-    for nutrient in all_goal_nutrients:
-        name = nutrient.name
-        goal_val = rda_goals.get(name, 0.0)
+    for nutrient_goal in target.nutrient_goals:
+        name = nutrient_goal["name"]
+        goal_val = nutrient_goal["goal"]
         consumed_val = total_consumption.get(name, 0.0)
         
         analysis_report.append(
             schemas.NutrientReport(
                 nutrient_name=name,
-                unit=nutrient.unit,
+                unit=nutrient_goal["unit"],
                 goal=round(goal_val, 2),
                 consumed=round(consumed_val, 2),
                 gap=round(consumed_val - goal_val, 2) # (Score - Goal)
             )
         )
     
-    # 5. Build the final response
+    # 2. Build the final response
     dashboard_response = schemas.DashboardResponse(
         log_date=log_date,
-        matched_demographic_group=demographic_group.name,
+        matched_demographic_group=target.demographic_group.name,
         
-        total_calories_goal=round(rda_goals.get("Energy", 0.0), 2),
+        total_calories_goal=round(target.energy_kcal, 2),
         total_calories_consumed=round(total_consumption.get("Energy", 0.0), 2),
-        total_protein_goal=round(rda_goals.get("Protein", 0.0), 2),
+        total_protein_goal=round(target.protein_g, 2),
         total_protein_consumed=round(total_consumption.get("Protein", 0.0), 2),
-        total_fat_goal=round(rda_goals.get("Visible Fat", 0.0), 2), # Using "Visible Fat" for goal
+        total_fat_goal=round(target.fat_g, 2), # Using "Visible Fat" for goal
         total_fat_consumed=round(total_consumption.get("Fat", 0.0), 2), # Using total "Fat" for consumed
-        total_carbs_goal=round(rda_goals.get("Carbohydrate", 0.0), 2),
+        total_carbs_goal=round(target.carbs_g, 2),
         total_carbs_consumed=round(total_consumption.get("Carbohydrate", 0.0), 2),
         
-        detailed_analysis=analysis_report
+        detailed_analysis=analysis_report,
+        meal_breakdown=_build_meal_breakdown(meal_consumption, meal_nutrients or []) if include_meals else None
     )
     
     return dashboard_response
 
+def get_dashboard_data(
+    db: Session,
+    user: schemas.Principal,
+    log_date: date,
+    include_meals: bool = False,
+    meal_nutrients: List[str] | None = None
+) -> schemas.DashboardResponse:
+    """
+    Main service function to orchestrate the entire gap analysis.
+    
+    With `include_meals`, the response also carries per-meal-type totals
+    for the main macros and `meal_nutrients`, from the same aggregation.
+    """
+    
+    # 1. Get the "Goal": the persisted target vector (one row)
+    target = get_user_targets(db, user.id)
+    
+    # 2. Get "Score" (Consumption)
+    ensure_live(db, user.id, log_date)
+    total_consumption, meal_consumption = _get_consumption(db, user, log_date)
+    
+    return _build_dashboard(target, log_date, total_consumption, meal_consumption, include_meals, meal_nutrients)
+
+
+def get_dashboard_json(
+    db: Session,
+    user: schemas.Principal,
+    log_date: date,
+    include_meals: bool = False,
+    meal_nutrients: List[str] | None = None
+) -> str:
+    """
+    The serialized dashboard, served from the dashboard cache when possible.
+    Log and profile writes invalidate the affected entries.
+    """
+    meal_nutrients = sorted(set(meal_nutrients or []))
+    variant = "meals=" + ",".join(meal_nutrients) if include_meals else ""
+    key, payload = dashboard_cache.lookup(db, user.id, log_date, variant)
+    if payload is None:
+        payload = get_dashboard_data(
+            db=db, user=user, log_date=log_date,
+            include_meals=include_meals, meal_nutrients=meal_nutrients
+        ).model_dump_json()
+        dashboard_cache.store(key, payload)
+    return payload
+
+
+def get_day_view(db: Session, user: schemas.Principal, log_date: date) -> schemas.DayView:
+    """
+    The gap analysis *and* the itemized log list for one day, built from a
+    single fetch of the day's logs joined with their nutrient data.
+    """
+    target = get_user_targets(db, user.id)
+    ensure_live(db, user.id, log_date)
+    
+    rows = db.query(
+        models.FoodLog.id,
+        models.Food.name,
+        models.FoodLog.quantity_grams,
+        models.FoodLog.meal_type,
+        models.Nutrient.name,
+        models.FoodNutrient.value_per_100g
+    ).join(
+        models.Food, models.Food.id == models.FoodLog.food_id
+    ).outerjoin(
+        models.FoodNutrient, models.FoodNutrient.food_id == models.FoodLog.food_id
+    ).outerjoin(
+        models.Nutrient, models.Nutrient.id == models.FoodNutrient.nutrient_id
+    ).filter(
+        models.FoodLog.user_id == user.id,
+        models.FoodLog.log_date == log_date
+    ).order_by(models.FoodLog.id).all()
+    
+    total_consumption = defaultdict(float)
+    meal_consumption = defaultdict(lambda: defaultdict(float))
+    logs = {}
+    for log_id, food_name, quantity_grams, meal_type, nutrient_name, value_per_100g in rows:
+        log = logs.setdefault(log_id, {
+            "id": log_id, "food_name": food_name, "quantity_grams": quantity_grams,
+            "meal_type": meal_type, "calories": 0.0
+        })
+        if nutrient_name is None:
+            continue  # A food without nutrient data
+        consumed_value = value_per_100g * quantity_grams / 100.0
+        total_consumption[nutrient_name] += consumed_value
+        meal_consumption[meal_type][nutrient_name] += consumed_value
+        if nutrient_name == "Energy":
+            log["calories"] = consumed_value
+    
+    return schemas.DayView(
+        dashboard=_build_dashboard(target, log_date, total_consumption, meal_consumption, False, None),
+        logs=[
+            schemas.FoodLogResponse(**{**log, "calories": round(log["calories"], 1)})
+            for log in logs.values()
+        ]
+    )
+
+def get_day_view_json(db: Session, user: schemas.Principal, log_date: date) -> str:
+    """The serialized day view, cached alongside the day's dashboard entries."""
+    key, payload = dashboard_cache.lookup(db, user.id, log_date, "day")
+    if payload is None:
+        payload = get_day_view(db=db, user=user, log_date=log_date).model_dump_json()
+        dashboard_cache.store(key, payload)
+    return payload
@@ -1,53 +1,176 @@
 import smtplib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
-from typing import Optional
+from typing import Iterator, List, Optional
+from sqlalchemy.orm import Session
+from .. import models
+from ..metrics import metrics
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
 
 class EmailService:
-    def __init__(self):
-        self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        self.smtp_username = os.getenv("SMTP_USERNAME")
-        self.smtp_password = os.getenv("SMTP_PASSWORD")
-        self.from_email = os.getenv("FROM_EMAIL", self.smtp_username)
-        
-    def send_otp_email(self, to_email: str, otp: str, first_name: str) -> bool:
-        """Send OTP verification email"""
-        if not all([self.smtp_username, self.smtp_password]):
-            print(f"SMTP not configured. OTP for {to_email}: {otp}")
-            return True  # Return True for development
-            
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            msg['Subject'] = "Verify Your NutriTracker Account"
-            
-            body = f"""
+    """
+    Builds emails and sends them over a small pool of open, authenticated
+    SMTP connections. Requests never send directly: they `enqueue_*` into
+    the email_outbox table and the outbox worker calls `send_batch`.
+
+    With SMTP_AUTH=0 (a local relay, or aiosmtpd in tests) no login is
+    attempted; SMTP_STARTTLS=0 skips the TLS upgrade.
+    """
+
+    def __init__(
+        self,
+        smtp_server: Optional[str] = None,
+        smtp_port: Optional[int] = None,
+        smtp_username: Optional[str] = None,
+        smtp_password: Optional[str] = None,
+        from_email: Optional[str] = None,
+        auth: Optional[bool] = None,
+        starttls: Optional[bool] = None,
+        pool_size: int = SMTP_POOL_SIZE,
+    ):
+        self.smtp_server = smtp_server or os.getenv("SMTP_SERVER", "smtp.gmail.com")
+        self.smtp_port = smtp_port or int(os.getenv("SMTP_PORT", "587"))
+        self.smtp_username = smtp_username or os.getenv("SMTP_USERNAME")
+        self.smtp_password = smtp_password or os.getenv("SMTP_PASSWORD")
+        self.from_email = from_email or os.getenv("FROM_EMAIL", self.smtp_username) or "noreply@nutritracker.local"
+        self.auth = _env_flag("SMTP_AUTH", "1") if auth is None else auth
+        self.starttls = _env_flag("SMTP_STARTTLS", "1") if starttls is None else starttls
+        self.pool_size = pool_size
+        self._idle: List[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return not self.auth or all([self.smtp_username, self.smtp_password])
+
+    def build_otp_email(self, otp: str, first_name: str) -> tuple[str, str]:
+        """The (subject, body) of the verification email."""
+        body = f"""
             Hi {first_name},
-            
+
             Welcome to NutriTracker! Please verify your account using the OTP below:
-            
+
             Your OTP: {otp}
-            
-            This OTP will expire in 10 minutes.
-            
+
+            This OTP will expire in 15 minutes.
+
             Best regards,
             NutriTracker Team
             """
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_username, self.smtp_password)
-            server.send_message(msg)
-            server.quit()
-            
-            return True
-        except Exception as e:
-            print(f"Failed to send email: {e}")
+        return "Verify Your NutriTracker Account", body
+
+    def enqueue_otp_email(self, db: Session, to_email: str, otp: str, first_name: str) -> None:
+        """Adds the OTP email to the outbox in the caller's transaction; nothing is sent yet."""
+        subject, body = self.build_otp_email(otp, first_name)
+        db.add(models.EmailOutbox(
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.now(timezone.utc)
+        ))
+
+    def build_message(self, to_email: str, subject: str, body: str) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.auth:
+                server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        metrics.incr("email.smtp_connects")
+        return server
+
+    @staticmethod
+    def _alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
             return False
 
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """
+        An authenticated connection from the pool, opened if none is idle.
+        Idle connections are checked with NOOP first, since the server may
+        have dropped them. A connection is discarded (closed) when anything
+        raises while it is in use, as its state is then unknown.
+        """
+        server = None
+        with self._lock:
+            if self._idle:
+                server = self._idle.pop()
+        if server is not None and not self._alive(server):
+            server.close()
+            server = None
+        if server is None:
+            server = self._connect()
+
+        try:
+            yield server
+        except BaseException:
+            server.close()
+            raise
+
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(server)
+                return
+        self._quit(server)
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def send_batch(self, messages: List[MIMEMultipart]) -> List[Optional[str]]:
+        """
+        Sends the messages over one pooled connection. Returns one entry per
+        message: None when it was accepted, else the server's refusal.
+        Connection-level failures raise, leaving the whole batch to retry.
+        """
+        if not self.configured:
+            for msg in messages:
+                print(f"SMTP not configured. Email for {msg['To']}: {msg.get_payload()[0].get_payload()}")
+            return [None] * len(messages)
+
+        results = []
+        with self.connection() as server:
+            for msg in messages:
+                try:
+                    server.send_message(msg)
+                    results.append(None)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    results.append(str(e))
+        return results
+
+    def close(self) -> None:
+        """Closes the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server in idle:
+            self._quit(server)
+
 email_service = EmailService()
@@ -0,0 +1,149 @@
+"""
+Delivery of the email outbox.
+
+Requests add rows to `email_outbox` inside their own transaction and
+return; nothing in a request waits on SMTP. `drain_outbox` claims a batch
+of due rows (SKIP LOCKED, so several processes can drain at once), sends
+them over one pooled SMTP connection and records the outcome. Failed
+sends are retried with exponential backoff, up to EMAIL_MAX_ATTEMPTS.
+
+Long-running servers drain from the `outbox_worker` thread, woken right
+after each enqueue. Where a process may be frozen between requests (AWS
+Lambda), set EMAIL_OUTBOX_WORKER=0 and drain on a schedule instead:
+template.yaml runs `lambda_handler.drain_email_outbox` every minute, and
+elsewhere `python manage.py drain-email-outbox` does the same.
+"""
+import logging
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import SessionLocal
+from ..metrics import metrics
+from .email import EmailService, email_service
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_WORKER = os.getenv("EMAIL_OUTBOX_WORKER", "1").lower() in ("1", "true", "yes")
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "30"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+
+def drain_outbox(db: Session, sender: EmailService = email_service, batch_size: int = EMAIL_OUTBOX_BATCH_SIZE) -> tuple[int, int]:
+    """Sends one batch of due emails and commits; returns (sent, failed)."""
+    now = datetime.now(timezone.utc)
+    rows = db.query(models.EmailOutbox).filter(
+        models.EmailOutbox.status == "pending",
+        models.EmailOutbox.next_attempt_at <= now
+    ).order_by(models.EmailOutbox.id).limit(batch_size).with_for_update(skip_locked=True).all()
+    if not rows:
+        db.rollback()
+        return 0, 0
+
+    started = time.perf_counter()
+    try:
+        errors = sender.send_batch([sender.build_message(row.to_email, row.subject, row.body) for row in rows])
+    except (smtplib.SMTPException, OSError) as error:
+        errors = [str(error) or type(error).__name__] * len(rows)
+
+    sent = 0
+    for row, error in zip(rows, errors):
+        if error is None:
+            row.status = "sent"
+            row.sent_at = now
+            sent += 1
+            continue
+        row.attempts += 1
+        row.last_error = error[:1000]
+        if row.attempts >= EMAIL_MAX_ATTEMPTS:
+            row.status = "failed"
+        else:
+            row.next_attempt_at = now + timedelta(seconds=EMAIL_RETRY_BASE_SECONDS * 2 ** (row.attempts - 1))
+    db.commit()
+
+    metrics.incr("email_outbox.sent", sent)
+    metrics.incr("email_outbox.failures", len(rows) - sent)
+    metrics.observe("email_outbox.batch_size", len(rows))
+    metrics.observe("email_outbox.send_ms", (time.perf_counter() - started) * 1000)
+    return sent, len(rows) - sent
+
+def drain_all(db: Session, sender: EmailService = email_service, batch_size: int = EMAIL_OUTBOX_BATCH_SIZE) -> tuple[int, int]:
+    """Drains batches until nothing is due; failed rows wait for their backoff."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = drain_outbox(db, sender, batch_size)
+        if not sent and not failed:
+            return total_sent, total_failed
+        total_sent += sent
+        total_failed += failed
+
+
+class OutboxWorker:
+    """
+    Drains the outbox from one background thread: right after `notify()`,
+    and every EMAIL_OUTBOX_POLL_SECONDS for retries and for rows enqueued
+    by other processes.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        sender: EmailService = email_service,
+        poll_seconds: float = EMAIL_OUTBOX_POLL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.sender = sender
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+                self._thread.start()
+
+    def notify(self) -> None:
+        """Called after committing new outbox rows."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        """Drains what is due one last time, stops the thread and closes pooled connections."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._stopping = True
+            self._wake.set()
+            thread.join()
+        self.sender.close()
+
+    def _run(self) -> None:
+        # Drains once more after stop(), so rows enqueued just before it are sent
+        while True:
+            self._wake.wait(timeout=self.poll_seconds)
+            self._wake.clear()
+            self._drain()
+            if self._stopping:
+                break
+
+    def _drain(self) -> None:
+        db = self.session_factory()
+        try:
+            drain_all(db, self.sender)
+        except Exception:
+            db.rollback()
+            metrics.incr("email_outbox.errors")
+            logger.exception("Email outbox drain failed")
+        finally:
+            db.close()
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,122 @@
+"""
+Streaming export of a user's full food log history.
+
+Rows are produced one batch at a time, so memory stays flat however many
+years of logs a user has. Each row carries the log's nutrient amounts,
+pivoted into one column per nutrient by the database query itself.
+Months moved to `food_log_archives` are exported first, decoded one
+user-month at a time, followed by the live rows in date order.
+"""
+import csv
+import io
+import json
+from itertools import chain, islice
+from typing import Iterable, Iterator
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from .. import models
+from .analytics_service import food_nutrients
+from .archive_service import decode_archive
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_BATCH_ROWS = 1000
+
+BASE_COLUMNS = ["id", "log_date", "meal_type", "food_id", "food_name", "quantity_grams"]
+
+def _amount(value_per_100g: float | None, grams: float) -> float | None:
+    return None if value_per_100g is None else round(value_per_100g * grams / 100, 3)
+
+def _live_rows(db: Session, user_id: int, nutrient_ids: list) -> Iterator[list]:
+    """
+    One grouped query over food_logs x food_nutrients, streamed through a
+    server-side cursor (`yield_per`). Grouping starts with log_date so the
+    (user_id, log_date) index already delivers the rows in order.
+    """
+    amounts = [
+        func.sum(case((
+            models.FoodNutrient.nutrient_id == nutrient_id,
+            models.FoodNutrient.value_per_100g * models.FoodLog.quantity_grams / 100
+        )))
+        for nutrient_id in nutrient_ids
+    ]
+    columns = (
+        models.FoodLog.log_date, models.FoodLog.id, models.FoodLog.meal_type,
+        models.FoodLog.food_id, models.Food.name, models.FoodLog.quantity_grams
+    )
+    rows = db.query(*columns, *amounts).join(
+        models.Food, models.Food.id == models.FoodLog.food_id
+    ).outerjoin(
+        models.FoodNutrient, models.FoodNutrient.food_id == models.FoodLog.food_id
+    ).filter(
+        models.FoodLog.user_id == user_id
+    ).group_by(*columns).order_by(
+        models.FoodLog.log_date, models.FoodLog.id
+    ).yield_per(EXPORT_BATCH_ROWS)
+
+    for log_date, log_id, meal_type, food_id, food_name, grams, *values in rows:
+        yield [
+            log_id, log_date.isoformat(), meal_type, food_id, food_name, grams,
+            *(None if value is None else round(value, 3) for value in values)
+        ]
+
+def _archived_rows(db: Session, user_id: int, nutrient_ids: list) -> Iterator[list]:
+    """The user's archived months, decoded one month at a time."""
+    months = db.query(models.FoodLogArchive.month).filter(
+        models.FoodLogArchive.user_id == user_id
+    ).order_by(models.FoodLogArchive.month).all()
+
+    for (month,) in months:
+        (payload,) = db.query(models.FoodLogArchive.payload).filter(
+            models.FoodLogArchive.user_id == user_id,
+            models.FoodLogArchive.month == month
+        ).one()
+        rows = decode_archive(payload)
+        food_ids = {row[1] for row in rows}
+        names = dict(db.query(models.Food.id, models.Food.name).filter(models.Food.id.in_(food_ids)))
+        per_100g = {
+            food_id: {nutrient_id: value for nutrient_id, value, _ in nutrients}
+            for food_id, nutrients in food_nutrients(db, food_ids).items()
+        }
+        for log_id, food_id, grams, log_date, meal_type, _ in rows:
+            values = per_100g.get(food_id, {})
+            yield [
+                log_id, log_date, meal_type, food_id, names.get(food_id), grams,
+                *(_amount(values.get(nutrient_id), grams) for nutrient_id in nutrient_ids)
+            ]
+
+def _batches(rows: Iterable[list]) -> Iterator[list]:
+    rows = iter(rows)
+    while batch := list(islice(rows, EXPORT_BATCH_ROWS)):
+        yield batch
+
+def iter_log_export(db: Session, user_id: int, fmt: str = "ndjson") -> Iterator[str]:
+    """
+    Yields the user's export as text chunks of up to EXPORT_BATCH_ROWS rows:
+    NDJSON (one object per log) or CSV (with a header row). Nutrient
+    columns are named "<nutrient> (<unit>)"; amounts are for the logged
+    quantity, empty when the food has no value for that nutrient.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    nutrients = db.query(models.Nutrient.id, models.Nutrient.name, models.Nutrient.unit).order_by(models.Nutrient.id).all()
+    nutrient_ids = [nutrient_id for nutrient_id, _, _ in nutrients]
+    header = BASE_COLUMNS + [f"{name} ({unit})" for _, name, unit in nutrients]
+    rows = chain(_archived_rows(db, user_id, nutrient_ids), _live_rows(db, user_id, nutrient_ids))
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        for batch in _batches(rows):
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        for batch in _batches(rows):
+            yield "".join(
+                json.dumps(dict(zip(header, row)), separators=(",", ":")) + "\n" for row in batch
+            )
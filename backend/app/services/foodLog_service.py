@@ -1,8 +1,50 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, literal, select
+from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
 from .. import models, schemas
 from datetime import datetime, date, timezone
-from typing import List
+from typing import Iterable, List
+from .dashboard_cache import dashboard_cache
+from .analytics_service import compute_nutrient_totals, compute_nutrient_totals_by_date, record_log_delta
+from .archive_service import ensure_live
+from .sync_service import UPSERT, DELETE, log_payload, record_changes
+from .foodStats_service import record_food_stats, remove_food_stats
+
+def record_log_writes(db: Session, user_id: int, items: Iterable[tuple[date, int, float]], sign: int = 1) -> set:
+    """
+    Applies (log_date, food_id, quantity_grams) log writes to the analytics
+    rollups inside the caller's transaction (`sign=-1` for removals).
+    Returns the affected dates; call `invalidate_days` with them once committed.
+    """
+    totals = compute_nutrient_totals_by_date(db, items)
+    for log_date, (entries, vector) in totals.items():
+        record_log_delta(db, user_id, log_date, vector.scaled(sign), entries=sign * entries)
+    return set(totals)
+
+def invalidate_days(user_id: int, log_dates: Iterable[date]) -> None:
+    """Drops the cached dashboards of the user's days; call once the writes are committed."""
+    for log_date in log_dates:
+        dashboard_cache.invalidate_day(user_id, log_date)
+
+def insert_logs(db: Session, user_id: int, logs: List[dict], foods: Iterable[models.Food]) -> List[models.FoodLog]:
+    """
+    Inserts (food_id, quantity_grams, log_date, meal_type) dicts with one
+    executemany INSERT ... RETURNING and records them in the sync feed.
+    `foods` must hold every food referenced; the new rows' 'food'
+    relationships resolve from them without further queries.
+    The caller applies the rollups and commits.
+    """
+    created_at = datetime.utcnow()
+    db_log_entries = db.scalars(
+        insert(models.FoodLog).returning(models.FoodLog, sort_by_parameter_order=True),
+        [{**log, "user_id": user_id, "created_at": created_at} for log in logs]
+    ).all()
+    foods_by_id = {food.id: food for food in foods}
+    record_changes(db, user_id, [
+        (UPSERT, log.id, log_payload(log, foods_by_id[log.food_id])) for log in db_log_entries
+    ])
+    record_food_stats(db, user_id, [(log["food_id"], log["quantity_grams"]) for log in logs])
+    return db_log_entries
 
 def create_log_entry(db: Session, log_in: schemas.LogCreate, user_id: int) -> models.FoodLog:
     """
@@ -25,40 +67,195 @@ def create_log_entry(db: Session, log_in: schemas.LogCreate, user_id: int) -> mo
         created_at=datetime.utcnow() # Manually set creation time
     )
     
-    # 3. Add to database, commit, and refresh
+    # 3. Add to database, update the analytics rollups and the
+    #    sync feed in the same transaction, commit, and refresh
     db.add(db_log_entry)
+    db.flush()
+    log_dates = record_log_writes(db, user_id, [(log_in.log_date, log_in.food_id, log_in.quantity_grams)])
+    record_changes(db, user_id, [(UPSERT, db_log_entry.id, log_payload(db_log_entry, food))])
+    record_food_stats(db, user_id, [(log_in.food_id, log_in.quantity_grams)])
     db.commit()
     db.refresh(db_log_entry)
+    invalidate_days(user_id, log_dates)
     
     # 4. Return the newly created object
     # The 'food' relationship will be auto-populated by SQLAlchemy
     return db_log_entry
 
+def create_log_entries(db: Session, logs_in: List[schemas.LogCreate], user_id: int) -> List[models.FoodLog]:
+    """
+    Creates several food log entries atomically: either all of them
+    are logged, or none are.
+    """
+    
+    # 1. Validate every food id with one query
+    food_ids = {log_in.food_id for log_in in logs_in}
+    foods = db.query(models.Food).options(
+        joinedload(models.Food.category)
+    ).filter(models.Food.id.in_(food_ids)).all()
+    missing = food_ids - {food.id for food in foods}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Food with id {', '.join(map(str, sorted(missing)))} not found."
+        )
+    
+    # 2. Insert every entry with one executemany
+    db_log_entries = insert_logs(db, user_id, [log_in.model_dump() for log_in in logs_in], foods)
+    
+    # 3. Update the rollups in the same transaction, then commit once
+    log_dates = record_log_writes(
+        db, user_id, [(log_in.log_date, log_in.food_id, log_in.quantity_grams) for log_in in logs_in]
+    )
+    db.commit()
+    invalidate_days(user_id, log_dates)
+    
+    return db_log_entries
+
+def copy_log_entries(db: Session, copy_in: schemas.LogCopy, user_id: int) -> List[schemas.FoodLogResponse]:
+    """
+    Duplicates the user's entries of `source_date` (optionally one meal)
+    onto `target_date` with a single INSERT ... SELECT, so the rows never
+    leave the database. The rollup delta is one aggregate over the copies.
+    """
+    ensure_live(db, user_id, copy_in.source_date)
+    
+    # 1. INSERT ... SELECT ... RETURNING, in source order
+    meal_type = literal(copy_in.target_meal_type.value) if copy_in.target_meal_type else models.FoodLog.meal_type
+    source = select(
+        models.FoodLog.user_id,
+        models.FoodLog.food_id,
+        models.FoodLog.quantity_grams,
+        literal(copy_in.target_date, models.FoodLog.log_date.type),
+        meal_type,
+        literal(datetime.utcnow(), models.FoodLog.created_at.type)
+    ).where(
+        models.FoodLog.user_id == user_id,
+        models.FoodLog.log_date == copy_in.source_date
+    ).order_by(models.FoodLog.id)
+    if copy_in.meal_type:
+        source = source.where(models.FoodLog.meal_type == copy_in.meal_type.value)
+    
+    copies = db.execute(
+        insert(models.FoodLog).from_select(
+            ["user_id", "food_id", "quantity_grams", "log_date", "meal_type", "created_at"], source
+        ).returning(
+            models.FoodLog.id, models.FoodLog.food_id, models.FoodLog.quantity_grams, models.FoodLog.meal_type
+        )
+    ).all()
+    if not copies:
+        return []
+    copies.sort(key=lambda row: row.id)
+    
+    # 2. Rollups, sync feed and the response need only the foods' names and kcal
+    vector = compute_nutrient_totals(db, [(row.food_id, row.quantity_grams) for row in copies])
+    record_log_delta(db, user_id, copy_in.target_date, vector, entries=len(copies))
+    foods = {
+        food.id: food for food in db.query(models.Food).filter(
+            models.Food.id.in_({row.food_id for row in copies})
+        )
+    }
+    responses = [
+        schemas.FoodLogResponse(
+            id=row.id,
+            food_name=foods[row.food_id].name,
+            quantity_grams=row.quantity_grams,
+            meal_type=row.meal_type,
+            calories=round(foods[row.food_id].energy_kcal * row.quantity_grams / 100, 1)
+        )
+        for row in copies
+    ]
+    record_changes(db, user_id, [
+        (UPSERT, row.id, {**response.model_dump(), "food_id": row.food_id, "log_date": copy_in.target_date.isoformat()})
+        for row, response in zip(copies, responses)
+    ])
+    record_food_stats(db, user_id, [(row.food_id, row.quantity_grams) for row in copies])
+    db.commit()
+    invalidate_days(user_id, [copy_in.target_date])
+    return responses
+
+def _get_own_log(db: Session, log_id: int, user_id: int) -> models.FoodLog:
+    log = db.query(models.FoodLog).filter(
+        models.FoodLog.id == log_id,
+        models.FoodLog.user_id == user_id
+    ).first()
+    if not log:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Food log with id {log_id} not found."
+        )
+    return log
+
+def update_log_entry(db: Session, log_id: int, log_in: schemas.LogUpdate, user_id: int) -> models.FoodLog:
+    """
+    Updates the given fields of one of the user's log entries.
+    The rollups move the old values out and the new ones in.
+    """
+    log = _get_own_log(db, log_id, user_id)
+    changes = log_in.model_dump(exclude_unset=True, exclude_none=True)
+    
+    food = log.food
+    if "food_id" in changes and changes["food_id"] != log.food_id:
+        food = db.query(models.Food).filter(models.Food.id == changes["food_id"]).first()
+        if not food:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Food with id {changes['food_id']} not found."
+            )
+    
+    old_dates = record_log_writes(db, user_id, [(log.log_date, log.food_id, log.quantity_grams)], sign=-1)
+    if food is not log.food:
+        # Logged the wrong food: move the quick-add count to the right one
+        remove_food_stats(db, user_id, [(log.food_id, log.created_at)])
+        record_food_stats(db, user_id, [(food.id, changes.get("quantity_grams", log.quantity_grams))])
+    for field, value in changes.items():
+        setattr(log, field, value)
+    db.flush()
+    new_dates = record_log_writes(db, user_id, [(log.log_date, log.food_id, log.quantity_grams)])
+    record_changes(db, user_id, [(UPSERT, log.id, log_payload(log, food))])
+    db.commit()
+    db.refresh(log)
+    invalidate_days(user_id, old_dates | new_dates)
+    return log
+
+def delete_log_entry(db: Session, log_id: int, user_id: int) -> None:
+    """Deletes one of the user's log entries."""
+    log = _get_own_log(db, log_id, user_id)
+    log_dates = record_log_writes(db, user_id, [(log.log_date, log.food_id, log.quantity_grams)], sign=-1)
+    remove_food_stats(db, user_id, [(log.food_id, log.created_at)])
+    db.delete(log)
+    record_changes(db, user_id, [(DELETE, log_id, None)])
+    db.commit()
+    invalidate_days(user_id, log_dates)
+
 def get_food_logs(db: Session, user_id: int, log_date: date = None) -> List[schemas.FoodLogResponse]:
     """Get food logs for a user on a specific date"""
     if log_date is None:
         log_date = datetime.now(timezone.utc).date()
+    ensure_live(db, user_id, log_date)
     
-    logs = db.query(models.FoodLog).filter(
+    # One joined query selecting only what FoodLogResponse needs;
+    # kcal per 100 g is denormalized onto foods.energy_kcal
+    rows = db.query(
+        models.FoodLog.id,
+        models.Food.name,
+        models.FoodLog.quantity_grams,
+        models.FoodLog.meal_type,
+        models.Food.energy_kcal
+    ).join(
+        models.Food, models.Food.id == models.FoodLog.food_id
+    ).filter(
         models.FoodLog.user_id == user_id,
         models.FoodLog.log_date == log_date
-    ).all()
+    ).order_by(models.FoodLog.id).all()
     
-    result = []
-    for log in logs:
-        # Get calories from food nutrients
-        calories = 0
-        for nutrient in log.food.nutrients:
-            if nutrient.nutrient.name == "Energy":
-                calories = nutrient.value_per_100g * (log.quantity_grams / 100)
-                break
-        
-        result.append(schemas.FoodLogResponse(
-            id=log.id,
-            food_name=log.food.name,
-            quantity_grams=log.quantity_grams,
-            meal_type=log.meal_type,
-            calories=round(calories, 1)
-        ))
-    
-    return result
+    return [
+        schemas.FoodLogResponse(
+            id=log_id,
+            food_name=food_name,
+            quantity_grams=quantity_grams,
+            meal_type=meal_type,
+            calories=round(energy_kcal * quantity_grams / 100, 1)
+        )
+        for log_id, food_name, quantity_grams, meal_type, energy_kcal in rows
+    ]
@@ -0,0 +1,150 @@
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterable, List
+from sqlalchemy import bindparam, case, func, or_, update
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..database import upsert
+
+# A log counts half as much in the score after this many days
+FOOD_STATS_HALF_LIFE_DAYS = float(os.getenv("FOOD_STATS_HALF_LIFE_DAYS", "30"))
+# A log's weight is 2^(days since this epoch / half-life), so adding a log
+# never needs to touch the other rows. The weight itself overflows a double
+# after 1024 half-lives, so scores are kept as natural logs of the sum of
+# weights, which only grow linearly with time.
+DECAY_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# The score of a row whose logs have all been deleted (the log of zero)
+EMPTY_SCORE = -1e300
+
+def log_decay_weight(at: datetime) -> float:
+    """ln of the log's weight: ln 2 per half-life since DECAY_EPOCH."""
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    days = (at - DECAY_EPOCH).total_seconds() / 86400
+    return days / FOOD_STATS_HALF_LIFE_DAYS * math.log(2)
+
+def log_add(a: float, b: float) -> float:
+    """ln(e^a + e^b), without leaving log space."""
+    if a < b:
+        a, b = b, a
+    return a + math.log1p(math.exp(b - a))
+
+def _sql_log_add(a, b):
+    return case((a >= b, a + func.ln(1 + func.exp(b - a))), else_=b + func.ln(1 + func.exp(a - b)))
+
+def record_food_stats(db: Session, user_id: int, items: Iterable[tuple[int, float]], at: datetime | None = None) -> None:
+    """
+    Counts newly logged (food_id, quantity_grams) items in user_food_stats
+    with one upsert, inside the caller's transaction.
+    """
+    at = at or datetime.now(timezone.utc)
+    per_food = defaultdict(lambda: [0, 0.0])
+    for food_id, grams in items:
+        per_food[food_id][0] += 1
+        per_food[food_id][1] += grams
+    if not per_food:
+        return
+
+    weight = log_decay_weight(at)
+    upsert(
+        db, models.UserFoodStat,
+        [{"user_id": user_id, "food_id": food_id, "count": count, "last_logged_at": at,
+          "typical_grams": grams / count, "score": math.log(count) + weight}
+         for food_id, (count, grams) in per_food.items()],
+        index_elements=["user_id", "food_id"],
+        increment=("count",),
+        replace=("last_logged_at",),
+        merge={
+            "typical_grams": lambda row, new: (
+                (row.typical_grams * row.count + new.typical_grams * new.count) / (row.count + new.count)
+            ),
+            "score": lambda row, new: _sql_log_add(row.score, new.score),
+        }
+    )
+
+def remove_food_stats(db: Session, user_id: int, items: Iterable[tuple[int, datetime | None]]) -> None:
+    """
+    Takes deleted (food_id, created_at) logs back out of the counts and
+    scores, with one executemany UPDATE. The typical quantity is kept.
+    """
+    per_food = defaultdict(lambda: [0, EMPTY_SCORE])
+    for food_id, logged_at in items:
+        per_food[food_id][0] += 1
+        per_food[food_id][1] = log_add(per_food[food_id][1], log_decay_weight(logged_at or datetime.now(timezone.utc)))
+    if not per_food:
+        return
+
+    stats = models.UserFoodStat.__table__
+    removed = bindparam("b_score")
+    db.execute(
+        update(stats).where(
+            stats.c.user_id == bindparam("b_user_id"),
+            stats.c.food_id == bindparam("b_food_id")
+        ).values(
+            count=stats.c.count - bindparam("b_count"),
+            # ln(e^score - e^removed), or empty once nothing is left
+            score=case(
+                (or_(stats.c.count <= bindparam("b_count"), removed >= stats.c.score), EMPTY_SCORE),
+                else_=stats.c.score + func.ln(1 - func.exp(removed - stats.c.score))
+            )
+        ),
+        [{"b_user_id": user_id, "b_food_id": food_id, "b_count": count, "b_score": score}
+         for food_id, (count, score) in per_food.items()]
+    )
+
+def get_quick_add(db: Session, user_id: int, limit: int = 10) -> List[schemas.QuickAddFood]:
+    """The user's top foods by decayed frequency: one read of the (user_id, score) index."""
+    rows = db.query(models.UserFoodStat, models.Food.name, models.Food.energy_kcal).join(
+        models.Food, models.Food.id == models.UserFoodStat.food_id
+    ).filter(
+        models.UserFoodStat.user_id == user_id,
+        models.UserFoodStat.count > 0
+    ).order_by(models.UserFoodStat.score.desc()).limit(limit).all()
+
+    return [
+        schemas.QuickAddFood(
+            food_id=stat.food_id,
+            food_name=name,
+            count=stat.count,
+            last_logged_at=stat.last_logged_at,
+            typical_grams=round(stat.typical_grams, 1),
+            calories=round(energy_kcal * stat.typical_grams / 100, 1)
+        )
+        for stat, name, energy_kcal in rows
+    ]
+
+def rebuild_food_stats(db: Session, user_id: int | None = None) -> int:
+    """
+    Recomputes user_food_stats from food_logs (for one user, or everyone).
+    Used to backfill existing history; returns the number of rows written.
+    """
+    stats = db.query(models.UserFoodStat)
+    logs = db.query(
+        models.FoodLog.user_id, models.FoodLog.food_id,
+        models.FoodLog.quantity_grams, models.FoodLog.created_at
+    )
+    if user_id is not None:
+        stats = stats.filter(models.UserFoodStat.user_id == user_id)
+        logs = logs.filter(models.FoodLog.user_id == user_id)
+    stats.delete(synchronize_session=False)
+
+    totals = {}
+    for uid, food_id, grams, created_at in logs.yield_per(5000):
+        created_at = created_at or datetime.now(timezone.utc)
+        row = totals.setdefault((uid, food_id), {
+            "user_id": uid, "food_id": food_id, "count": 0, "last_logged_at": created_at,
+            "typical_grams": 0.0, "score": EMPTY_SCORE
+        })
+        row["count"] += 1
+        row["typical_grams"] += grams
+        row["score"] = log_add(row["score"], log_decay_weight(created_at))
+        row["last_logged_at"] = max(row["last_logged_at"], created_at, key=lambda at: at.replace(tzinfo=None))
+
+    for row in totals.values():
+        row["typical_grams"] /= row["count"]
+    if totals:
+        db.bulk_insert_mappings(models.UserFoodStat, list(totals.values()))
+    db.commit()
+    return len(totals)
@@ -1,3 +1,4 @@
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 from .. import models # .. means "go up one level" and import models
 from .. import schemas
@@ -69,4 +70,22 @@ def get_food_by_name(db: Session, name: str):
     """
     Check if a food with this exact name already exists.
     """
-    return db.query(models.Food).filter(models.Food.name == name).first()
\ No newline at end of file
+    return db.query(models.Food).filter(models.Food.name == name).first()
+
+def sync_food_energy(db: Session, food_ids=None) -> None:
+    """
+    Copies each food's "Energy" nutrient value (kcal per 100 g) onto
+    `foods.energy_kcal`, for the given foods or all of them.
+    Call it after writing FoodNutrient rows; the caller commits.
+    """
+    energy = select(models.FoodNutrient.value_per_100g).join(
+        models.Nutrient, models.Nutrient.id == models.FoodNutrient.nutrient_id
+    ).where(
+        models.FoodNutrient.food_id == models.Food.id,
+        models.Nutrient.name == "Energy"
+    ).limit(1).scalar_subquery()
+    
+    query = db.query(models.Food)
+    if food_ids is not None:
+        query = query.filter(models.Food.id.in_(food_ids))
+    query.update({models.Food.energy_kcal: func.coalesce(energy, 0.0)}, synchronize_session=False)
@@ -0,0 +1,187 @@
+"""
+Write-behind batching for single food-log inserts.
+
+Under bursts (everyone logging lunch at 13:00) each POST /food-logs/ pays
+for its own transaction and commit. With FOOD_LOG_WRITE_BEHIND=1 the
+endpoint instead queues the validated entry and waits; a background
+thread collects entries for up to FOOD_LOG_BATCH_MAX_WAIT_MS or
+FOOD_LOG_BATCH_MAX_ROWS rows and writes them with one multi-row INSERT,
+one rollup/sync/stats pass per user and a single commit.
+
+Each request is acknowledged only once that commit has succeeded, so a
+201 still means the entry is durable; a failed flush fails every request
+in the batch. At most FOOD_LOG_QUEUE_MAX_ROWS entries wait in the queue;
+when it is full (a flush has stalled) requests write synchronously
+instead. Batch sizes and flush latencies are published through
+`metrics`. Meant for long-running servers: a frozen serverless process
+would only delay its own requests.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, List
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
+from .. import models, schemas
+from ..database import SessionLocal
+from ..metrics import metrics
+from .foodLog_service import invalidate_days, record_log_writes
+from .sync_service import UPSERT, log_payload, record_changes
+from .foodStats_service import record_food_stats
+
+logger = logging.getLogger(__name__)
+
+FOOD_LOG_WRITE_BEHIND = os.getenv("FOOD_LOG_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+FOOD_LOG_BATCH_MAX_ROWS = int(os.getenv("FOOD_LOG_BATCH_MAX_ROWS", "200"))
+FOOD_LOG_BATCH_MAX_WAIT_MS = float(os.getenv("FOOD_LOG_BATCH_MAX_WAIT_MS", "5"))
+FOOD_LOG_QUEUE_MAX_ROWS = int(os.getenv("FOOD_LOG_QUEUE_MAX_ROWS", "5000"))
+
+_STOP = object()
+
+
+class LogWriteBehind:
+    """
+    Queues (user_id, LogCreate) entries and flushes them in batches from
+    one background thread. `submit` returns a Future resolved with the
+    committed FoodLog (detached, with 'food' loaded) or with the error,
+    or None when the queue is full and the caller should write itself.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        enabled: bool = FOOD_LOG_WRITE_BEHIND,
+        max_rows: int = FOOD_LOG_BATCH_MAX_ROWS,
+        max_wait_ms: float = FOOD_LOG_BATCH_MAX_WAIT_MS,
+        max_queue: int = FOOD_LOG_QUEUE_MAX_ROWS,
+    ):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, user_id: int, log_in: schemas.LogCreate) -> Future | None:
+        future = Future()
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((user_id, log_in, future))
+        except queue.Full:
+            metrics.incr("food_log_write_behind.queue_full")
+            return None
+        return future
+
+    def close(self) -> None:
+        """Flushes whatever is queued and stops the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="food-log-write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch: List[tuple]) -> None:
+        started = time.perf_counter()
+        log_dates = {}
+        # Not expiring on commit keeps the returned rows readable once detached
+        db = self.session_factory()
+        db.expire_on_commit = False
+        try:
+            # 1. Validate every food id with one query; unknown ones fail alone
+            food_ids = {log_in.food_id for _, log_in, _ in batch}
+            foods = {food.id: food for food in db.query(models.Food).options(
+                joinedload(models.Food.category)
+            ).filter(models.Food.id.in_(food_ids))}
+            valid = []
+            for user_id, log_in, future in batch:
+                if log_in.food_id in foods:
+                    valid.append((user_id, log_in, future))
+                else:
+                    future.set_exception(HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Food with id {log_in.food_id} not found."
+                    ))
+            if not valid:
+                return
+
+            # 2. One multi-row INSERT ... RETURNING for every user's entries
+            created_at = datetime.utcnow()
+            db_log_entries = db.scalars(
+                insert(models.FoodLog).returning(models.FoodLog, sort_by_parameter_order=True),
+                [{**log_in.model_dump(), "user_id": user_id, "created_at": created_at} for user_id, log_in, _ in valid]
+            ).all()
+
+            # 3. Rollups, sync feed and food stats per user, then one commit
+            by_user = defaultdict(list)
+            for log in db_log_entries:
+                by_user[log.user_id].append(log)
+            for user_id, logs in by_user.items():
+                log_dates[user_id] = record_log_writes(
+                    db, user_id, [(log.log_date, log.food_id, log.quantity_grams) for log in logs]
+                )
+                record_changes(db, user_id, [(UPSERT, log.id, log_payload(log, foods[log.food_id])) for log in logs])
+                record_food_stats(db, user_id, [(log.food_id, log.quantity_grams) for log in logs])
+            for log in db_log_entries:
+                log.food  # resolves from the identity map, so the rows stay usable once detached
+            db.commit()
+
+            # Committed: acknowledge before anything else can fail
+            for (_, _, future), log in zip(valid, db_log_entries):
+                future.set_result(log)
+        except Exception as error:
+            db.rollback()
+            log_dates = {}
+            metrics.incr("food_log_write_behind.errors")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        finally:
+            db.close()
+            metrics.observe("food_log_write_behind.batch_size", len(batch))
+            metrics.observe("food_log_write_behind.flush_ms", (time.perf_counter() - started) * 1000)
+
+        # A stale cached day must not turn committed entries into errors
+        try:
+            for user_id, dates in log_dates.items():
+                invalidate_days(user_id, dates)
+        except Exception:
+            metrics.incr("food_log_write_behind.invalidation_errors")
+            logger.exception("Dashboard cache invalidation failed after a write-behind flush")
+
+
+log_batcher = LogWriteBehind()
@@ -0,0 +1,102 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from typing import List
+from .. import models, schemas
+from .analytics_service import NutrientVector, compute_nutrient_totals, record_log_delta
+from .foodLog_service import insert_logs, invalidate_days
+
+def _to_schema(template: models.MealTemplate) -> schemas.MealTemplate:
+    return schemas.MealTemplate(
+        id=template.id,
+        name=template.name,
+        meal_type=template.meal_type,
+        calories=round(template.energy_kcal, 1),
+        items=[
+            schemas.MealTemplateItem(food_id=item.food_id, food_name=item.food.name, quantity_grams=item.quantity_grams)
+            for item in template.items
+        ]
+    )
+
+def _get_own_template(db: Session, template_id: int, user_id: int) -> models.MealTemplate:
+    template = db.query(models.MealTemplate).filter(
+        models.MealTemplate.id == template_id,
+        models.MealTemplate.user_id == user_id
+    ).first()
+    if not template:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Meal template with id {template_id} not found."
+        )
+    return template
+
+def _set_items(db: Session, template: models.MealTemplate, template_in: schemas.MealTemplateCreate) -> None:
+    """Validates the foods (one query), replaces the items and recomputes the stored vector."""
+    food_ids = {item.food_id for item in template_in.items}
+    found = {food_id for (food_id,) in db.query(models.Food.id).filter(models.Food.id.in_(food_ids))}
+    missing = food_ids - found
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Food with id {', '.join(map(str, sorted(missing)))} not found."
+        )
+
+    template.name = template_in.name
+    template.meal_type = template_in.meal_type.value
+    template.items = [
+        models.MealTemplateItem(position=position, food_id=item.food_id, quantity_grams=item.quantity_grams)
+        for position, item in enumerate(template_in.items)
+    ]
+    vector = compute_nutrient_totals(db, [(item.food_id, item.quantity_grams) for item in template_in.items])
+    template.nutrients = vector.to_json()
+    template.energy_kcal = vector.energy_kcal
+
+def create_template(db: Session, template_in: schemas.MealTemplateCreate, user_id: int) -> schemas.MealTemplate:
+    template = models.MealTemplate(user_id=user_id)
+    _set_items(db, template, template_in)
+    db.add(template)
+    db.commit()
+    db.refresh(template)
+    return _to_schema(template)
+
+def get_templates(db: Session, user_id: int) -> List[schemas.MealTemplate]:
+    """The user's templates; items and foods are loaded with two batched queries."""
+    templates = db.query(models.MealTemplate).filter(
+        models.MealTemplate.user_id == user_id
+    ).order_by(models.MealTemplate.name).all()
+    return [_to_schema(template) for template in templates]
+
+def get_template(db: Session, template_id: int, user_id: int) -> schemas.MealTemplate:
+    return _to_schema(_get_own_template(db, template_id, user_id))
+
+def update_template(db: Session, template_id: int, template_in: schemas.MealTemplateCreate, user_id: int) -> schemas.MealTemplate:
+    template = _get_own_template(db, template_id, user_id)
+    _set_items(db, template, template_in)
+    db.commit()
+    db.refresh(template)
+    return _to_schema(template)
+
+def delete_template(db: Session, template_id: int, user_id: int) -> None:
+    db.delete(_get_own_template(db, template_id, user_id))
+    db.commit()
+
+def log_template(db: Session, template_id: int, log_in: schemas.MealTemplateLog, user_id: int) -> List[models.FoodLog]:
+    """
+    Logs every item of a template on `log_date` with one bulk insert.
+    The rollups are updated once, from the template's stored nutrient
+    vector, instead of being recomputed per item.
+    """
+    template = _get_own_template(db, template_id, user_id)
+    meal_type = log_in.meal_type.value if log_in.meal_type else template.meal_type
+
+    db_log_entries = insert_logs(db, user_id, [
+        {"food_id": item.food_id, "quantity_grams": item.quantity_grams,
+         "log_date": log_in.log_date, "meal_type": meal_type}
+        for item in template.items
+    ], [item.food for item in template.items])
+    record_log_delta(
+        db, user_id, log_in.log_date,
+        NutrientVector.from_json(template.nutrients), entries=len(db_log_entries)
+    )
+    db.commit()
+    invalidate_days(user_id, [log_in.log_date])
+    return db_log_entries
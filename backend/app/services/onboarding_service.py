@@ -0,0 +1,203 @@
+"""
+Bulk onboarding of users, for employer cohorts of thousands.
+
+Registering them one by one through /auth/register costs a request, a
+bcrypt hash and a commit per user. Here the rows are validated up front,
+then handled in batches of BULK_ONBOARDING_BATCH_ROWS:
+
+1. one query finds the emails that already have an account,
+2. the passwords are hashed in parallel on a process pool using every
+   core (a pool of its own, so interactive logins keep theirs),
+3. the users are written with one multi-row INSERT ... ON CONFLICT DO
+   NOTHING, their OTP emails are queued in the outbox, and one commit
+   covers the batch. The outbox worker sends the emails afterwards.
+
+Every row gets a result, yielded as its batch completes so large files
+can report progress while they run.
+"""
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Iterable, List
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from .. import models, schemas, security
+from ..metrics import metrics
+from .email import email_service
+from .email_outbox import outbox_worker
+
+BULK_ONBOARDING_BATCH_ROWS = int(os.getenv("BULK_ONBOARDING_BATCH_ROWS", "500"))
+BULK_ONBOARDING_MAX_ROWS = int(os.getenv("BULK_ONBOARDING_MAX_ROWS", "20000"))
+BULK_HASH_WORKERS = int(os.getenv("BULK_HASH_WORKERS", "0")) or os.cpu_count() or 1
+
+CSV_TYPES = ("text/csv", "application/csv")
+
+_hash_pool: Executor | None = None
+
+def _pool() -> Executor:
+    """
+    The bulk-hash pool, created on first use and kept for the life of the
+    process (concurrent.futures joins its workers at interpreter exit).
+    """
+    global _hash_pool
+    if _hash_pool is None:
+        try:
+            # Spawned, not forked: the server process already runs threads
+            _hash_pool = ProcessPoolExecutor(BULK_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        except (OSError, NotImplementedError):
+            # No process support (AWS Lambda has no /dev/shm); bcrypt releases the GIL
+            _hash_pool = ThreadPoolExecutor(BULK_HASH_WORKERS, thread_name_prefix="bulk-hash")
+    return _hash_pool
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown()
+        _hash_pool = None
+
+def parse_bulk_users(body: bytes, content_type: str) -> List[tuple[int, dict]]:
+    """
+    (row number, fields) for each user in a JSON array of objects or a
+    CSV file with a header row (email, password, first_name, last_name).
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    try:
+        if media_type in CSV_TYPES:
+            rows = list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+        elif media_type == "application/json":
+            rows = json.loads(body)
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise ValueError("Expected a JSON array of user objects")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send users as application/json or text/csv"
+            )
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Could not parse the upload: {e}")
+
+    if len(rows) > BULK_ONBOARDING_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_ONBOARDING_MAX_ROWS} users per upload"
+        )
+    return list(enumerate(rows, start=1))
+
+def _existing_emails(db: Session, emails: List[str]) -> set:
+    if not emails:
+        return set()
+    return {email for (email,) in db.query(models.User.email).filter(models.User.email.in_(emails))}
+
+def _insert_users(db: Session, users: List[schemas.BulkUserIn], hashes: List[str]) -> dict:
+    """Inserts the batch, queues its OTP emails and commits; returns {email: id} of the rows inserted."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=15)
+    otps = {user.email: security.create_otp() for user in users}
+    values = [
+        {
+            "email": user.email,
+            "hashed_password": hashed,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "is_active": False,
+            "verification_otp": otps[user.email],
+            "otp_expires_at": expires_at,
+        }
+        for user, hashed in zip(users, hashes)
+    ]
+    # Emails registered since the existence check are skipped (reported as "exists")
+    stmt = insert(models.User).values(values).on_conflict_do_nothing(
+        index_elements=["email"]
+    ).returning(models.User.id, models.User.email)
+    created = {email: user_id for user_id, email in db.execute(stmt)}
+
+    for user in users:
+        if user.email in created:
+            email_service.enqueue_otp_email(db, user.email, otps[user.email], user.first_name)
+    db.commit()
+    return created
+
+async def iter_bulk_create(db: Session, rows: Iterable[tuple[int, dict]]) -> AsyncIterator[dict]:
+    """Creates the users, yielding a BulkUserResult dict per row as each batch is committed."""
+    rows = list(rows)
+    loop = asyncio.get_running_loop()
+    seen = set()
+
+    for start in range(0, len(rows), BULK_ONBOARDING_BATCH_ROWS):
+        results, valid = [], []
+        for row, fields in rows[start:start + BULK_ONBOARDING_BATCH_ROWS]:
+            try:
+                user = schemas.BulkUserIn.model_validate(fields)
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"])
+                email = fields.get("email")
+                results.append({
+                    "row": row, "email": None if email is None else str(email),
+                    "status": "invalid", "error": f"{field}: {error['msg']}"
+                })
+                continue
+            if user.email in seen:
+                results.append({"row": row, "email": user.email, "status": "duplicate"})
+                continue
+            seen.add(user.email)
+            valid.append((row, user))
+
+        existing = await run_in_threadpool(_existing_emails, db, [user.email for _, user in valid])
+        new = [(row, user) for row, user in valid if user.email not in existing]
+        results.extend({"row": row, "email": user.email, "status": "exists"} for row, user in valid if user.email in existing)
+
+        if new:
+            started = time.perf_counter()
+            hashes = await asyncio.gather(*(
+                loop.run_in_executor(_pool(), security.hash_password, user.password, security.BCRYPT_ROUNDS)
+                for _, user in new
+            ))
+            metrics.observe("bulk_onboarding.hash_ms", (time.perf_counter() - started) * 1000)
+            created = await run_in_threadpool(_insert_users, db, [user for _, user in new], hashes)
+            outbox_worker.notify()
+            metrics.incr("bulk_onboarding.created", len(created))
+            for row, user in new:
+                if user.email in created:
+                    results.append({"row": row, "email": user.email, "status": "created", "user_id": created[user.email]})
+                else:
+                    results.append({"row": row, "email": user.email, "status": "exists"})
+
+        for result in sorted(results, key=lambda result: result["row"]):
+            yield result
+
+def _summary(total: int, counts: dict) -> dict:
+    return {
+        "total": total,
+        "created": counts.get("created", 0),
+        "skipped": counts.get("exists", 0) + counts.get("duplicate", 0),
+        "failed": counts.get("invalid", 0),
+    }
+
+async def bulk_create_users(db: Session, rows: List[tuple[int, dict]]) -> dict:
+    """Creates the users and returns the whole BulkUserReport."""
+    results, counts = [], {}
+    async for result in iter_bulk_create(db, rows):
+        results.append(result)
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {**_summary(len(rows), counts), "results": results}
+
+async def iter_bulk_create_ndjson(db: Session, rows: List[tuple[int, dict]]) -> AsyncIterator[str]:
+    """The same import as NDJSON: one line per row as its batch completes, then {"summary": {...}}."""
+    counts = {}
+    async for result in iter_bulk_create(db, rows):
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        yield json.dumps(result, separators=(",", ":")) + "\n"
+    yield json.dumps({"summary": _summary(len(rows), counts)}, separators=(",", ":")) + "\n"
@@ -0,0 +1,49 @@
+import os
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..cache import CacheBackend, MemoryCache
+from ..metrics import metrics
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+
+class PrincipalCache:
+    """
+    Caches the principal (id, email, active flag) of authenticated users,
+    keyed by user id, so authenticating a request needs no query.
+
+    The cache is per process. Account changes call `invalidate`, which is
+    immediate here; other processes see the change within the short TTL.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+
+    def load(self, db: Session, user_id: int) -> schemas.Principal | None:
+        """The cached principal, or one primary-key read on a miss. None if the user is gone."""
+        key = f"principal:{user_id}"
+        payload = self.backend.get(key)
+        if payload is not None:
+            metrics.incr("principal_cache.hits")
+            return schemas.Principal.model_validate_json(payload)
+
+        metrics.incr("principal_cache.misses")
+        row = db.query(models.User.id, models.User.email, models.User.is_active).filter(
+            models.User.id == user_id
+        ).first()
+        if row is None:
+            return None
+        principal = schemas.Principal.model_validate(row)
+        self.backend.set(key, principal.model_dump_json(), ttl=self.ttl)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        """Called after activating, deactivating or otherwise changing a user's account."""
+        self.backend.delete(f"principal:{user_id}")
+
+
+principal_cache = PrincipalCache(
+    MemoryCache(max_entries=PRINCIPAL_CACHE_MAX_ENTRIES)
+)
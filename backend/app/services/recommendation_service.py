@@ -9,6 +9,7 @@ import asyncio
 import time
 from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from . import target_service
 
 # Ensure .env is loaded
 load_dotenv()
@@ -29,25 +30,11 @@ class RecommendationService:
     
     def calculate_bmr(self, weight_kg: float, height_cm: float, age: int, gender: str) -> float:
         """Calculate Basal Metabolic Rate using Mifflin-St Jeor Equation"""
-        if gender.lower() == 'male':
-            return (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + 5
-        else:
-            return (10 * weight_kg) + (6.25 * height_cm) - (5 * age) - 161
+        return target_service.calculate_bmr(weight_kg, height_cm, age, gender)
     
     def calculate_tdee(self, bmr: float, activity_level: str) -> float:
         """Calculate Total Daily Energy Expenditure"""
-        multipliers = {
-            'sedentary': 1.2,
-            'moderate': 1.55,
-            'heavy': 1.725,
-            'pregnant': 1.5,
-            'lactating_0_6': 1.7,
-            'lactating_6_12': 1.6,
-            'infant': 1.0,
-            'child': 1.4,
-            'adolescent': 1.6
-        }
-        return bmr * multipliers.get(activity_level, 1.2)
+        return target_service.calculate_tdee(bmr, activity_level)
     
     def get_weight_loss_calories(self, tdee: float) -> float:
         """Apply a sustainable 500 calorie deficit"""
@@ -86,21 +73,31 @@ class RecommendationService:
         except Exception as e:
             raise ValueError(f"API error: {str(e)}")
     
-    async def generate_recommendations(self, user_profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate personalized recommendations"""
+    async def generate_recommendations(self, user_profile: Dict[str, Any], targets: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        """
+        Generate personalized recommendations.
+        
+        `targets` is the user's persisted target vector (bmr, tdee, bmi).
+        When it is given, nothing is recomputed from the raw profile.
+        """
         
         try:
-            # Calculate metrics
             age = (date.today() - user_profile['birth_date']).days // 365
-            bmr = self.calculate_bmr(
-                user_profile['weight_kg'],
-                user_profile['height_cm'],
-                age,
-                user_profile['gender']
-            )
-            tdee = self.calculate_tdee(bmr, user_profile['activity_level'])
+            if targets:
+                bmr = targets['bmr']
+                tdee = targets['tdee']
+                bmi = targets['bmi']
+            else:
+                # Calculate metrics
+                bmr = self.calculate_bmr(
+                    user_profile['weight_kg'],
+                    user_profile['height_cm'],
+                    age,
+                    user_profile['gender']
+                )
+                tdee = self.calculate_tdee(bmr, user_profile['activity_level'])
+                bmi = user_profile['weight_kg'] / ((user_profile['height_cm'] / 100) ** 2)
             target_calories = self.get_weight_loss_calories(tdee)
-            bmi = user_profile['weight_kg'] / ((user_profile['height_cm'] / 100) ** 2)
             
             # User preferences
             dietary = user_profile.get('dietary_preference') or "balanced"
@@ -231,16 +228,7 @@ Return ONLY valid JSON (no text before or after):
     
     def _get_bmi_category(self, bmi: float) -> str:
         """Get BMI category using Indian standards"""
-        if bmi < 18.5:
-            return "Underweight"
-        elif 18.5 <= bmi < 23:
-            return "Normal"
-        elif 23 <= bmi < 25:
-            return "Overweight"
-        elif 25 <= bmi < 30:
-            return "Obese Class I"
-        else:
-            return "Obese Class II"
+        return target_service.get_bmi_category(bmi)
     
     def _generate_fallback_plan(self, target_calories: float, dietary: str, cuisine: str, budget: str = "moderate") -> Dict[str, Any]:
         """Generate expert-designed fallback plan"""
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from .. import models
+from ..bloom import BloomFilter
+from ..metrics import metrics
+
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "30"))
+
+
+class RevocationList:
+    """
+    Answers "is this access token revoked?" on every authenticated request.
+
+    The revoked_tokens table is mirrored into a Bloom filter, rebuilt from
+    the live (unexpired) rows every REVOCATION_REFRESH_SECONDS. A jti the
+    filter does not contain is certainly not revoked, which is the answer
+    for nearly every request, with no query. Only a positive is confirmed
+    with a primary-key read. Revocations made in this process are added
+    to the filter at once; other processes see them after their next rebuild.
+    Those made while a rebuild is in flight are merged into the new filter
+    before it is swapped in, so a rebuild can never drop them.
+    """
+
+    def __init__(self, refresh_seconds: float = REVOCATION_REFRESH_SECONDS, clock=time.monotonic):
+        self.refresh_seconds = refresh_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._filter = BloomFilter(1024)
+        self._pending: set[str] | None = None
+        self._loaded_at = None
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or self._clock() - self._loaded_at >= self.refresh_seconds
+
+    def reload(self, db: Session) -> None:
+        with self._reload_lock:
+            self._reload(db)
+
+    def _reload(self, db: Session) -> None:
+        # Opened before the query, so every revocation the query may miss lands here
+        with self._lock:
+            pending = self._pending = set()
+        jtis = db.query(models.RevokedToken.jti).filter(
+            models.RevokedToken.expires_at > datetime.now(timezone.utc)
+        ).all()
+        bloom = BloomFilter(max(2 * len(jtis), 1024))
+        for (jti,) in jtis:
+            bloom.add(jti)
+        with self._lock:
+            for jti in pending:
+                bloom.add(jti)
+            self._pending = None
+            self._filter, self._loaded_at = bloom, self._clock()
+        metrics.incr("revocation.reloads")
+
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        if self._stale():
+            with self._reload_lock:
+                if self._stale():
+                    self._reload(db)
+        if jti not in self._filter:
+            return False
+        metrics.incr("revocation.bloom_positives")
+        return db.get(models.RevokedToken, jti) is not None
+
+    def revoke(self, db: Session, jti: str, user_id: int, expires_at: datetime) -> None:
+        """Persists the revocation, commits, and adds it to this process's filter."""
+        db.merge(models.RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+        db.commit()
+        with self._lock:
+            self._filter.add(jti)
+            if self._pending is not None:
+                self._pending.add(jti)
+
+
+revocation_list = RevocationList()
+
+def prune_revoked_tokens(db: Session) -> int:
+    """Deletes revocations of tokens that have expired anyway; returns how many."""
+    deleted = db.query(models.RevokedToken).filter(
+        models.RevokedToken.expires_at < datetime.now(timezone.utc)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
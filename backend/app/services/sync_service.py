@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from .. import models, schemas
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+def log_payload(log: models.FoodLog, food: models.Food) -> dict:
+    """The log as a client stores it (the FoodLogResponse fields plus food_id and log_date)."""
+    return {
+        "id": log.id,
+        "food_id": log.food_id,
+        "food_name": food.name,
+        "quantity_grams": log.quantity_grams,
+        "log_date": log.log_date.isoformat(),
+        "meal_type": models.MealTypeEnum(log.meal_type).value,
+        "calories": round(food.energy_kcal * log.quantity_grams / 100, 1),
+    }
+
+def record_changes(db: Session, user_id: int, changes: List[tuple[str, int, dict | None]]) -> int:
+    """
+    Appends (op, log_id, payload) changes to the user's change feed inside
+    the caller's transaction. Returns the last sequence number used.
+
+    The sequence comes from users.sync_seq: the UPDATE locks the user's row
+    until commit, so concurrent writers of one user get consecutive,
+    gap-free numbers in commit order.
+    """
+    if not changes:
+        return 0
+    last_seq = db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(sync_seq=models.User.sync_seq + len(changes))
+        .returning(models.User.sync_seq)
+    ).scalar_one()
+    first_seq = last_seq - len(changes) + 1
+    changed_at = datetime.utcnow()
+    db.execute(insert(models.FoodLogChange), [
+        {"user_id": user_id, "seq": first_seq + i, "log_id": log_id, "op": op,
+         "payload": payload, "changed_at": changed_at}
+        for i, (op, log_id, payload) in enumerate(changes)
+    ])
+    return last_seq
+
+def get_changes(db: Session, user_id: int, since: int = 0, limit: int = 500) -> schemas.SyncResponse:
+    """
+    The user's log changes after sequence `since`, oldest first, at most
+    `limit` of them: one range read on the (user_id, seq) primary key.
+    """
+    rows = db.query(
+        models.FoodLogChange.seq, models.FoodLogChange.op,
+        models.FoodLogChange.log_id, models.FoodLogChange.payload
+    ).filter(
+        models.FoodLogChange.user_id == user_id,
+        models.FoodLogChange.seq > since
+    ).order_by(models.FoodLogChange.seq).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return schemas.SyncResponse(
+        changes=[
+            schemas.SyncChange(seq=seq, op=op, log_id=log_id, log=payload)
+            for seq, op, log_id, payload in rows
+        ],
+        next_since=rows[-1].seq if rows else since,
+        has_more=has_more
+    )
@@ -0,0 +1,228 @@
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from .. import models
+
+RDA_REFERENCE = "rda"
+
+TDEE_MULTIPLIERS = {
+    'sedentary': 1.2,
+    'moderate': 1.55,
+    'heavy': 1.725,
+    'pregnant': 1.5,
+    'lactating_0_6': 1.7,
+    'lactating_6_12': 1.6,
+    'infant': 1.0,
+    'child': 1.4,
+    'adolescent': 1.6
+}
+
+# --- PURE CALCULATIONS ---
+
+def calculate_age(birth_date: date, today: date | None = None) -> float:
+    """Calculates age in years. Infants get a fractional age (6 months = 0.5)."""
+    today = today or date.today()
+    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+    if age == 0:
+        return (today - birth_date).days / 365.25
+    return float(age)
+
+def calculate_bmr(weight_kg: float, height_cm: float, age: int, gender: str) -> float:
+    """Calculate Basal Metabolic Rate using Mifflin-St Jeor Equation"""
+    if gender.lower() == 'male':
+        return (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + 5
+    else:
+        return (10 * weight_kg) + (6.25 * height_cm) - (5 * age) - 161
+
+def calculate_tdee(bmr: float, activity_level: str) -> float:
+    """Calculate Total Daily Energy Expenditure"""
+    return bmr * TDEE_MULTIPLIERS.get(activity_level, 1.2)
+
+def calculate_bmi(weight_kg: float, height_cm: float) -> float | None:
+    if not weight_kg or not height_cm or height_cm <= 0:
+        return None
+    height_m = height_cm / 100
+    return weight_kg / (height_m * height_m)
+
+def get_bmi_category(bmi: float) -> str:
+    """Get BMI category using Indian standards"""
+    if bmi < 18.5:
+        return "Underweight"
+    elif 18.5 <= bmi < 23:
+        return "Normal"
+    elif 23 <= bmi < 25:
+        return "Overweight"
+    elif 25 <= bmi < 30:
+        return "Obese Class I"
+    else:
+        return "Obese Class II"
+
+def _valid_until(birth_date: date, today: date) -> date:
+    """
+    The first day on which the user's age (and so their target vector)
+    changes. Infants under 6 months move groups at the half-year mark.
+    """
+    half_year = birth_date + timedelta(days=183)
+    if today < half_year:
+        return half_year
+    for year in (today.year, today.year + 1):
+        try:
+            birthday = birth_date.replace(year=year)
+        except ValueError:  # Feb 29 in a non-leap year
+            birthday = date(year, 3, 1)
+        if birthday > today:
+            return birthday
+    return today + timedelta(days=1)
+
+def match_demographic_group(db: Session, age: float, gender: models.GenderEnum, activity: models.ActivityLevelEnum) -> models.DemographicGroup | None:
+    """
+    Finds the correct NIN DemographicGroup based on user's stats.
+    """
+    query = db.query(models.DemographicGroup).filter(
+        models.DemographicGroup.age_min_years <= age,
+        models.DemographicGroup.age_max_years >= age,
+        models.DemographicGroup.activity_level == activity
+    )
+
+    # Handle non-gender-specific groups (infants, children)
+    # or gender-specific groups (adults, adolescents)
+    if gender != models.GenderEnum.other:
+        # User has a specific gender, so we can match on 'male'/'female' OR 'None' (for children)
+        query = query.filter(
+            (models.DemographicGroup.gender == gender) |
+            (models.DemographicGroup.gender == None)
+        )
+
+    return query.first()
+
+# --- REFERENCE DATA VERSION ---
+
+def get_reference_version(db: Session, name: str = RDA_REFERENCE) -> int:
+    """Returns the current version of a reference dataset (0 if never seeded)."""
+    version = db.query(models.ReferenceDataVersion.version).filter(
+        models.ReferenceDataVersion.name == name
+    ).scalar()
+    return version or 0
+
+def bump_reference_version(db: Session, name: str = RDA_REFERENCE) -> int:
+    """
+    Marks a reference dataset as changed. Every persisted target vector
+    computed against an older version is recomputed on its next read.
+    The caller is responsible for committing.
+    """
+    row = db.get(models.ReferenceDataVersion, name)
+    if row is None:
+        row = models.ReferenceDataVersion(name=name, version=1)
+        db.add(row)
+    else:
+        row.version += 1
+    db.flush()
+    return row.version
+
+# --- THE TARGET VECTOR ---
+
+def _validate_profile(profile: models.UserProfile | None) -> models.UserProfile:
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User profile not found. Please create your profile."
+        )
+
+    if not all([profile.birth_date, profile.gender, profile.activity_level, profile.weight_kg]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Profile is incomplete. Please set birth_date, gender, activity_level, and weight_kg."
+        )
+    return profile
+
+def compute_user_targets(db: Session, profile: models.UserProfile) -> models.UserTarget:
+    """
+    Computes the user's full target vector from their profile and the
+    RDA of their demographic group, and upserts it. The group is matched
+    again for the current age, so a user who has moved into another age
+    bracket gets that bracket's RDA (and their profile is updated).
+    The caller is responsible for committing.
+    """
+    profile = _validate_profile(profile)
+
+    today = date.today()
+    age = calculate_age(profile.birth_date, today)
+
+    group = match_demographic_group(db, age, profile.gender, profile.activity_level)
+    if group is None:
+        raise HTTPException(status_code=404, detail="Could not match your profile to a demographic group.")
+    profile.demographic_group_id = group.id
+
+    # 1. Fetch all standard RDA values for the group (with units) in one query
+    rda_rows = db.query(models.RDA.recommended_value, models.Nutrient).join(
+        models.Nutrient, models.RDA.nutrient_id == models.Nutrient.id
+    ).filter(
+        models.RDA.demographic_group_id == profile.demographic_group_id
+    ).all()
+    goals = {nutrient.name: value for value, nutrient in rda_rows}
+
+    # 2. Apply BMI-based energy modifiers
+    bmi = calculate_bmi(profile.weight_kg, profile.height_cm)
+    if bmi is not None:
+        base_energy_goal = goals.get("Energy", 2000)  # Default to 2000 if not found
+        if bmi > 25:  # Overweight: 500 kcal deficit for weight loss
+            goals["Energy"] = base_energy_goal - 500
+        elif bmi < 18.5:  # Underweight: 300 kcal surplus for weight gain
+            goals["Energy"] = base_energy_goal + 300
+
+    nutrient_goals = [
+        {"nutrient_id": nutrient.id, "name": nutrient.name, "unit": nutrient.unit, "goal": goals[nutrient.name]}
+        for _, nutrient in rda_rows
+    ]
+
+    # 3. Energy expenditure (needs height for BMR)
+    bmr = tdee = None
+    if profile.height_cm:
+        bmr = calculate_bmr(profile.weight_kg, profile.height_cm, int(age), profile.gender.value)
+        tdee = calculate_tdee(bmr, profile.activity_level.value)
+
+    # 4. Upsert the single row
+    target = db.query(models.UserTarget).filter(models.UserTarget.user_id == profile.user_id).first()
+    if target is None:
+        target = models.UserTarget(user_id=profile.user_id)
+        db.add(target)
+
+    target.demographic_group_id = profile.demographic_group_id
+    target.age_years = age
+    target.valid_until = _valid_until(profile.birth_date, today)
+    target.bmi = bmi
+    target.bmi_category = get_bmi_category(bmi) if bmi is not None else None
+    target.bmr = bmr
+    target.tdee = tdee
+    target.energy_kcal = goals.get("Energy", 0.0)
+    target.protein_g = goals.get("Protein", 0.0)
+    target.fat_g = goals.get("Visible Fat", 0.0)  # The RDA goal is for "Visible Fat"
+    target.carbs_g = goals.get("Carbohydrate", 0.0)
+    target.nutrient_goals = nutrient_goals
+    target.reference_version = get_reference_version(db)
+    db.flush()
+    return target
+
+def get_user_targets(db: Session, user_id: int) -> models.UserTarget:
+    """
+    Reads the user's persisted target vector.
+
+    The row and the current RDA version come back in one query. The vector
+    is only recomputed (and persisted) when it is missing, when the RDA
+    data has changed since it was computed, or when the user's age has
+    moved on.
+    """
+    row = db.query(models.UserTarget, models.ReferenceDataVersion.version).outerjoin(
+        models.ReferenceDataVersion,
+        models.ReferenceDataVersion.name == RDA_REFERENCE
+    ).filter(models.UserTarget.user_id == user_id).first()
+
+    if row is not None:
+        target, current_version = row
+        if target.reference_version == (current_version or 0) and date.today() < target.valid_until:
+            return target
+
+    profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == user_id).first()
+    target = compute_user_targets(db, profile)
+    db.commit()
+    return target
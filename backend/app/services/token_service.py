@@ -0,0 +1,107 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..metrics import metrics
+from ..security import (
+    REFRESH_TOKEN_EXPIRE_DAYS, create_access_token, create_refresh_token,
+    hash_refresh_token, user_claims
+)
+from .principal_cache import principal_cache
+from .revocation_service import revocation_list
+
+def _aware(moment: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored as UTC
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def _add_refresh_token(db: Session, user_id: int, family_id: str) -> str:
+    token = create_refresh_token()
+    db.add(models.RefreshToken(
+        user_id=user_id,
+        family_id=family_id,
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+def issue_refresh_token(db: Session, user_id: int) -> str:
+    """Starts a new refresh token family, at login."""
+    token = _add_refresh_token(db, user_id, secrets.token_hex(16))
+    db.commit()
+    return token
+
+def refresh_access_token(db: Session, refresh_token: str) -> schemas.Token:
+    """
+    Exchanges a refresh token for a new access token and a new refresh
+    token (rotation). It costs one HMAC and one indexed lookup, where
+    a password login costs a bcrypt check.
+
+    A refresh token can be used once. If an already-rotated token comes
+    back, either the client or an attacker holds a copy, so every token
+    of that family is revoked and the user has to log in again.
+    """
+    invalid_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    stored = db.query(models.RefreshToken).filter(
+        models.RefreshToken.token_hash == hash_refresh_token(refresh_token)
+    ).with_for_update().first()
+    if stored is None or stored.revoked_at is not None:
+        raise invalid_exception
+
+    now = datetime.now(timezone.utc)
+    if stored.used_at is not None:
+        revoke_refresh_family(db, stored.family_id)
+        metrics.incr("refresh_tokens.reuse_detected")
+        raise invalid_exception
+    if _aware(stored.expires_at) <= now:
+        raise invalid_exception
+
+    principal = principal_cache.load(db, stored.user_id)
+    if principal is None or not principal.is_active:
+        raise invalid_exception
+
+    stored.used_at = now
+    new_refresh_token = _add_refresh_token(db, stored.user_id, stored.family_id)
+    db.commit()
+    metrics.incr("refresh_tokens.rotated")
+    return schemas.Token(
+        access_token=create_access_token(data=user_claims(principal)),
+        token_type="bearer",
+        refresh_token=new_refresh_token
+    )
+
+def revoke_refresh_family(db: Session, family_id: str) -> None:
+    """Revokes every live token of a family and commits."""
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.family_id == family_id,
+        models.RefreshToken.revoked_at.is_(None)
+    ).update({"revoked_at": datetime.now(timezone.utc)}, synchronize_session=False)
+    db.commit()
+
+def logout(db: Session, user_id: int, claims: dict, refresh_token: str | None = None) -> None:
+    """
+    Revokes the user's access token described by `claims` (by its jti)
+    and, when given, the refresh token family it was issued with.
+    """
+    if claims.get("jti"):
+        revocation_list.revoke(db, claims["jti"], user_id, datetime.fromtimestamp(claims["exp"], timezone.utc))
+    if refresh_token:
+        stored = db.query(models.RefreshToken).filter(
+            models.RefreshToken.token_hash == hash_refresh_token(refresh_token),
+            models.RefreshToken.user_id == user_id
+        ).first()
+        if stored is not None:
+            revoke_refresh_family(db, stored.family_id)
+
+def prune_refresh_tokens(db: Session) -> int:
+    """Deletes expired refresh tokens; returns how many."""
+    deleted = db.query(models.RefreshToken).filter(
+        models.RefreshToken.expires_at < datetime.now(timezone.utc)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -5,7 +5,8 @@ from sqlalchemy.orm import sessionmaker
 # Import Base and ALL models to ensure they're registered
 from app.models import (
     Base, User, Food, FoodCategory, UserProfile, FoodLog, 
-    Nutrient, FoodNutrient, DemographicGroup, RDA
+    Nutrient, FoodNutrient, DemographicGroup, RDA,
+    GenderEnum, ActivityLevelEnum
 )
 
 # Test database URL - SQLite for testing
@@ -29,11 +30,46 @@ def create_test_database():
         
         # Add sample foods
         foods = [
-            Food(id=1, name="Rice", category_id=1),
-            Food(id=2, name="Wheat", category_id=1),
+            Food(id=1, name="Rice", category_id=1, energy_kcal=356),
+            Food(id=2, name="Wheat", category_id=1, energy_kcal=321),
         ]
         db.add_all(foods)
         db.commit()
+        
+        # Add a minimal slice of the reference data (see seed.py)
+        nutrients = [
+            Nutrient(id=1, name="Energy", unit="kcal"),
+            Nutrient(id=2, name="Protein", unit="g"),
+            Nutrient(id=3, name="Fat", unit="g"),
+            Nutrient(id=4, name="Visible Fat", unit="g"),
+            Nutrient(id=5, name="Carbohydrate", unit="g"),
+            Nutrient(id=6, name="Iron", unit="mg"),
+        ]
+        db.add_all(nutrients)
+        db.add(DemographicGroup(
+            id=1, name="Man - Moderate", gender=GenderEnum.male,
+            activity_level=ActivityLevelEnum.moderate, age_min_years=19, age_max_years=100
+        ))
+        db.add_all([
+            RDA(demographic_group_id=1, nutrient_id=1, recommended_value=2730),
+            RDA(demographic_group_id=1, nutrient_id=2, recommended_value=60),
+            RDA(demographic_group_id=1, nutrient_id=4, recommended_value=30),
+            RDA(demographic_group_id=1, nutrient_id=6, recommended_value=17),
+        ])
+        # Per 100g: Rice and Wheat
+        db.add_all([
+            FoodNutrient(food_id=1, nutrient_id=1, value_per_100g=356),
+            FoodNutrient(food_id=1, nutrient_id=2, value_per_100g=7.9),
+            FoodNutrient(food_id=1, nutrient_id=3, value_per_100g=0.5),
+            FoodNutrient(food_id=1, nutrient_id=5, value_per_100g=78.2),
+            FoodNutrient(food_id=1, nutrient_id=6, value_per_100g=0.7),
+            FoodNutrient(food_id=2, nutrient_id=1, value_per_100g=321),
+            FoodNutrient(food_id=2, nutrient_id=2, value_per_100g=10.6),
+            FoodNutrient(food_id=2, nutrient_id=3, value_per_100g=1.5),
+            FoodNutrient(food_id=2, nutrient_id=5, value_per_100g=64.7),
+            FoodNutrient(food_id=2, nutrient_id=6, value_per_100g=3.9),
+        ])
+        db.commit()
     except Exception as e:
         print(f"Error creating test data: {e}")
         db.rollback()
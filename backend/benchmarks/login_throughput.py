@@ -0,0 +1,53 @@
+"""
+Login throughput benchmark.
+
+Runs the password check of a login (bcrypt at BCRYPT_ROUNDS) through the
+password hasher with many logins in flight, like a login storm, and
+reports logins per second overall and per core.
+
+    python benchmarks/login_throughput.py --logins 200
+    BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=4 python benchmarks/login_throughput.py
+
+Use it to pick BCRYPT_ROUNDS: each extra round halves logins per second.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.password_hasher import PasswordHasher, PASSWORD_HASH_WORKERS
+from app.security import BCRYPT_ROUNDS, hash_password
+
+
+async def run(logins: int, workers: int) -> float:
+    hasher = PasswordHasher(workers=workers, max_pending=logins)
+    hashed = hash_password("benchmark-password")
+    started = time.perf_counter()
+    results = await asyncio.gather(*(hasher.verify("benchmark-password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    hasher.shutdown()
+    assert all(results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    elapsed = asyncio.run(run(args.logins, args.workers))
+    cores = min(args.workers, os.cpu_count() or 1)
+    per_second = args.logins / elapsed
+    print(f"bcrypt rounds:        {BCRYPT_ROUNDS}")
+    print(f"hasher workers:       {args.workers} ({cores} usable cores)")
+    print(f"logins:               {args.logins} in {elapsed:.2f}s")
+    print(f"logins/second:        {per_second:.1f}")
+    print(f"logins/second/core:   {per_second / cores:.1f}")
+
+
+if __name__ == "__main__":
+    main()
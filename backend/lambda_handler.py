@@ -2,3 +2,16 @@ from mangum import Mangum
 from app.main import app
 
 handler = Mangum(app)
+
+
+def drain_email_outbox(event, context):
+    """Scheduled (see template.yaml): sends the queued emails, as the outbox worker is off on Lambda."""
+    from app.database import SessionLocal
+    from app.services.email_outbox import drain_all
+
+    db = SessionLocal()
+    try:
+        sent, failed = drain_all(db)
+    finally:
+        db.close()
+    return {"sent": sent, "failed": failed}
@@ -0,0 +1,186 @@
+"""
+Maintenance commands.
+
+    python manage.py rebuild-rollups [--user-id N]
+    python manage.py rebuild-food-stats [--user-id N]
+    python manage.py partition-food-logs [--months-ahead N]     (Postgres only)
+    python manage.py ensure-partitions [--months-ahead N]       (Postgres only, monthly cron)
+    python manage.py archive-food-logs [--before YYYY-MM-DD]
+    python manage.py rehydrate-food-logs --user-id N --month YYYY-MM
+    python manage.py prune-refresh-tokens                       (daily cron)
+    python manage.py prune-revoked-tokens                       (daily cron)
+    python manage.py drain-email-outbox                         (cron, when EMAIL_OUTBOX_WORKER=0)
+    python manage.py prune-rate-limits                          (hourly cron, RATE_LIMIT_URL=sql://)
+    python manage.py grant-admin --email EMAIL [--revoke]
+"""
+import argparse
+from datetime import date
+from app.database import SessionLocal
+from app import models
+from app.services.analytics_service import rebuild_rollups
+from app.services.foodStats_service import rebuild_food_stats
+from app.services import archive_service
+from app.services.token_service import prune_refresh_tokens
+from app.services.revocation_service import prune_revoked_tokens
+from app.services.email_outbox import drain_all
+from app.rate_limit import SQLBackend
+
+
+def cmd_rebuild_rollups(args):
+    db = SessionLocal()
+    try:
+        if db.query(models.FoodLogArchive).first():
+            print("⚠️  Archived months are not in food_logs; rehydrate them first to include them.")
+        days = rebuild_rollups(db, user_id=args.user_id)
+        print(f"✅ Rebuilt analytics rollups from {days} logged days.")
+    finally:
+        db.close()
+
+
+def cmd_rebuild_food_stats(args):
+    db = SessionLocal()
+    try:
+        rows = rebuild_food_stats(db, user_id=args.user_id)
+        print(f"✅ Rebuilt {rows} quick-add food stats.")
+    finally:
+        db.close()
+
+
+def cmd_partition_food_logs(args):
+    db = SessionLocal()
+    try:
+        moved = archive_service.partition_food_logs(db, months_ahead=args.months_ahead)
+        print(f"✅ food_logs is partitioned by month ({moved} rows moved).")
+    finally:
+        db.close()
+
+
+def cmd_ensure_partitions(args):
+    db = SessionLocal()
+    try:
+        created = archive_service.ensure_partitions(db, months_ahead=args.months_ahead)
+        db.commit()
+        print(f"✅ Created {len(created)} partitions: {', '.join(created) or '-'}")
+    finally:
+        db.close()
+
+
+def cmd_archive_food_logs(args):
+    db = SessionLocal()
+    try:
+        before = date.fromisoformat(args.before) if args.before else None
+        months, rows = archive_service.archive_food_logs(db, before=before)
+        print(f"✅ Archived {rows} food logs from {months} months.")
+    finally:
+        db.close()
+
+
+def cmd_rehydrate_food_logs(args):
+    db = SessionLocal()
+    try:
+        month = date.fromisoformat(f"{args.month}-01")
+        rows = archive_service.rehydrate(db, args.user_id, month)
+        db.commit()
+        print(f"✅ Restored {rows} food logs into food_logs.")
+    finally:
+        db.close()
+
+
+def cmd_prune_refresh_tokens(args):
+    db = SessionLocal()
+    try:
+        deleted = prune_refresh_tokens(db)
+        print(f"✅ Deleted {deleted} expired refresh tokens.")
+    finally:
+        db.close()
+
+
+def cmd_prune_revoked_tokens(args):
+    db = SessionLocal()
+    try:
+        deleted = prune_revoked_tokens(db)
+        print(f"✅ Deleted {deleted} revocations of expired tokens.")
+    finally:
+        db.close()
+
+
+def cmd_drain_email_outbox(args):
+    db = SessionLocal()
+    try:
+        sent, failed = drain_all(db)
+        print(f"✅ Sent {sent} emails ({failed} failed, to be retried).")
+    finally:
+        db.close()
+
+
+def cmd_prune_rate_limits(args):
+    deleted = SQLBackend().prune()
+    print(f"✅ Deleted {deleted} stale rate limit counters.")
+
+
+def cmd_grant_admin(args):
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == args.email).first()
+        if user is None:
+            print(f"❌ No user with email {args.email}.")
+            return
+        user.is_admin = not args.revoke
+        db.commit()
+        print(f"✅ {args.email} is {'no longer' if args.revoke else 'now'} an admin.")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NutriTracker maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="Recompute analytics rollups from food_logs")
+    rebuild.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    rebuild.set_defaults(func=cmd_rebuild_rollups)
+
+    food_stats = commands.add_parser("rebuild-food-stats", help="Recompute quick-add food stats from food_logs")
+    food_stats.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    food_stats.set_defaults(func=cmd_rebuild_food_stats)
+
+    partition = commands.add_parser("partition-food-logs", help="Migrate food_logs to monthly range partitions (Postgres)")
+    partition.add_argument("--months-ahead", type=int, default=3)
+    partition.set_defaults(func=cmd_partition_food_logs)
+
+    ensure = commands.add_parser("ensure-partitions", help="Create upcoming monthly food_logs partitions (Postgres)")
+    ensure.add_argument("--months-ahead", type=int, default=3)
+    ensure.set_defaults(func=cmd_ensure_partitions)
+
+    archive = commands.add_parser("archive-food-logs", help="Move old months of food_logs into compressed archives")
+    archive.add_argument("--before", default=None, help="Archive months before this date (default: FOOD_LOG_HOT_MONTHS ago)")
+    archive.set_defaults(func=cmd_archive_food_logs)
+
+    rehydrate = commands.add_parser("rehydrate-food-logs", help="Restore one archived user-month into food_logs")
+    rehydrate.add_argument("--user-id", type=int, required=True)
+    rehydrate.add_argument("--month", required=True, help="YYYY-MM")
+    rehydrate.set_defaults(func=cmd_rehydrate_food_logs)
+
+    prune = commands.add_parser("prune-refresh-tokens", help="Delete expired refresh tokens")
+    prune.set_defaults(func=cmd_prune_refresh_tokens)
+
+    prune_revoked = commands.add_parser("prune-revoked-tokens", help="Delete revocations of expired access tokens")
+    prune_revoked.set_defaults(func=cmd_prune_revoked_tokens)
+
+    drain_outbox = commands.add_parser("drain-email-outbox", help="Send every due email in the outbox")
+    drain_outbox.set_defaults(func=cmd_drain_email_outbox)
+
+    prune_rate_limits = commands.add_parser("prune-rate-limits", help="Delete rate limit counters of past windows")
+    prune_rate_limits.set_defaults(func=cmd_prune_rate_limits)
+
+    grant_admin = commands.add_parser("grant-admin", help="Let a user call the /admin endpoints")
+    grant_admin.add_argument("--email", required=True)
+    grant_admin.add_argument("--revoke", action="store_true", help="Take the admin flag away instead")
+    grant_admin.set_defaults(func=cmd_grant_admin)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,9 @@ from app.models import (
     DemographicGroup, RDA, Base, 
     GenderEnum, ActivityLevelEnum
 )
+from app.services.target_service import bump_reference_version
+from app.services.dashboard_cache import dashboard_cache
+from app.services.food_service import sync_food_energy
 # from data.pdf_extractor import NINDataExtractor, NIN_PDF_PATH  <- REMOVED
 
 # --- DEFINE ALL DATA SOURCE PATHS ---
@@ -163,6 +166,7 @@ RDA_DATA_MAP = {
 }
 def seed_rda(db: Session, group_map: dict, nutrient_map: dict):
     print("Seeding RDA data...")
+    changed = 0
     for group_name, nutrients in RDA_DATA_MAP.items():
         demographic_group = group_map.get(group_name)
         if not demographic_group: continue
@@ -185,8 +189,18 @@ def seed_rda(db: Session, group_map: dict, nutrient_map: dict):
                     recommended_value=value
                 )
                 db.add(db_rda)
+                changed += 1
+            elif db_rda.recommended_value != value:
+                db_rda.recommended_value = value
+                changed += 1
     
+    # Any change to the RDA tables makes every persisted user target stale
+    if changed:
+        version = bump_reference_version(db)
+        print(f"  {changed} RDA values changed, reference version is now {version}")
     db.commit()
+    if changed:
+        dashboard_cache.publish_reference_version(version)
     print("✅ RDA data seeded.")
 
 
@@ -531,6 +545,10 @@ def seed_database():
         print("\n--- 6. Seeding Level 3: Branded Foods (XLSX) ---")
         seed_foods_from_xlsx(db, category_map, nutrient_map)
         
+        print("\n--- 7. Syncing denormalized food calories ---")
+        sync_food_energy(db)
+        db.commit()
+        
         # print("\n--- 7. Seeding Level 2: Cooked Recipes (PDF) ---") <-- REMOVED
         # seed_cooked_foods(db, category_map, nutrient_map) <-- REMOVED
         
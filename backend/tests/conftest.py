@@ -1,5 +1,7 @@
 import pytest
 import os
+# Rate limits are exercised on their own in test_rate_limiting.py
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,7 +12,7 @@ from app.test_database import get_test_db, create_test_database
 
 # Create test app without rate limiting
 def create_test_app():
-    from app.routers import general, foods, users, auth, foodLog, dashboard, profile, recipe, recommendations
+    from app.routers import general, foods, users, auth, foodLog, dashboard, profile, recipe, recommendations, analytics, day, sync, mealTemplate, export, admin
     
     app = FastAPI(title="Test Nutrition Tracker API")
     
@@ -33,6 +35,12 @@ def create_test_app():
     app.include_router(profile.router)
     app.include_router(recipe.router)
     app.include_router(recommendations.router)
+    app.include_router(analytics.router)
+    app.include_router(day.router)
+    app.include_router(sync.router)
+    app.include_router(mealTemplate.router)
+    app.include_router(export.router)
+    app.include_router(admin.router)
     
     return app
 
@@ -64,3 +72,54 @@ def test_profile_data():
         "dietary_preference": "vegetarian",
         "budget_range": "medium"
     }
+
+@pytest.fixture(scope="function")
+def auth_headers(client):
+    """
+    Creates a fresh, active user directly in the test database
+    and returns the Authorization headers for them.
+    """
+    import uuid
+    from app.test_database import TestingSessionLocal
+    from app.models import User
+    from app.security import hash_password, create_access_token, user_claims
+
+    email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+    db = TestingSessionLocal()
+    user = User(
+        email=email,
+        hashed_password=hash_password("testpassword123"),
+        first_name="Test",
+        last_name="User",
+        is_active=True
+    )
+    db.add(user)
+    db.commit()
+    token = create_access_token(data=user_claims(user))
+    db.close()
+
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(scope="function")
+def admin(client):
+    """An active admin: (email, auth headers)"""
+    import uuid
+    from app.test_database import TestingSessionLocal
+    from app.models import User
+    from app.security import hash_password, create_access_token, user_claims
+
+    db = TestingSessionLocal()
+    admin = User(
+        email=f"admin-{uuid.uuid4().hex[:12]}@example.com",
+        hashed_password=hash_password("adminpassword123", rounds=4),
+        first_name="Ada",
+        last_name="Admin",
+        is_active=True,
+        is_admin=True
+    )
+    db.add(admin)
+    db.commit()
+    token = create_access_token(data=user_claims(admin))
+    email = admin.email
+    db.close()
+    return email, {"Authorization": f"Bearer {token}"}
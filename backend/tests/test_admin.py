@@ -0,0 +1,88 @@
+import json
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from app import models
+from app.security import verify_password
+from app.test_database import TestingSessionLocal
+
+@pytest.fixture
+def fast_hashing(monkeypatch):
+    import app.security
+    from app.services import onboarding_service
+
+    monkeypatch.setattr(app.security, "BCRYPT_ROUNDS", 4)
+    yield
+    onboarding_service.shutdown_hash_pool()
+
+def _cohort_email(tag: str) -> str:
+    return f"cohort-{tag}-{uuid.uuid4().hex[:8]}@example.com"
+
+def test_bulk_users_requires_admin(client: TestClient, auth_headers):
+    """Regular users cannot onboard cohorts"""
+    response = client.post("/admin/users/bulk", json=[], headers=auth_headers)
+    assert response.status_code == 403
+
+def test_bulk_users_json_report(client: TestClient, admin, fast_hashing):
+    """Every row gets a result; valid new users are created inactive with an OTP email queued"""
+    admin_email, admin_headers = admin
+    first, second = _cohort_email("a"), _cohort_email("b")
+    rows = [
+        {"email": first, "password": "welcome-1", "first_name": "Asha", "last_name": "Rao"},
+        {"email": "not-an-email", "password": "welcome-2", "first_name": "Bad", "last_name": "Row"},
+        {"email": first, "password": "welcome-3", "first_name": "Asha", "last_name": "Again"},
+        {"email": admin_email, "password": "welcome-4", "first_name": "Ada", "last_name": "Admin"},
+        {"email": second, "password": "welcome-5", "first_name": "Bela", "last_name": "Das"},
+    ]
+    response = client.post("/admin/users/bulk", json=rows, headers=admin_headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["total"], report["created"], report["skipped"], report["failed"]) == (5, 2, 2, 1)
+    assert [result["status"] for result in report["results"]] == ["created", "invalid", "duplicate", "exists", "created"]
+    assert report["results"][1]["error"].startswith("email")
+
+    db = TestingSessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == first).one()
+        assert user.id == report["results"][0]["user_id"]
+        assert not user.is_active and not user.is_admin and user.verification_otp
+        assert verify_password("welcome-1", user.hashed_password)
+        queued = db.query(models.EmailOutbox).filter(models.EmailOutbox.to_email.in_([first, second])).all()
+        assert sorted(row.to_email for row in queued) == sorted([first, second])
+    finally:
+        db.close()
+
+def test_bulk_users_csv_streams_progress(client: TestClient, admin, fast_hashing, monkeypatch):
+    """A CSV upload can be streamed as NDJSON, batch by batch, ending with a summary"""
+    from app.services import onboarding_service
+
+    _, admin_headers = admin
+    monkeypatch.setattr(onboarding_service, "BULK_ONBOARDING_BATCH_ROWS", 2)
+    emails = [_cohort_email(str(i)) for i in range(5)]
+    body = "email,password,first_name,last_name\n" + "".join(f"{email},pw-{i},User,{i}\n" for i, email in enumerate(emails))
+    response = client.post(
+        "/admin/users/bulk?stream=true", content=body.encode(),
+        headers={**admin_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["row"] for line in lines[:-1]] == [1, 2, 3, 4, 5]
+    assert all(line["status"] == "created" for line in lines[:-1])
+    assert lines[-1] == {"summary": {"total": 5, "created": 5, "skipped": 0, "failed": 0}}
+
+def test_bulk_users_rejects_unknown_formats(client: TestClient, admin):
+    _, admin_headers = admin
+    response = client.post("/admin/users/bulk", content=b"<users/>", headers={**admin_headers, "Content-Type": "application/xml"})
+    assert response.status_code == 415
+    response = client.post("/admin/users/bulk", content=b'{"email": "x"}', headers={**admin_headers, "Content-Type": "application/json"})
+    assert response.status_code == 400
+
+def test_hash_pool_outlives_shutdown_hook(fast_hashing):
+    """The lifespan shutdown hook (run per Lambda invocation) keeps the hash pool"""
+    from app.main import stop_background_workers
+    from app.services import onboarding_service
+
+    pool = onboarding_service._pool()
+    stop_background_workers()
+    assert onboarding_service._pool() is pool
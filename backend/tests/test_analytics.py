@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+
+def _log(client, headers, log_date, food_id=1, grams=100, meal_type="Lunch"):
+    response = client.post("/food-logs/", json={
+        "food_id": food_id, "quantity_grams": grams, "log_date": log_date, "meal_type": meal_type
+    }, headers=headers)
+    assert response.status_code == 201
+
+def test_trends_unauthorized(client: TestClient):
+    response = client.get("/analytics/trends")
+    assert response.status_code == 401
+
+def test_weekly_trends_from_rollups(client: TestClient, auth_headers, test_profile_data):
+    """Test weekly averages, adequacy and streaks are served from the rollups"""
+    client.post("/profile/me", json=test_profile_data, headers=auth_headers)
+
+    # ISO week of Mon 2025-03-03: two logged days, three entries
+    _log(client, auth_headers, "2025-03-03", grams=200)               # 712 kcal
+    _log(client, auth_headers, "2025-03-04", grams=100)               # 356 kcal
+    _log(client, auth_headers, "2025-03-04", food_id=2, grams=100)    # 321 kcal
+    # The following week: one day
+    _log(client, auth_headers, "2025-03-10", grams=100)
+
+    response = client.get(
+        "/analytics/trends?period=week&count=3&end_date=2025-03-11", headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    first, second, third = data["periods"]
+    assert first["days_logged"] == 0 and first["adequacy"] == []
+    assert second["period_start"] == "2025-03-03"
+    assert second["days_logged"] == 2
+    assert second["entries"] == 3
+    assert second["avg_calories"] == pytest.approx((712 + 356 + 321) / 2, abs=0.01)
+    assert third["days_logged"] == 1
+    assert third["rolling_avg_calories"] == pytest.approx((694.5 + 356) / 2, abs=0.01)
+
+    iron = next(a for a in second["adequacy"] if a["nutrient_name"] == "Iron")
+    assert iron["daily_average"] == pytest.approx((1.4 + 0.7 + 3.9) / 2, abs=0.01)
+    assert iron["adequacy_pct"] == pytest.approx(iron["daily_average"] / 17 * 100, abs=0.1)
+    assert sum(second["macro_split"].values()) == pytest.approx(100, abs=0.2)
+
+    # 2025-03-10 is logged and 2025-03-11 is not yet: the streak is still alive
+    assert data["current_streak"] == 1
+    assert data["longest_streak"] == 2
+    assert data["last_logged_date"] == "2025-03-10"
+
+def test_rebuild_matches_incremental_rollups(client: TestClient, auth_headers):
+    """Test the backfill produces the same rollups as incremental maintenance"""
+    from app.test_database import TestingSessionLocal
+    from app.models import LogRollup, NutrientRollup
+    from app.services import rebuild_rollups
+
+    _log(client, auth_headers, "2025-04-01", grams=150)
+    _log(client, auth_headers, "2025-04-02", food_id=2, grams=80)
+
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    db = TestingSessionLocal()
+
+    def snapshot():
+        logs = sorted(
+            (r.period, r.period_start, r.entries, r.days_logged, round(r.energy_kcal, 6))
+            for r in db.query(LogRollup).filter_by(user_id=user_id)
+        )
+        nutrients = sorted(
+            (r.period, r.period_start, r.nutrient_id, round(r.amount, 6))
+            for r in db.query(NutrientRollup).filter_by(user_id=user_id)
+        )
+        return logs, nutrients
+
+    incremental = snapshot()
+    rebuild_rollups(db, user_id=user_id)
+    assert snapshot() == incremental
+    db.close()
@@ -0,0 +1,120 @@
+import os
+import uuid
+import pytest
+from datetime import date
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.test_database import TestingSessionLocal
+from app import models
+from app.services import archive_service
+
+def _user_id(client: TestClient, headers) -> int:
+    return client.get("/users/me", headers=headers).json()["id"]
+
+def test_month_helpers():
+    """Test month arithmetic used to pick archive windows"""
+    assert archive_service.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert archive_service.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert archive_service.hot_cutoff(date(2025, 6, 15), months=12) == date(2024, 6, 1)
+
+def test_archive_and_rehydrate_on_read(client: TestClient, auth_headers):
+    """Test old months move to the archive and come back when read"""
+    client.post("/food-logs/bulk", json={"entries": [
+        {"food_id": 1, "quantity_grams": 100, "log_date": "2021-05-03", "meal_type": "Lunch"},
+        {"food_id": 2, "quantity_grams": 50, "log_date": "2021-05-20", "meal_type": "Dinner"},
+        {"food_id": 1, "quantity_grams": 80, "log_date": "2021-06-01", "meal_type": "Lunch"},
+    ]}, headers=auth_headers)
+    before = client.get("/food-logs/?log_date=2021-05-03", headers=auth_headers).json()
+    user_id = _user_id(client, auth_headers)
+
+    db = TestingSessionLocal()
+    try:
+        archive_service.archive_food_logs(db, before=date(2021, 6, 1))
+        assert db.query(models.FoodLog).filter(
+            models.FoodLog.user_id == user_id, models.FoodLog.log_date < date(2021, 6, 1)
+        ).count() == 0
+        archive = db.get(models.FoodLogArchive, (user_id, date(2021, 5, 1)))
+        assert archive.entries == 2
+        # June is outside the window and stays live
+        assert db.query(models.FoodLog).filter(
+            models.FoodLog.user_id == user_id, models.FoodLog.log_date == date(2021, 6, 1)
+        ).count() == 1
+    finally:
+        db.close()
+
+    # Reading an archived day rehydrates the month, ids included
+    assert client.get("/food-logs/?log_date=2021-05-03", headers=auth_headers).json() == before
+    assert len(client.get("/food-logs/?log_date=2021-05-20", headers=auth_headers).json()) == 1
+
+    db = TestingSessionLocal()
+    try:
+        assert db.get(models.FoodLogArchive, (user_id, date(2021, 5, 1))) is None
+    finally:
+        db.close()
+
+def test_partitioning_requires_postgres():
+    """Test the partition migration refuses to run on SQLite"""
+    db = TestingSessionLocal()
+    try:
+        with pytest.raises(RuntimeError):
+            archive_service.partition_food_logs(db)
+    finally:
+        db.close()
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_partitioned_archive_and_backdated_logs_postgres():
+    """Test archived partitions are dropped, and back-dated rows survive the partition coming back"""
+    pg_engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    models.Base.metadata.create_all(bind=pg_engine)
+    db = Session(pg_engine)
+    march, april = date(2001, 3, 1), date(2001, 4, 1)
+    name = archive_service._partition_name(march)
+    try:
+        archive_service.partition_food_logs(db)
+        user = models.User(
+            email=f"archive-{uuid.uuid4().hex[:12]}@example.com", hashed_password="x",
+            first_name="Test", last_name="User", is_active=True
+        )
+        food = models.Food(name=f"archive-food-{uuid.uuid4().hex[:12]}")
+        db.add_all([user, food])
+        db.flush()
+        archive_service.ensure_partitions(db, start=march, end=march)
+
+        def log(day):
+            db.add(models.FoodLog(user_id=user.id, food_id=food.id, quantity_grams=100, log_date=day, meal_type="Lunch"))
+            db.commit()
+
+        def live():
+            return db.query(models.FoodLog).filter(
+                models.FoodLog.user_id == user.id, models.FoodLog.log_date >= march, models.FoodLog.log_date < april
+            ).count()
+
+        log(date(2001, 3, 3))
+        log(date(2001, 3, 20))
+        archive_service.archive_food_logs(db, before=april)
+        assert not archive_service._table_exists(db, name)
+        assert db.get(models.FoodLogArchive, (user.id, march)).entries == 2
+
+        # Logged after the drop: lands in the default partition
+        log(date(2001, 3, 15))
+        assert archive_service.rehydrate(db, user.id, march) == 2
+        db.commit()
+        assert archive_service._is_attached(db, name)
+        assert live() == 3
+
+        # A partition left detached by an interrupted run is still archived
+        db.execute(text(f"ALTER TABLE food_logs DETACH PARTITION {name}"))
+        db.commit()
+        archive_service.archive_food_logs(db, before=april)
+        assert not archive_service._table_exists(db, name)
+        assert live() == 0
+        assert db.get(models.FoodLogArchive, (user.id, march)).entries == 3
+
+        db.query(models.FoodLogArchive).filter_by(user_id=user.id).delete()
+        db.delete(user)
+        db.delete(food)
+        db.commit()
+    finally:
+        db.close()
+        pg_engine.dispose()
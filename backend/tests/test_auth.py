@@ -55,3 +55,186 @@ def test_register_weak_password(client: TestClient):
         "last_name": "User"
     })
     assert response.status_code == 422
+
+def _active_user(password: str, rounds: int) -> str:
+    """Creates an active user whose password is hashed at `rounds`; returns the email"""
+    import uuid
+    from app.test_database import TestingSessionLocal
+    from app.models import User
+    from app.security import hash_password
+
+    email = f"login-{uuid.uuid4().hex[:12]}@example.com"
+    db = TestingSessionLocal()
+    db.add(User(
+        email=email, hashed_password=hash_password(password, rounds=rounds),
+        first_name="Test", last_name="User", is_active=True
+    ))
+    db.commit()
+    db.close()
+    return email
+
+def _stored_hash(email: str) -> str:
+    from app.test_database import TestingSessionLocal
+    from app.models import User
+
+    db = TestingSessionLocal()
+    try:
+        return db.query(User.hashed_password).filter(User.email == email).scalar()
+    finally:
+        db.close()
+
+def test_login_rehashes_when_cost_changes(client: TestClient, monkeypatch):
+    """Test a successful login upgrades a hash made at an old work factor"""
+    import app.security
+
+    monkeypatch.setattr(app.security, "BCRYPT_ROUNDS", 5)
+    email = _active_user("s3cret-pass", rounds=4)
+
+    response = client.post("/auth/token", data={"username": email, "password": "s3cret-pass"})
+    assert response.status_code == 200
+    upgraded = _stored_hash(email)
+    assert upgraded.startswith("$2b$05$")
+
+    # The new hash still verifies, and is left alone from now on
+    response = client.post("/auth/token", data={"username": email, "password": "s3cret-pass"})
+    assert response.status_code == 200
+    assert _stored_hash(email) == upgraded
+    assert client.post("/auth/token", data={"username": email, "password": "wrong"}).status_code == 401
+
+def test_login_sheds_load_when_hasher_saturated(client: TestClient, monkeypatch):
+    """Test logins get a 503 instead of queueing when the hasher is full"""
+    from app.password_hasher import PasswordHasher
+    from app.services import auth_service
+
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    hasher._slots.acquire() # a login already in progress
+    monkeypatch.setattr(auth_service, "password_hasher", hasher)
+    email = _active_user("s3cret-pass", rounds=4)
+
+    response = client.post("/auth/token", data={"username": email, "password": "s3cret-pass"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    hasher.shutdown()
+
+def test_register_active_email_skips_the_hasher(client: TestClient, monkeypatch):
+    """Test registering an already active email is refused without hashing the password"""
+    from app.password_hasher import PasswordHasher
+    from app.services import auth_service
+
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    hasher._slots.acquire() # any hash would be shed with a 503
+    monkeypatch.setattr(auth_service, "password_hasher", hasher)
+    email = _active_user("s3cret-pass", rounds=4)
+
+    response = client.post("/auth/register", json={
+        "email": email, "password": "another-pass", "first_name": "Test", "last_name": "User"
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered and active."
+    hasher.shutdown()
+
+def test_refresh_token_rotation(client: TestClient):
+    """Test a refresh token yields a new working pair and can only be used once"""
+    email = _active_user("s3cret-pass", rounds=4)
+    login = client.post("/auth/token", data={"username": email, "password": "s3cret-pass"}).json()
+    assert login["refresh_token"]
+
+    response = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != login["refresh_token"]
+    me = client.get("/users/me", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert me.json()["email"] == email
+
+    assert client.post("/auth/refresh", json={"refresh_token": "not-a-token"}).status_code == 401
+
+def test_refresh_token_reuse_revokes_family(client: TestClient):
+    """Test replaying a rotated refresh token revokes every token of the login"""
+    email = _active_user("s3cret-pass", rounds=4)
+    first = client.post("/auth/token", data={"username": email, "password": "s3cret-pass"}).json()["refresh_token"]
+    second = client.post("/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+
+    # The rotated token is replayed: both it and its successor stop working
+    assert client.post("/auth/refresh", json={"refresh_token": first}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": second}).status_code == 401
+
+    # Other logins of the same user are unaffected
+    other = client.post("/auth/token", data={"username": email, "password": "s3cret-pass"}).json()["refresh_token"]
+    assert client.post("/auth/refresh", json={"refresh_token": other}).status_code == 200
+
+def test_logout_revokes_access_and_refresh_tokens(client: TestClient):
+    """Test a logged-out access token and its refresh token stop working"""
+    email = _active_user("s3cret-pass", rounds=4)
+    tokens = client.post("/auth/token", data={"username": email, "password": "s3cret-pass"}).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    response = client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert response.status_code == 204
+    assert client.get("/users/me", headers=headers).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    # A new login is unaffected
+    tokens = client.post("/auth/token", data={"username": email, "password": "s3cret-pass"}).json()
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}).status_code == 200
+
+def test_valid_tokens_skip_revocation_lookup(client: TestClient, auth_headers):
+    """Test the Bloom filter answers for unrevoked tokens without a query"""
+    from sqlalchemy import event
+    import app.test_database
+
+    client.get("/food-logs/", headers=auth_headers) # loads the filter
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "revoked_tokens" in statement:
+            statements.append(statement)
+    event.listen(app.test_database.engine, "before_cursor_execute", capture)
+    try:
+        for _ in range(3):
+            assert client.get("/food-logs/", headers=auth_headers).status_code == 200
+    finally:
+        event.remove(app.test_database.engine, "before_cursor_execute", capture)
+    assert statements == []
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test every added item is found, and few others are"""
+    from app.bloom import BloomFilter
+
+    bloom = BloomFilter(1000, error_rate=0.01)
+    added = [f"jti-{i}" for i in range(1000)]
+    for item in added:
+        bloom.add(item)
+    assert all(item in bloom for item in added)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_revocation_during_reload_survives_the_swap(client: TestClient, auth_headers, monkeypatch):
+    """Test a jti revoked while the filter is being rebuilt is in the new filter"""
+    from datetime import datetime, timedelta, timezone
+    from app import models
+    from app.services import revocation_service
+    from app.test_database import TestingSessionLocal
+
+    db = TestingSessionLocal()
+    user = db.query(models.User).order_by(models.User.id.desc()).first() # created by auth_headers
+    revocations = revocation_service.RevocationList()
+
+    class RevokeMidReload(revocation_service.BloomFilter):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # Runs after the reload's query, before its swap
+            if revocations._pending is not None and not self.__class__.done:
+                self.__class__.done = True
+                revocations.revoke(db, "jti-mid-reload", user.id, datetime.now(timezone.utc) + timedelta(hours=1))
+        done = False
+
+    monkeypatch.setattr(revocation_service, "BloomFilter", RevokeMidReload)
+    try:
+        revocations.reload(db)
+        assert RevokeMidReload.done
+        assert "jti-mid-reload" in revocations._filter
+        assert revocations.is_revoked(db, "jti-mid-reload")
+    finally:
+        db.query(models.RevokedToken).filter_by(jti="jti-mid-reload").delete()
+        db.commit()
+        db.close()
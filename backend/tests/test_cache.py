@@ -0,0 +1,40 @@
+from app.cache import MemoryCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test the LRU bound"""
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")          # 'b' is now the least recently used
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert cache.evictions == 1
+
+def test_memory_cache_expires_entries():
+    """Test per-entry TTLs"""
+    clock = FakeClock()
+    cache = MemoryCache(clock=clock)
+    cache.set("a", "1", ttl=10)
+    cache.set("b", "2")
+
+    clock.now = 9.9
+    assert cache.get("a") == "1"
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
+
+def test_memory_cache_delete():
+    cache = MemoryCache()
+    cache.set("a", "1")
+    cache.delete("a", "missing")
+    assert cache.get("a") is None
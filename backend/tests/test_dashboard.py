@@ -60,3 +60,244 @@ def test_dashboard_structure(client: TestClient, test_user_data):
     assert "protein" in daily
     assert "carbs" in daily
     assert "fat" in daily
+
+def _create_profile(client: TestClient, headers, profile_data):
+    response = client.post("/profile/me", json=profile_data, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+def test_profile_write_persists_targets(client: TestClient, auth_headers, test_profile_data):
+    """Test the target vector is computed once, when the profile is written"""
+    from app.test_database import TestingSessionLocal
+    from app.models import UserTarget
+
+    profile = _create_profile(client, auth_headers, test_profile_data)
+
+    db = TestingSessionLocal()
+    target = db.query(UserTarget).filter(UserTarget.user_id == profile["user_id"]).first()
+    db.close()
+
+    assert target is not None
+    assert target.energy_kcal == 2730
+    assert target.protein_g == 60
+    assert target.bmi_category == "Normal"
+    assert target.bmr > 0 and target.tdee > target.bmr
+    assert {g["name"] for g in target.nutrient_goals} == {"Energy", "Protein", "Visible Fat", "Iron"}
+
+def test_dashboard_reads_persisted_targets(client: TestClient, auth_headers, test_profile_data):
+    """Test the dashboard gap analysis against the persisted targets"""
+    _create_profile(client, auth_headers, test_profile_data)
+    client.post("/food-logs/", json={
+        "food_id": 1, "quantity_grams": 200, "log_date": "2025-01-15", "meal_type": "Lunch"
+    }, headers=auth_headers)
+
+    response = client.get("/dashboard/?log_date=2025-01-15", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["matched_demographic_group"] == "Man - Moderate"
+    assert data["total_calories_goal"] == 2730
+    assert data["total_calories_consumed"] == 712
+    iron = next(r for r in data["detailed_analysis"] if r["nutrient_name"] == "Iron")
+    assert iron["unit"] == "mg"
+    assert iron["consumed"] == 1.4
+
+def test_targets_recomputed_when_rda_version_changes(client: TestClient, auth_headers, test_profile_data):
+    """Test a reference-data version bump makes persisted targets stale"""
+    from app.test_database import TestingSessionLocal
+    from app.models import RDA
+    from app.services import bump_reference_version
+
+    _create_profile(client, auth_headers, test_profile_data)
+
+    db = TestingSessionLocal()
+    rda = db.query(RDA).filter_by(demographic_group_id=1, nutrient_id=1).first()
+    rda.recommended_value = 2800
+    bump_reference_version(db)
+    db.commit()
+    try:
+        response = client.get("/dashboard/?log_date=2025-01-15", headers=auth_headers)
+        assert response.json()["total_calories_goal"] == 2800
+    finally:
+        rda.recommended_value = 2730
+        bump_reference_version(db)
+        db.commit()
+        db.close()
+
+def test_targets_rematch_group_when_age_bracket_changes(client: TestClient, auth_headers, test_profile_data, monkeypatch):
+    """Test a birthday into the next age bracket switches the user to that bracket's RDA"""
+    from datetime import date, timedelta
+    from app.test_database import TestingSessionLocal
+    from app.models import DemographicGroup, GenderEnum, ActivityLevelEnum, RDA, UserProfile
+    from app.services import target_service
+
+    db = TestingSessionLocal()
+    db.add(DemographicGroup(
+        id=2, name="Boy - Moderate (16-18y)", gender=GenderEnum.male,
+        activity_level=ActivityLevelEnum.moderate, age_min_years=16, age_max_years=18.99
+    ))
+    db.add(RDA(demographic_group_id=2, nutrient_id=1, recommended_value=3020))
+    db.commit()
+    try:
+        today = date.today()
+        # 18 years old, turning 19 in the next week or so
+        upcoming = today + timedelta(days=10)
+        birth_date = date(upcoming.year - 19, upcoming.month, min(upcoming.day, 28))
+        profile = _create_profile(client, auth_headers, {**test_profile_data, "birth_date": birth_date.isoformat()})
+        assert profile["demographic_group_id"] == 2
+        assert client.get("/dashboard/?log_date=2025-01-15", headers=auth_headers).json()["total_calories_goal"] == 3020
+
+        class Later(date):
+            @classmethod
+            def today(cls):
+                return today + timedelta(days=30)
+
+        monkeypatch.setattr(target_service, "date", Later)
+        response = client.get("/dashboard/?log_date=2025-01-16", headers=auth_headers)
+        assert response.json()["total_calories_goal"] == 2730
+        db.expire_all()
+        assert db.query(UserProfile).filter_by(user_id=profile["user_id"]).one().demographic_group_id == 1
+    finally:
+        db.query(RDA).filter_by(demographic_group_id=2).delete()
+        db.query(DemographicGroup).filter_by(id=2).delete()
+        db.commit()
+        db.close()
+
+def test_dashboard_cache_hit_and_log_write_invalidation(client: TestClient, auth_headers, test_profile_data):
+    """Test repeat dashboard reads are cached until a log write for that day"""
+    from app.metrics import metrics
+
+    _create_profile(client, auth_headers, test_profile_data)
+    url = "/dashboard/?log_date=2025-02-01"
+
+    first = client.get(url, headers=auth_headers).json()
+    hits = metrics.snapshot()["counters"].get("dashboard_cache.hits", 0)
+    assert client.get(url, headers=auth_headers).json() == first
+    assert metrics.snapshot()["counters"]["dashboard_cache.hits"] == hits + 1
+
+    # A log on another day leaves this day cached
+    client.post("/food-logs/", json={
+        "food_id": 1, "quantity_grams": 100, "log_date": "2025-02-02", "meal_type": "Lunch"
+    }, headers=auth_headers)
+    assert client.get(url, headers=auth_headers).json()["total_calories_consumed"] == 0
+
+    # A log on this day invalidates it
+    client.post("/food-logs/", json={
+        "food_id": 1, "quantity_grams": 100, "log_date": "2025-02-01", "meal_type": "Lunch"
+    }, headers=auth_headers)
+    assert client.get(url, headers=auth_headers).json()["total_calories_consumed"] == 356
+
+def test_dashboard_cache_hit_skips_reference_version_query(client: TestClient, auth_headers, test_profile_data):
+    """Test a cached dashboard is served without reading the RDA version from the database"""
+    from sqlalchemy import event
+    from app.test_database import engine
+    from app.metrics import metrics
+    from app.services.dashboard_cache import dashboard_cache
+
+    _create_profile(client, auth_headers, test_profile_data)
+    url = "/dashboard/?log_date=2025-02-03"
+    first = client.get(url, headers=auth_headers).json()
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get(url, headers=auth_headers).json() == first
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert not [s for s in statements if "reference_data_versions" in s]
+
+    # A published bump retires the entry
+    version = int(dashboard_cache.backend.get("dashboard:reference_version"))
+    misses = metrics.snapshot()["counters"].get("dashboard_cache.misses", 0)
+    dashboard_cache.publish_reference_version(version + 1)
+    try:
+        assert client.get(url, headers=auth_headers).json() == first
+        assert metrics.snapshot()["counters"]["dashboard_cache.misses"] == misses + 1
+    finally:
+        dashboard_cache.publish_reference_version(version)
+
+def test_dashboard_cache_profile_write_invalidation(client: TestClient, auth_headers, test_profile_data):
+    """Test a profile write retires the user's cached dashboards"""
+    _create_profile(client, auth_headers, test_profile_data)
+    url = "/dashboard/?log_date=2025-02-01"
+    assert client.get(url, headers=auth_headers).json()["total_calories_goal"] == 2730
+
+    # BMI > 25 applies the 500 kcal deficit
+    _create_profile(client, auth_headers, {**test_profile_data, "weight_kg": 90})
+    assert client.get(url, headers=auth_headers).json()["total_calories_goal"] == 2230
+
+def test_dashboard_meal_breakdown_single_query(client: TestClient, auth_headers, test_profile_data):
+    """Test per-meal totals come from one grouped query over food_logs"""
+    from sqlalchemy import event
+    from app.test_database import engine
+
+    _create_profile(client, auth_headers, test_profile_data)
+    for food_id, grams, meal in [(1, 100, "Breakfast"), (2, 100, "Breakfast"), (1, 200, "Dinner")]:
+        client.post("/food-logs/", json={
+            "food_id": food_id, "quantity_grams": grams, "log_date": "2025-02-10", "meal_type": meal
+        }, headers=auth_headers)
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(
+            "/dashboard/?log_date=2025-02-10&include_meals=true&nutrients=Iron", headers=auth_headers
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    data = response.json()
+    meals = {m["meal_type"]: m for m in data["meal_breakdown"]}
+    assert list(meals) == ["Breakfast", "Lunch", "Dinner", "Snack"]
+    assert meals["Breakfast"]["calories"] == 677
+    assert meals["Breakfast"]["nutrients"] == {"Iron": 4.6}
+    assert meals["Dinner"]["protein"] == 15.8
+    assert meals["Lunch"]["calories"] == 0
+    assert data["total_calories_consumed"] == 677 + 712
+    assert len([s for s in statements if "FROM food_logs" in s]) == 1
+
+    # Without the option the breakdown is omitted
+    plain = client.get("/dashboard/?log_date=2025-02-10", headers=auth_headers).json()
+    assert plain["meal_breakdown"] is None
+
+def test_day_view_combines_dashboard_and_logs(client: TestClient, auth_headers, test_profile_data):
+    """Test /day/{date} returns the dashboard and the logs from one food_logs read"""
+    from sqlalchemy import event
+    from app.test_database import engine
+
+    _create_profile(client, auth_headers, test_profile_data)
+    for food_id, grams, meal in [(1, 150, "Breakfast"), (2, 100, "Dinner")]:
+        client.post("/food-logs/", json={
+            "food_id": food_id, "quantity_grams": grams, "log_date": "2025-02-20", "meal_type": meal
+        }, headers=auth_headers)
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/day/2025-02-20", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len([s for s in statements if "FROM food_logs" in s]) == 1
+
+    # Both halves agree with the standalone endpoints
+    dashboard = client.get("/dashboard/?log_date=2025-02-20", headers=auth_headers).json()
+    logs = client.get("/food-logs/?log_date=2025-02-20", headers=auth_headers).json()
+    assert data["dashboard"]["detailed_analysis"] == dashboard["detailed_analysis"]
+    assert data["dashboard"]["total_calories_consumed"] == dashboard["total_calories_consumed"] == 534 + 321
+    assert data["logs"] == logs
+    assert [log["calories"] for log in data["logs"]] == [534, 321]
+
+    # A new log invalidates the cached day view
+    client.post("/food-logs/", json={
+        "food_id": 1, "quantity_grams": 100, "log_date": "2025-02-20", "meal_type": "Snack"
+    }, headers=auth_headers)
+    assert len(client.get("/day/2025-02-20", headers=auth_headers).json()["logs"]) == 3
@@ -0,0 +1,134 @@
+import smtplib
+import socket
+import uuid
+from datetime import datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+from app import models
+from app.metrics import metrics
+from app.services.email import EmailService
+from app.services.email_outbox import OutboxWorker, drain_all
+from app.test_database import TestingSessionLocal
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    try:
+        yield controller, handler
+    finally:
+        controller.stop()
+
+
+def _register(client: TestClient) -> str:
+    email = f"outbox-{uuid.uuid4().hex[:12]}@example.com"
+    response = client.post("/auth/register", json={
+        "email": email, "password": "testpassword123", "first_name": "Test", "last_name": "User"
+    })
+    assert response.status_code == 201
+    return email
+
+
+def _outbox_rows(db, emails):
+    return db.query(models.EmailOutbox).filter(models.EmailOutbox.to_email.in_(emails)).all()
+
+
+def test_registration_enqueues_and_worker_sends_over_one_connection(client: TestClient, smtp_server):
+    """Registering only queues the OTP email; a drain delivers it over a pooled connection."""
+    controller, handler = smtp_server
+    emails = [_register(client) for _ in range(3)]
+
+    db = TestingSessionLocal()
+    try:
+        rows = _outbox_rows(db, emails)
+        assert {row.to_email for row in rows} == set(emails)
+        assert all(row.status == "pending" for row in rows)
+        assert handler.messages == []
+
+        sender = EmailService(smtp_server=controller.hostname, smtp_port=controller.port, auth=False, starttls=False)
+        metrics.reset()
+        drain_all(db, sender, batch_size=2)
+        db.expire_all()
+
+        rows = _outbox_rows(db, emails)
+        assert all(row.status == "sent" and row.sent_at is not None for row in rows)
+        delivered = {rcpt for rcpts, _ in handler.messages for rcpt in rcpts}
+        assert set(emails) <= delivered
+        otps = {user.email: user.verification_otp for user in db.query(models.User).filter(models.User.email.in_(emails))}
+        for rcpts, content in handler.messages:
+            if rcpts[0] in otps:
+                assert f"Your OTP: {otps[rcpts[0]]}" in content
+
+        # Several batches, one authenticated connection
+        assert metrics.snapshot()["counters"]["email.smtp_connects"] == 1
+        sender.close()
+    finally:
+        db.close()
+
+
+def test_failed_send_is_retried_later(client: TestClient):
+    """When SMTP is unreachable the email stays queued with a backoff."""
+    email = _register(client)
+    sender = EmailService(smtp_server="127.0.0.1", smtp_port=_free_port(), auth=False, starttls=False)
+
+    db = TestingSessionLocal()
+    try:
+        drain_all(db, sender)
+        db.expire_all()
+        (row,) = _outbox_rows(db, [email])
+        assert row.status == "pending"
+        assert row.attempts == 1
+        assert row.last_error
+        next_attempt_at = row.next_attempt_at.replace(tzinfo=row.next_attempt_at.tzinfo or timezone.utc)
+        assert next_attempt_at > datetime.now(timezone.utc)
+    finally:
+        db.close()
+
+
+def test_worker_drains_before_stopping(client: TestClient, smtp_server):
+    """An email enqueued right before shutdown is still sent by the worker's last drain."""
+    controller, handler = smtp_server
+    sender = EmailService(smtp_server=controller.hostname, smtp_port=controller.port, auth=False, starttls=False)
+    worker = OutboxWorker(session_factory=TestingSessionLocal, sender=sender, poll_seconds=60)
+    worker.start()
+    email = _register(client)
+    worker.notify()
+    worker.stop()
+
+    assert email in {rcpt for rcpts, _ in handler.messages for rcpt in rcpts}
+    db = TestingSessionLocal()
+    try:
+        (row,) = _outbox_rows(db, [email])
+        assert row.status == "sent"
+    finally:
+        db.close()
+
+
+def test_connection_is_discarded_on_any_error(smtp_server):
+    """A connection that raised while in use is closed, not returned to the pool."""
+    controller, _ = smtp_server
+    sender = EmailService(smtp_server=controller.hostname, smtp_port=controller.port, auth=False, starttls=False)
+    with pytest.raises(smtplib.SMTPResponseException):
+        with sender.connection() as server:
+            raise smtplib.SMTPResponseException(421, b"Service not available")
+    assert server.sock is None
+    assert sender._idle == []
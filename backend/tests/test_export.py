@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from datetime import date
+from fastapi.testclient import TestClient
+
+def _log_entries(client: TestClient, headers, entries):
+    response = client.post("/food-logs/bulk", json={"entries": entries}, headers=headers)
+    assert response.status_code == 201
+
+def test_export_unauthorized(client: TestClient):
+    """Test export requires authentication"""
+    assert client.get("/export/logs").status_code == 401
+
+def test_export_ndjson_with_nutrients(client: TestClient, auth_headers):
+    """Test NDJSON rows carry per-log nutrient amounts, in date order"""
+    _log_entries(client, auth_headers, [
+        {"food_id": 2, "quantity_grams": 50, "log_date": "2025-10-02", "meal_type": "Dinner"},
+        {"food_id": 1, "quantity_grams": 200, "log_date": "2025-10-01", "meal_type": "Lunch"},
+    ])
+    response = client.get("/export/logs", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "attachment" in response.headers["content-disposition"]
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["log_date"], row["food_name"]) for row in rows] == [("2025-10-01", "Rice"), ("2025-10-02", "Wheat")]
+    assert rows[0]["Energy (kcal)"] == 712
+    assert rows[0]["Iron (mg)"] == 1.4
+    assert rows[1]["Protein (g)"] == 5.3
+    assert rows[1]["Visible Fat (g)"] is None
+
+def test_export_csv_includes_archived_months(client: TestClient, auth_headers):
+    """Test CSV export has a header row and covers archived history"""
+    from app.services import archive_service
+    from app.test_database import TestingSessionLocal
+
+    _log_entries(client, auth_headers, [
+        {"food_id": 1, "quantity_grams": 100, "log_date": "2019-01-15", "meal_type": "Breakfast"},
+        {"food_id": 2, "quantity_grams": 100, "log_date": "2025-10-05", "meal_type": "Lunch"},
+    ])
+    db = TestingSessionLocal()
+    try:
+        archive_service.archive_food_logs(db, before=date(2019, 2, 1))
+    finally:
+        db.close()
+
+    response = client.get("/export/logs?format=csv", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["log_date"], row["food_name"]) for row in rows] == [("2019-01-15", "Rice"), ("2025-10-05", "Wheat")]
+    assert float(rows[0]["Energy (kcal)"]) == 356
+    assert float(rows[1]["Carbohydrate (g)"]) == 64.7
+
+def test_export_rejects_unknown_format(client: TestClient, auth_headers):
+    """Test only ndjson and csv are accepted"""
+    assert client.get("/export/logs?format=xml", headers=auth_headers).status_code == 422
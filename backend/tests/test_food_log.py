@@ -1,3 +1,4 @@
+import math
 import pytest
 from fastapi.testclient import TestClient
 from tests.test_users import get_auth_token
@@ -81,3 +82,302 @@ def test_log_food_invalid_meal_type(client: TestClient, test_user_data):
                           json=log_data,
                           headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 422
+
+def test_bulk_log_food(client: TestClient, auth_headers):
+    """Test logging several entries in one request"""
+    entries = [
+        {"food_id": 1, "quantity_grams": 150, "log_date": "2025-03-01", "meal_type": "Lunch"},
+        {"food_id": 2, "quantity_grams": 80, "log_date": "2025-03-01", "meal_type": "Lunch"},
+        {"food_id": 1, "quantity_grams": 50, "log_date": "2025-03-02", "meal_type": "Dinner"},
+    ]
+    response = client.post("/food-logs/bulk", json={"entries": entries}, headers=auth_headers)
+    assert response.status_code == 201
+    data = response.json()
+    assert [(log["food_id"], log["quantity_grams"]) for log in data] == [(1, 150), (2, 80), (1, 50)]
+    assert data[0]["food"]["name"] == "Rice"
+
+    logs = client.get("/food-logs/?log_date=2025-03-01", headers=auth_headers).json()
+    assert len(logs) == 2
+
+def test_bulk_log_food_is_atomic(client: TestClient, auth_headers):
+    """Test one unknown food id rejects the whole batch"""
+    entries = [
+        {"food_id": 1, "quantity_grams": 100, "log_date": "2025-03-05", "meal_type": "Lunch"},
+        {"food_id": 99999, "quantity_grams": 100, "log_date": "2025-03-05", "meal_type": "Lunch"},
+    ]
+    response = client.post("/food-logs/bulk", json={"entries": entries}, headers=auth_headers)
+    assert response.status_code == 404
+    assert "99999" in response.json()["detail"]
+    assert client.get("/food-logs/?log_date=2025-03-05", headers=auth_headers).json() == []
+
+def test_food_log_list_single_query(client: TestClient, auth_headers):
+    """Test the log list is one joined query using the denormalized calories"""
+    from sqlalchemy import event
+    from app.test_database import engine
+
+    client.post("/food-logs/bulk", json={"entries": [
+        {"food_id": 1, "quantity_grams": 150, "log_date": "2025-03-10", "meal_type": "Lunch"},
+        {"food_id": 2, "quantity_grams": 50, "log_date": "2025-03-10", "meal_type": "Dinner"},
+    ]}, headers=auth_headers)
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        logs = client.get("/food-logs/?log_date=2025-03-10", headers=auth_headers).json()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert [(log["food_name"], log["calories"]) for log in logs] == [("Rice", 534), ("Wheat", 160.5)]
+    assert len([s for s in statements if "food_nutrients" in s or "FROM food_logs" in s]) == 1
+
+def test_sync_food_energy():
+    """Test foods.energy_kcal is copied from the Energy nutrient row"""
+    from app.test_database import TestingSessionLocal
+    from app.models import Food
+    from app.services.food_service import sync_food_energy
+
+    db = TestingSessionLocal()
+    try:
+        db.query(Food).update({Food.energy_kcal: 0})
+        sync_food_energy(db)
+        db.commit()
+        assert {f.id: f.energy_kcal for f in db.query(Food)} == {1: 356, 2: 321}
+    finally:
+        db.close()
+
+def test_copy_day_single_insert_select(client: TestClient, auth_headers):
+    """Test copying a day is one INSERT ... SELECT and keeps the rollups in step"""
+    from sqlalchemy import event
+    from app.test_database import engine
+
+    client.post("/food-logs/bulk", json={"entries": [
+        {"food_id": 1, "quantity_grams": 100, "log_date": "2025-07-01", "meal_type": "Breakfast"},
+        {"food_id": 2, "quantity_grams": 50, "log_date": "2025-07-01", "meal_type": "Breakfast"},
+        {"food_id": 1, "quantity_grams": 200, "log_date": "2025-07-01", "meal_type": "Dinner"},
+    ]}, headers=auth_headers)
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post("/food-logs/copy", json={
+            "source_date": "2025-07-01", "target_date": "2025-07-02"
+        }, headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 201
+    copies = response.json()
+    assert [(log["food_name"], log["meal_type"], log["calories"]) for log in copies] == [
+        ("Rice", "Breakfast", 356), ("Wheat", "Breakfast", 160.5), ("Rice", "Dinner", 712)
+    ]
+    inserts = [s for s in statements if s.startswith("INSERT INTO food_logs")]
+    assert len(inserts) == 1 and "SELECT" in inserts[0]
+    assert client.get("/food-logs/?log_date=2025-07-02", headers=auth_headers).json() == copies
+
+    trends = client.get("/analytics/trends?period=week&count=1&end_date=2025-07-02", headers=auth_headers).json()
+    assert trends["periods"][0]["entries"] == 6 and trends["periods"][0]["days_logged"] == 2
+
+def test_copy_one_meal(client: TestClient, auth_headers):
+    """Test copying only one meal, logged as another meal type"""
+    client.post("/food-logs/bulk", json={"entries": [
+        {"food_id": 1, "quantity_grams": 100, "log_date": "2025-07-05", "meal_type": "Breakfast"},
+        {"food_id": 2, "quantity_grams": 100, "log_date": "2025-07-05", "meal_type": "Lunch"},
+    ]}, headers=auth_headers)
+    copies = client.post("/food-logs/copy", json={
+        "source_date": "2025-07-05", "target_date": "2025-07-06",
+        "meal_type": "Lunch", "target_meal_type": "Dinner"
+    }, headers=auth_headers).json()
+    assert [(log["food_name"], log["meal_type"]) for log in copies] == [("Wheat", "Dinner")]
+
+def test_quick_add_ranks_by_decayed_frequency(client: TestClient, auth_headers):
+    """Test quick-add counts logs, keeps the typical quantity and drops deleted logs"""
+    client.post("/food-logs/bulk", json={"entries": [
+        {"food_id": 1, "quantity_grams": 100, "log_date": "2025-08-01", "meal_type": "Lunch"},
+        {"food_id": 1, "quantity_grams": 200, "log_date": "2025-08-02", "meal_type": "Lunch"},
+        {"food_id": 1, "quantity_grams": 150, "log_date": "2025-08-03", "meal_type": "Lunch"},
+        {"food_id": 2, "quantity_grams": 50, "log_date": "2025-08-02", "meal_type": "Dinner"},
+    ]}, headers=auth_headers)
+    wheat = client.post("/food-logs/", json={
+        "food_id": 2, "quantity_grams": 70, "log_date": "2025-08-03", "meal_type": "Dinner"
+    }, headers=auth_headers).json()
+
+    foods = client.get("/food-logs/quick-add", headers=auth_headers).json()
+    assert [(f["food_name"], f["count"], f["typical_grams"]) for f in foods] == [("Rice", 3, 150), ("Wheat", 2, 60)]
+    assert foods[0]["calories"] == 534
+
+    client.delete(f"/food-logs/{wheat['id']}", headers=auth_headers)
+    foods = client.get("/food-logs/quick-add?limit=1", headers=auth_headers).json()
+    assert [(f["food_name"], f["count"]) for f in foods] == [("Rice", 3)]
+
+def test_quick_add_decay_prefers_recent_foods():
+    """Test a single recent log outranks an equal count logged long ago"""
+    from datetime import datetime, timedelta, timezone
+    from app.services.foodStats_service import log_add, log_decay_weight, FOOD_STATS_HALF_LIFE_DAYS
+
+    now = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    half_life_ago = now - timedelta(days=FOOD_STATS_HALF_LIFE_DAYS)
+    assert abs(math.exp(log_decay_weight(half_life_ago) - log_decay_weight(now)) - 0.5) < 1e-9
+    long_ago = log_decay_weight(now - timedelta(days=3 * FOOD_STATS_HALF_LIFE_DAYS))
+    assert log_decay_weight(now) > log_add(long_ago, long_ago)
+
+def test_quick_add_scores_stay_finite(client: TestClient, auth_headers, monkeypatch):
+    """Test scores do not overflow thousands of half-lives after the epoch"""
+    from datetime import datetime, timezone
+    from app.models import UserFoodStat
+    from app.services import foodStats_service
+    from app.test_database import TestingSessionLocal
+
+    monkeypatch.setattr(foodStats_service, "FOOD_STATS_HALF_LIFE_DAYS", 0.01)
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    weight = foodStats_service.log_decay_weight(at)
+
+    db = TestingSessionLocal()
+    try:
+        foodStats_service.record_food_stats(db, user_id, [(1, 100)], at=at)
+        foodStats_service.record_food_stats(db, user_id, [(1, 100), (1, 100)], at=at)
+        foodStats_service.remove_food_stats(db, user_id, [(1, at)])
+        db.commit()
+        stat = db.get(UserFoodStat, (user_id, 1))
+        assert stat.count == 2
+        assert abs(stat.score - (weight + math.log(2))) < 1e-6
+
+        foodStats_service.remove_food_stats(db, user_id, [(1, at), (1, at)])
+        db.commit()
+        db.refresh(stat)
+        assert stat.count == 0
+        assert stat.score == foodStats_service.EMPTY_SCORE
+    finally:
+        db.close()
+
+def test_rebuild_food_stats_matches_incremental(client: TestClient, auth_headers):
+    """Test the backfill produces the same counts as the write path"""
+    from app.test_database import TestingSessionLocal
+    from app.services.foodStats_service import rebuild_food_stats
+
+    client.post("/food-logs/bulk", json={"entries": [
+        {"food_id": 2, "quantity_grams": 40, "log_date": "2025-08-10", "meal_type": "Lunch"},
+        {"food_id": 2, "quantity_grams": 60, "log_date": "2025-08-11", "meal_type": "Lunch"},
+    ]}, headers=auth_headers)
+    before = client.get("/food-logs/quick-add", headers=auth_headers).json()
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+
+    db = TestingSessionLocal()
+    try:
+        rebuild_food_stats(db, user_id=user_id)
+    finally:
+        db.close()
+    after = client.get("/food-logs/quick-add", headers=auth_headers).json()
+    assert [(f["food_id"], f["count"], f["typical_grams"]) for f in after] == \
+        [(f["food_id"], f["count"], f["typical_grams"]) for f in before]
+
+def test_write_behind_batches_and_acks_after_commit(client: TestClient, auth_headers, monkeypatch):
+    """Test queued single inserts are flushed together and only acknowledged once committed"""
+    from datetime import date
+    from app import schemas
+    from app.metrics import metrics
+    from app.models import LogRollup
+    from app.routers import foodLog as food_log_router
+    from app.services.log_batcher import LogWriteBehind
+    from app.test_database import TestingSessionLocal
+
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    batcher = LogWriteBehind(session_factory=TestingSessionLocal, enabled=True, max_rows=10, max_wait_ms=200)
+    metrics.reset()
+    try:
+        futures = [
+            batcher.submit(user_id, schemas.LogCreate(
+                food_id=food_id, quantity_grams=100, log_date=date(2025, 9, 10), meal_type="Lunch"
+            ))
+            for food_id in (1, 2, 1, 99)
+        ]
+        logs = [future.result(timeout=5) for future in futures[:3]]
+        assert [log.food.name for log in logs] == ["Rice", "Wheat", "Rice"]
+        assert futures[3].exception().status_code == 404
+
+        batch = metrics.snapshot()["observations"]["food_log_write_behind.batch_size"]
+        assert batch["count"] == 1 and batch["max"] == 4
+
+        # Through the endpoint, with rollups and the day's cache kept current
+        monkeypatch.setattr(food_log_router, "log_batcher", batcher)
+        response = client.post("/food-logs/", json={
+            "food_id": 2, "quantity_grams": 50, "log_date": "2025-09-10", "meal_type": "Dinner"
+        }, headers=auth_headers)
+        assert response.status_code == 201
+        assert response.json()["food"]["name"] == "Wheat"
+    finally:
+        batcher.close()
+
+    entries = client.get("/food-logs/?log_date=2025-09-10", headers=auth_headers).json()
+    assert len(entries) == 4
+    db = TestingSessionLocal()
+    try:
+        day = db.get(LogRollup, (user_id, "day", date(2025, 9, 10)))
+        assert day.entries == 4 and round(day.energy_kcal, 1) == 356 * 2 + 321 + 160.5
+    finally:
+        db.close()
+
+def test_write_behind_acks_committed_rows_when_invalidation_fails(client: TestClient, auth_headers, monkeypatch):
+    """Test a cache outage after the commit does not fail requests whose rows were written"""
+    from datetime import date
+    from app import schemas
+    from app.services import log_batcher as log_batcher_module
+    from app.services.log_batcher import LogWriteBehind
+    from app.test_database import TestingSessionLocal
+
+    def cache_down(user_id, log_dates):
+        raise ConnectionError("cache unavailable")
+
+    monkeypatch.setattr(log_batcher_module, "invalidate_days", cache_down)
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    batcher = LogWriteBehind(session_factory=TestingSessionLocal, enabled=True, max_rows=10, max_wait_ms=50)
+    try:
+        future = batcher.submit(user_id, schemas.LogCreate(
+            food_id=1, quantity_grams=100, log_date=date(2025, 9, 11), meal_type="Lunch"
+        ))
+        assert future.result(timeout=5).food.name == "Rice"
+    finally:
+        batcher.close()
+
+def test_write_behind_full_queue_writes_synchronously(client: TestClient, auth_headers, monkeypatch):
+    """Test requests fall back to a direct write while the queue is full"""
+    import threading
+    from datetime import date
+    from app import schemas
+    from app.routers import foodLog as food_log_router
+    from app.services.log_batcher import LogWriteBehind
+    from app.test_database import TestingSessionLocal
+
+    stalled = threading.Event()
+    release = threading.Event()
+
+    def stalled_session():
+        stalled.set()
+        release.wait(5)
+        return TestingSessionLocal()
+
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    batcher = LogWriteBehind(session_factory=stalled_session, enabled=True, max_rows=1, max_wait_ms=0, max_queue=1)
+    entry = schemas.LogCreate(food_id=2, quantity_grams=80, log_date=date(2025, 9, 12), meal_type="Lunch")
+    try:
+        first = batcher.submit(user_id, entry)
+        assert stalled.wait(5)
+        queued = batcher.submit(user_id, entry)
+        assert queued is not None
+        assert batcher.submit(user_id, entry) is None
+
+        monkeypatch.setattr(food_log_router, "log_batcher", batcher)
+        response = client.post("/food-logs/", json={
+            "food_id": 2, "quantity_grams": 80, "log_date": "2025-09-12", "meal_type": "Dinner"
+        }, headers=auth_headers)
+        assert response.status_code == 201
+    finally:
+        release.set()
+        batcher.close()
+    assert first.result(timeout=5) and queued.result(timeout=5)
+    assert len(client.get("/food-logs/?log_date=2025-09-12", headers=auth_headers).json()) == 3
+
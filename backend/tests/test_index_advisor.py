@@ -0,0 +1,94 @@
+"""
+Index advisor: runs EXPLAIN on every SELECT the hot endpoints issue
+and fails when one of them falls back to a full table scan.
+
+Always runs against the SQLite test database. Set TEST_POSTGRES_URL
+to also check the plans on Postgres (with sequential scans disabled,
+so any Seq Scan left means there is no usable index).
+"""
+import os
+import re
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.sql import Select
+from fastapi.testclient import TestClient
+from app.models import Base
+from app.test_database import engine
+
+TABLES = set(Base.metadata.tables)
+
+def _capture_hot_queries(client: TestClient, headers, profile_data) -> list:
+    """Drives the most-visited endpoints and collects the SELECTs they run."""
+    client.post("/food-logs/bulk", json={"entries": [
+        {"food_id": 1, "quantity_grams": 100, "log_date": "2025-04-01", "meal_type": "Lunch"},
+        {"food_id": 2, "quantity_grams": 50, "log_date": "2025-04-01", "meal_type": "Dinner"},
+    ]}, headers=headers)
+
+    statements = []
+    def record(conn, clauseelement, multiparams, params, execution_options):
+        if isinstance(clauseelement, Select):
+            # Lazy loads pass their key values as execution parameters
+            statements.append(clauseelement.params(params) if params else clauseelement)
+    event.listen(engine, "before_execute", record)
+    try:
+        responses = [
+            client.post("/profile/me", json=profile_data, headers=headers),
+            client.get("/users/me", headers=headers),
+            client.get("/profile/me", headers=headers),
+            client.get("/dashboard/?log_date=2025-04-01&include_meals=true", headers=headers),
+            client.get("/day/2025-04-01", headers=headers),
+            client.get("/food-logs/?log_date=2025-04-01", headers=headers),
+            client.get("/food-logs/quick-add", headers=headers),
+            client.get("/sync/?since=0", headers=headers),
+            client.get("/analytics/trends?end_date=2025-04-01", headers=headers),
+            client.post("/food-logs/", json={
+                "food_id": 1, "quantity_grams": 100, "log_date": "2025-04-01", "meal_type": "Snack"
+            }, headers=headers),
+        ]
+    finally:
+        event.remove(engine, "before_execute", record)
+    assert all(r.status_code < 300 for r in responses), [r.text for r in responses if r.status_code >= 300]
+    return statements
+
+def _literal_sql(statement, dialect) -> str:
+    return str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+def _sqlite_full_scans(conn, sql: str) -> list:
+    plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    scans = []
+    for detail in plan:
+        match = re.match(r"SCAN (\w+)", detail)
+        if match and match.group(1) in TABLES:
+            scans.append(detail)
+    return scans
+
+def test_hot_queries_use_indexes_sqlite(client: TestClient, auth_headers, test_profile_data):
+    """Test no hot-path query full-scans a table on SQLite"""
+    statements = _capture_hot_queries(client, auth_headers, test_profile_data)
+    problems = []
+    with engine.connect() as conn:
+        for statement in statements:
+            sql = _literal_sql(statement, engine.dialect)
+            scans = _sqlite_full_scans(conn, sql)
+            if scans:
+                problems.append(f"{scans}\n{sql}")
+    assert not problems, "Full scans:\n\n" + "\n\n".join(problems)
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_hot_queries_use_indexes_postgres(client: TestClient, auth_headers, test_profile_data):
+    """Test no hot-path query needs a sequential scan on Postgres"""
+    statements = _capture_hot_queries(client, auth_headers, test_profile_data)
+    pg_engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.create_all(bind=pg_engine)
+    problems = []
+    try:
+        with pg_engine.connect() as conn:
+            conn.execute(text("SET enable_seqscan = off"))
+            for statement in statements:
+                sql = _literal_sql(statement, pg_engine.dialect)
+                plan = "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}")))
+                if "Seq Scan" in plan:
+                    problems.append(f"{plan}\n{sql}")
+    finally:
+        pg_engine.dispose()
+    assert not problems, "Sequential scans:\n\n" + "\n\n".join(problems)
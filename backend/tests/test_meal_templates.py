@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+
+BREAKFAST = {
+    "name": "Usual breakfast",
+    "meal_type": "Breakfast",
+    "items": [{"food_id": 1, "quantity_grams": 100}, {"food_id": 2, "quantity_grams": 50}],
+}
+
+def test_meal_template_crud(client: TestClient, auth_headers):
+    """Test creating, listing, replacing and deleting templates"""
+    response = client.post("/meal-templates/", json=BREAKFAST, headers=auth_headers)
+    assert response.status_code == 201
+    template = response.json()
+    assert template["calories"] == 356 + 160.5
+    assert [item["food_name"] for item in template["items"]] == ["Rice", "Wheat"]
+
+    assert [t["id"] for t in client.get("/meal-templates/", headers=auth_headers).json()] == [template["id"]]
+
+    updated = client.put(f"/meal-templates/{template['id']}", json={
+        **BREAKFAST, "items": [{"food_id": 2, "quantity_grams": 200}]
+    }, headers=auth_headers).json()
+    assert updated["calories"] == 642 and len(updated["items"]) == 1
+
+    assert client.delete(f"/meal-templates/{template['id']}", headers=auth_headers).status_code == 204
+    assert client.get(f"/meal-templates/{template['id']}", headers=auth_headers).status_code == 404
+
+def test_meal_template_unknown_food(client: TestClient, auth_headers):
+    """Test templates reject unknown foods"""
+    body = {**BREAKFAST, "items": [{"food_id": 99999, "quantity_grams": 100}]}
+    assert client.post("/meal-templates/", json=body, headers=auth_headers).status_code == 404
+
+def test_log_meal_template(client: TestClient, auth_headers):
+    """Test logging a template inserts every item and updates the rollups from the stored vector"""
+    template = client.post("/meal-templates/", json=BREAKFAST, headers=auth_headers).json()
+
+    response = client.post(f"/meal-templates/{template['id']}/log", json={"log_date": "2025-06-02"}, headers=auth_headers)
+    assert response.status_code == 201
+    logs = response.json()
+    assert [(log["food_id"], log["meal_type"]) for log in logs] == [(1, "Breakfast"), (2, "Breakfast")]
+
+    listed = client.get("/food-logs/?log_date=2025-06-02", headers=auth_headers).json()
+    assert sum(log["calories"] for log in listed) == 516.5
+
+    trends = client.get("/analytics/trends?period=week&count=1&end_date=2025-06-02", headers=auth_headers).json()
+    week = trends["periods"][0]
+    assert week["entries"] == 2 and week["avg_calories"] == 516.5
+    assert week["avg_protein"] == round(7.9 + 10.6 / 2, 2)
@@ -44,3 +44,255 @@ def test_rate_limiting_reset(client: TestClient):
     # In production, after waiting 60 seconds, requests should work again
     # For testing purposes, we'll just verify the mechanism exists
     assert True  # Placeholder for time-based reset test
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_sliding_window_limiter_counts_previous_window():
+    """The previous window's count slides out gradually instead of resetting"""
+    from app.rate_limit import SlidingWindowLimiter
+
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(limit=10, window_seconds=60, clock=clock)
+    assert all(limiter.hit("a").allowed for _ in range(10))
+    denied = limiter.hit("a")
+    assert not denied.allowed and denied.remaining == 0
+    # Denied requests count: 11 so far, so 2/11 into the next window
+    assert denied.retry_after == pytest.approx(60 + 60 * 2 / 11)
+
+    # A quarter into the next window, 75% of the last 11 still counts
+    clock.now = 75
+    assert [limiter.hit("a").allowed for _ in range(2)] == [True, False]
+    # Other clients have their own budget
+    assert limiter.hit("b").allowed
+
+    # Two idle windows later the client starts fresh
+    clock.now = 200
+    assert limiter.hit("a").remaining == 9
+
+def test_sliding_window_limiter_retry_after_is_exact():
+    """Waiting Retry-After seconds is enough to be let through"""
+    from app.rate_limit import SlidingWindowLimiter
+
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(limit=5, window_seconds=60, clock=clock)
+    clock.now = 30
+    for _ in range(5):
+        limiter.hit("a")
+    retry_after = limiter.hit("a").retry_after
+    clock.now += retry_after - 0.5
+    assert not limiter.hit("a").allowed
+    clock.now += 0.5
+    assert limiter.hit("a").allowed
+
+def test_sliding_window_limiter_is_bounded():
+    """Scanning traffic evicts the least recently seen clients"""
+    from app.rate_limit import SlidingWindowLimiter
+
+    limiter = SlidingWindowLimiter(limit=1, max_clients=100)
+    limiter.hit("busy")
+    for i in range(1000):
+        limiter.hit(f"10.0.{i // 256}.{i % 256}")
+        limiter.hit("busy")
+    assert len(limiter) == 100
+    assert not limiter.hit("busy").allowed
+
+def test_client_key_uses_forwarded_for():
+    """Behind one proxy the client is the last X-Forwarded-For entry"""
+    from starlette.requests import Request
+    from app.rate_limit import client_key
+
+    def request(headers):
+        return Request({
+            "type": "http", "client": ("10.0.0.1", 1234),
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+        })
+
+    assert client_key(request({})) == "10.0.0.1"
+    assert client_key(request({"X-Forwarded-For": "198.51.100.2"})) == "198.51.100.2"
+    # A client-supplied entry to the left is not trusted
+    assert client_key(request({"X-Forwarded-For": "1.2.3.4, 198.51.100.2"})) == "198.51.100.2"
+    assert client_key(request({"X-Forwarded-For": "1.2.3.4, 198.51.100.2"}), trusted_proxies=2) == "1.2.3.4"
+    assert client_key(request({"X-Forwarded-For": "198.51.100.2"}), trusted_proxies=0) == "10.0.0.1"
+
+def test_rate_limit_middleware_returns_429(monkeypatch):
+    """Over the limit the middleware answers 429 with Retry-After instead of raising"""
+    from fastapi import FastAPI
+    from app import rate_limit
+
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    app = FastAPI()
+    app.middleware("http")(rate_limit.rate_limit_middleware)
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    rate_limit.rate_limiter.reset()
+    with TestClient(app) as limited:
+        statuses = [limited.get("/ping", headers={"X-Forwarded-For": "192.0.2.9"}) for _ in range(rate_limit.rate_limiter.limit + 1)]
+    rate_limit.rate_limiter.reset()
+    assert [r.status_code for r in statuses[:-1]] == [200] * rate_limit.rate_limiter.limit
+    assert statuses[-1].status_code == 429
+    assert statuses[-1].json() == {"detail": "Rate limit exceeded"}
+    assert int(statuses[-1].headers["Retry-After"]) > 0
+
+def _shared_backends():
+    from app.rate_limit import MemoryBackend, RedisBackend, SQLBackend
+    from app.test_database import engine
+
+    yield "memory", MemoryBackend()
+    yield "sql", SQLBackend(engine)
+    try:
+        import fakeredis
+    except ImportError:
+        return
+    yield "redis", RedisBackend(client=fakeredis.FakeRedis())
+
+@pytest.mark.parametrize("name", ["memory", "sql", "redis"])
+def test_backends_share_one_budget(client: TestClient, name):
+    """Two limiters (two processes) over one backend enforce a single limit"""
+    from app.rate_limit import SlidingWindowLimiter
+
+    backends = dict(_shared_backends())
+    if name not in backends:
+        pytest.skip(f"{name} backend unavailable")
+    backend = backends[name]
+    backend.reset()
+
+    clock = FakeClock()
+    clock.now = 6000
+    first = SlidingWindowLimiter(limit=4, clock=clock, backend=backend)
+    second = SlidingWindowLimiter(limit=4, clock=clock, backend=backend)
+    allowed = [limiter.hit("198.51.100.7").allowed for limiter in (first, second, first, second, first)]
+    assert allowed == [True, True, True, True, False]
+
+    # The previous window's count is read back, weighted
+    clock.now = 6060 + 30
+    # 5 counted (the denied one too) at half weight, plus this one: 3.5 of 4
+    result = second.hit("198.51.100.7")
+    assert result.allowed and result.remaining == 0
+    backend.reset()
+
+def test_deny_cache_skips_the_backend():
+    """Once denied, a client is answered locally until Retry-After has passed"""
+    from app.rate_limit import MemoryBackend, SlidingWindowLimiter
+
+    class CountingBackend(MemoryBackend):
+        calls = 0
+
+        def incr(self, key, index, cost, window_seconds):
+            self.calls += 1
+            return super().incr(key, index, cost, window_seconds)
+
+    clock = FakeClock()
+    backend = CountingBackend()
+    limiter = SlidingWindowLimiter(limit=2, clock=clock, backend=backend)
+    results = [limiter.hit("a") for _ in range(10)]
+    assert [r.allowed for r in results] == [True, True] + [False] * 8
+    assert backend.calls == 3
+    assert results[-1].retry_after == results[2].retry_after
+
+    clock.now += results[2].retry_after
+    assert limiter.hit("a").allowed
+    assert backend.calls == 4
+
+def test_backend_outage_fails_open():
+    """If the shared store is down, requests are let through and counted as errors"""
+    from app.metrics import metrics
+    from app.rate_limit import RateLimitBackend, SlidingWindowLimiter
+
+    class DownBackend(RateLimitBackend):
+        def incr(self, key, index, cost, window_seconds):
+            raise ConnectionError("store unreachable")
+
+    metrics.reset()
+    assert SlidingWindowLimiter(limit=1, backend=DownBackend()).hit("a").allowed
+    assert metrics.snapshot()["counters"]["rate_limit.backend_errors"] == 1
+
+def _policy_app(policy):
+    from fastapi import Depends, FastAPI
+
+    app = FastAPI()
+
+    @app.get("/cheap")
+    def cheap():
+        return {"ok": True}
+
+    @app.post("/expensive", dependencies=[Depends(policy.weighted(2))])
+    def expensive():
+        return {"ok": True}
+
+    @app.get("/lookup", dependencies=[Depends(policy)])
+    def lookup():
+        return {"ok": True}
+
+    return app
+
+def test_policy_charges_route_costs_with_headers():
+    """Expensive routes spend the budget faster; cheap routes are not limited"""
+    from app.rate_limit import Budget, MemoryBackend, RateLimitPolicy
+
+    clock = FakeClock()
+    policy = RateLimitPolicy("test", ip=Budget(per_minute=6, burst=4), backend=MemoryBackend(), enabled=True, clock=clock)
+    with TestClient(_policy_app(policy)) as app_client:
+        first = app_client.post("/expensive")
+        assert first.status_code == 200
+        assert first.headers["RateLimit-Limit"] == "4"
+        assert first.headers["RateLimit-Remaining"] == "2"
+        assert first.headers["RateLimit-Policy"] == "4;w=40"
+        assert app_client.get("/lookup").headers["RateLimit-Remaining"] == "1"
+
+        denied = app_client.post("/expensive")
+        assert denied.status_code == 429
+        assert denied.json() == {"detail": "Rate limit exceeded"}
+        assert int(denied.headers["Retry-After"]) > 0
+        assert denied.headers["RateLimit-Remaining"] == "0"
+
+        assert all(app_client.get("/cheap").status_code == 200 for _ in range(20))
+
+        clock.now += int(denied.headers["Retry-After"])
+        assert app_client.get("/lookup").status_code == 200
+
+def test_policy_budgets_users_and_addresses_separately():
+    """Authenticated callers get their own budget, whatever address they share"""
+    from app.rate_limit import Budget, MemoryBackend, RateLimitPolicy
+    from app.security import create_access_token
+
+    policy = RateLimitPolicy(
+        "test", user=Budget(per_minute=3, burst=3), ip=Budget(per_minute=1, burst=2),
+        backend=MemoryBackend(), enabled=True, clock=FakeClock()
+    )
+
+    def bearer(user_id):
+        return {"Authorization": f"Bearer {create_access_token(data={'sub': f'u{user_id}@example.com', 'uid': user_id})}"}
+
+    with TestClient(_policy_app(policy)) as app_client:
+        assert [app_client.get("/lookup").status_code for _ in range(3)] == [200, 200, 429]
+        assert [app_client.get("/lookup", headers=bearer(1)).status_code for _ in range(4)] == [200, 200, 200, 429]
+        assert app_client.get("/lookup", headers=bearer(2)).status_code == 200
+        # A bad token is charged to the address
+        assert app_client.get("/lookup", headers={"Authorization": "Bearer not-a-token"}).status_code == 429
+
+def test_policy_without_user_budget_charges_tokens_to_the_address():
+    """A bearer token cannot get around an address-only budget such as the login limit"""
+    from app.rate_limit import Budget, MemoryBackend, RateLimitPolicy
+    from app.security import create_access_token
+
+    policy = RateLimitPolicy("test", ip=Budget(per_minute=1, burst=3), backend=MemoryBackend(), enabled=True, clock=FakeClock())
+    token = create_access_token(data={"sub": "u1@example.com", "uid": 1})
+
+    with TestClient(_policy_app(policy)) as app_client:
+        assert app_client.get("/lookup").status_code == 200
+        statuses = [app_client.get("/lookup", headers={"Authorization": f"Bearer {token}"}).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+
+def test_policy_rejects_cost_over_burst():
+    from app.rate_limit import Budget, RateLimitPolicy
+
+    with pytest.raises(ValueError):
+        RateLimitPolicy("test", ip=Budget(per_minute=10, burst=2)).weighted(3)
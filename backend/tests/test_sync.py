@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+
+def _log(client: TestClient, headers, **fields):
+    body = {"food_id": 1, "quantity_grams": 100, "log_date": "2025-05-01", "meal_type": "Lunch", **fields}
+    response = client.post("/food-logs/", json=body, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+def test_sync_unauthorized(client: TestClient):
+    """Test sync requires authentication"""
+    assert client.get("/sync/").status_code == 401
+
+def test_sync_returns_changes_in_order(client: TestClient, auth_headers):
+    """Test creates, updates and deletes appear once each, in sequence order"""
+    assert client.get("/sync/", headers=auth_headers).status_code == 204
+
+    first = _log(client, auth_headers)
+    second = _log(client, auth_headers, food_id=2, quantity_grams=50)
+    response = client.put(f"/food-logs/{first['id']}", json={"quantity_grams": 200}, headers=auth_headers)
+    assert response.status_code == 200
+    assert client.delete(f"/food-logs/{second['id']}", headers=auth_headers).status_code == 204
+
+    data = client.get("/sync/?since=0", headers=auth_headers).json()
+    assert [(c["seq"], c["op"], c["log_id"]) for c in data["changes"]] == [
+        (1, "upsert", first["id"]),
+        (2, "upsert", second["id"]),
+        (3, "upsert", first["id"]),
+        (4, "delete", second["id"]),
+    ]
+    assert data["changes"][2]["log"]["quantity_grams"] == 200
+    assert data["changes"][2]["log"]["calories"] == 712
+    assert data["changes"][3]["log"] is None
+    assert data["next_since"] == 4 and not data["has_more"]
+
+    # Steady state: nothing new
+    assert client.get("/sync/?since=4", headers=auth_headers).status_code == 204
+
+def test_sync_pages_by_sequence(client: TestClient, auth_headers):
+    """Test limit pages through the feed with next_since"""
+    client.post("/food-logs/bulk", json={"entries": [
+        {"food_id": 1, "quantity_grams": 10 * i, "log_date": "2025-05-02", "meal_type": "Snack"}
+        for i in range(1, 6)
+    ]}, headers=auth_headers)
+
+    page = client.get("/sync/?since=0&limit=2", headers=auth_headers).json()
+    assert [c["seq"] for c in page["changes"]] == [1, 2] and page["has_more"]
+    page = client.get(f"/sync/?since={page['next_since']}&limit=2", headers=auth_headers).json()
+    assert [c["seq"] for c in page["changes"]] == [3, 4] and page["has_more"]
+    page = client.get(f"/sync/?since={page['next_since']}&limit=2", headers=auth_headers).json()
+    assert [c["seq"] for c in page["changes"]] == [5] and not page["has_more"]
+
+def test_update_and_delete_keep_dashboard_and_rollups_consistent(client: TestClient, auth_headers, test_profile_data):
+    """Test edits move rollups and invalidate the dashboard for both dates"""
+    client.post("/profile/me", json=test_profile_data, headers=auth_headers)
+    log = _log(client, auth_headers, log_date="2025-05-10")
+    client.get("/day/2025-05-10", headers=auth_headers)
+    client.put(f"/food-logs/{log['id']}", json={"log_date": "2025-05-11"}, headers=auth_headers)
+    assert client.get("/day/2025-05-10", headers=auth_headers).json()["logs"] == []
+    assert len(client.get("/day/2025-05-11", headers=auth_headers).json()["logs"]) == 1
+
+    trends = client.get("/analytics/trends?period=month&count=1&end_date=2025-05-31", headers=auth_headers).json()
+    assert trends["periods"][0]["entries"] == 1 and trends["periods"][0]["days_logged"] == 1
+
+    client.delete(f"/food-logs/{log['id']}", headers=auth_headers)
+    trends = client.get("/analytics/trends?period=month&count=1&end_date=2025-05-31", headers=auth_headers).json()
+    assert trends["periods"][0]["entries"] == 0 and trends["periods"][0]["days_logged"] == 0
+    assert client.delete(f"/food-logs/{log['id']}", headers=auth_headers).status_code == 404
@@ -100,3 +100,90 @@ def test_create_profile_invalid_data(client: TestClient, test_user_data):
                           json=invalid_data,
                           headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 422
+
+def _user_statements(client: TestClient, path: str, headers) -> list:
+    """Runs one request and returns the SQL statements that touched the users table"""
+    from sqlalchemy import event
+    import app.test_database
+
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+    event.listen(app.test_database.engine, "before_cursor_execute", capture)
+    try:
+        assert client.get(path, headers=headers).status_code == 200
+    finally:
+        event.remove(app.test_database.engine, "before_cursor_execute", capture)
+    return statements
+
+def test_authenticated_requests_skip_user_lookup(client: TestClient, auth_headers):
+    """Test the token claims and the principal cache replace the per-request user query"""
+    _user_statements(client, "/food-logs/", auth_headers) # warms the principal cache
+    assert _user_statements(client, "/food-logs/", auth_headers) == []
+
+    # Endpoints that need the full row still load it
+    assert len(_user_statements(client, "/users/me", auth_headers)) == 1
+
+def test_legacy_token_without_claims(client: TestClient, auth_headers):
+    """Test tokens carrying only 'sub' are still accepted"""
+    from app.security import create_access_token
+
+    email = client.get("/users/me", headers=auth_headers).json()["email"]
+    token = create_access_token(data={"sub": email})
+    response = client.get("/food-logs/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+
+def test_deactivation_invalidates_principal(client: TestClient, auth_headers):
+    """Test a deactivated user is rejected as soon as their principal is invalidated"""
+    from app.test_database import TestingSessionLocal
+    from app.models import User
+    from app.security import create_access_token
+    from app.services.principal_cache import principal_cache
+
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    db = TestingSessionLocal()
+    try:
+        user = db.get(User, user_id)
+        user.is_active = False
+        db.commit()
+        inactive_token = create_access_token(data={"sub": user.email, "uid": user.id, "act": False})
+    finally:
+        db.close()
+    principal_cache.invalidate(user_id)
+
+    assert client.get("/food-logs/", headers=auth_headers).status_code == 400
+    assert client.get("/food-logs/", headers={"Authorization": f"Bearer {inactive_token}"}).status_code == 400
+
+def test_token_cache_skips_repeat_verification(client: TestClient, auth_headers, admin, monkeypatch):
+    """Test a token is verified once, then served from the token cache"""
+    import app.security
+
+    calls = []
+    decode = app.security.jwt.decode
+    monkeypatch.setattr(app.security.jwt, "decode", lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+
+    for _ in range(3):
+        assert client.get("/food-logs/", headers=auth_headers).status_code == 200
+    assert len(calls) <= 1
+    _, admin_headers = admin
+    assert client.get("/metrics", headers=admin_headers).json()["hit_rates"]["token_cache"] > 0
+
+def test_metrics_require_admin(client: TestClient, auth_headers):
+    """Test the internal counters are not public"""
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=auth_headers).status_code == 403
+
+def test_token_cache_evicts_at_expiry():
+    """Test a cached token is rejected once its 'exp' has passed"""
+    import time
+    from jose import JWTError, jwt
+    from app.security import SECRET_KEY, ALGORITHM, decode_access_token
+
+    expires_at = int(time.time()) + 1
+    token = jwt.encode({"sub": "expiring@example.com", "exp": expires_at}, SECRET_KEY, algorithm=ALGORITHM)
+    assert decode_access_token(token)["sub"] == "expiring@example.com"
+    # jose only rejects a token once 'exp' is a whole second in the past
+    time.sleep(expires_at + 1.1 - time.time())
+    with pytest.raises(JWTError):
+        decode_access_token(token)
@@ -1,5 +1,5 @@
 import { createContext, useContext, useState, useEffect } from 'react';
-import { userAPI } from '../services/api';
+import { authAPI, userAPI } from '../services/api';
 
 const AuthContext = createContext();
 
@@ -27,13 +27,21 @@ export const AuthProvider = ({ children }) => {
     }
   }, []);
 
-  const login = (token) => {
+  const login = (token, refreshToken) => {
     localStorage.setItem('token', token);
+    if (refreshToken) {
+      localStorage.setItem('refreshToken', refreshToken);
+    }
     userAPI.getProfile().then(response => setUser(response.data));
   };
 
   const logout = () => {
+    // Revoke the tokens server-side too; the local logout doesn't wait for it
+    if (localStorage.getItem('token')) {
+      authAPI.logout(localStorage.getItem('refreshToken')).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     setUser(null);
   };
 
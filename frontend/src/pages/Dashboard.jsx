@@ -9,15 +9,16 @@ const Dashboard = () => {
   const [selectedDate, setSelectedDate] = useState(new Date().toISOString().split('T')[0]);
 
   useEffect(() => {
-    fetchDashboard();
-    fetchFoodLogs();
+    fetchDay();
   }, [selectedDate]);
 
-  const fetchDashboard = async () => {
+  const fetchDay = async () => {
     setLoading(true);
     try {
-      const response = await logAPI.getDashboard(selectedDate);
-      setDashboardData(response.data);
+      // Dashboard and food logs come back together from one request
+      const response = await logAPI.getDay(selectedDate);
+      setDashboardData(response.data.dashboard);
+      setFoodLogs(response.data.logs);
     } catch (error) {
       console.error('Failed to fetch dashboard:', error);
     } finally {
@@ -25,15 +26,6 @@ const Dashboard = () => {
     }
   };
 
-  const fetchFoodLogs = async () => {
-    try {
-      const response = await logAPI.getFoodLogs(selectedDate);
-      setFoodLogs(response.data);
-    } catch (error) {
-      console.error('Failed to fetch food logs:', error);
-    }
-  };
-
   const getProgressColor = (consumed, goal) => {
     const percentage = (consumed / goal) * 100;
     if (percentage >= 90) return 'bg-success-500';
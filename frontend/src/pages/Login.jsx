@@ -28,7 +28,7 @@ const Login = () => {
       formData.append('password', data.password);
       
       const response = await authAPI.login(formData);
-      login(response.data.access_token);
+      login(response.data.access_token, response.data.refresh_token);
       navigate('/dashboard');
     } catch (err) {
       setError('Invalid email or password');
@@ -27,22 +27,25 @@ const Recipe = () => {
   };
 
   const logRecipe = async () => {
-    // Log all ingredients as a meal
-    for (const ingredient of ingredients) {
-      if (ingredient.food_id) {
-        try {
-          await api.post('/food-logs/', {
-            food_id: ingredient.food_id,
-            quantity_grams: ingredient.grams,
-            log_date: new Date().toISOString().split('T')[0],
-            meal_type: 'Lunch'
-          });
-        } catch (error) {
-          console.error('Failed to log ingredient:', error);
-        }
-      }
+    // Log all ingredients as one meal, in a single atomic request
+    const logDate = new Date().toISOString().split('T')[0];
+    const entries = ingredients
+      .filter((ingredient) => ingredient.food_id)
+      .map((ingredient) => ({
+        food_id: ingredient.food_id,
+        quantity_grams: ingredient.grams,
+        log_date: logDate,
+        meal_type: 'Lunch'
+      }));
+    if (entries.length === 0) return;
+
+    try {
+      await api.post('/food-logs/bulk', { entries });
+      alert('Recipe logged successfully!');
+    } catch (error) {
+      console.error('Failed to log recipe:', error);
+      alert('Failed to log recipe. Nothing was logged.');
     }
-    alert('Recipe logged successfully!');
   };
 
   return (
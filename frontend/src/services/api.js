@@ -14,12 +14,37 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// On a 401, trade the refresh token for a new pair once and retry,
+// instead of sending the user back to the login form every 30 minutes
+let refreshing = null;
+api.interceptors.response.use(undefined, async (error) => {
+  const refreshToken = localStorage.getItem('refreshToken');
+  const request = error.config;
+  if (error.response?.status !== 401 || !refreshToken || request._retried || request.url === '/auth/refresh') {
+    return Promise.reject(error);
+  }
+  request._retried = true;
+  refreshing = refreshing || api.post('/auth/refresh', { refresh_token: refreshToken })
+    .then(({ data }) => {
+      localStorage.setItem('token', data.access_token);
+      localStorage.setItem('refreshToken', data.refresh_token);
+    })
+    .catch((refreshError) => {
+      localStorage.removeItem('refreshToken');
+      throw refreshError;
+    })
+    .finally(() => { refreshing = null; });
+  await refreshing;
+  return api(request);
+});
+
 export const authAPI = {
   register: (data) => api.post('/auth/register', data),
   verify: (data) => api.post('/auth/verify', data),
   login: (data) => api.post('/auth/token', data, {
     headers: { 'Content-Type': 'application/x-www-form-urlencoded' }
   }),
+  logout: (refreshToken) => api.post('/auth/logout', { refresh_token: refreshToken }),
 };
 
 export const userAPI = {
@@ -38,6 +63,17 @@ export const logAPI = {
   createLog: (data) => api.post('/food-logs/', data),
   getDashboard: (date) => api.get(`/dashboard/?log_date=${date}`),
   getFoodLogs: (date) => api.get(`/food-logs/?log_date=${date}`),
+  getDay: (date) => api.get(`/day/${date}`),
+  getQuickAdd: (limit = 10) => api.get(`/food-logs/quick-add?limit=${limit}`),
+  copyLogs: (sourceDate, targetDate, mealType) => api.post('/food-logs/copy', { source_date: sourceDate, target_date: targetDate, meal_type: mealType }),
+};
+
+export const mealTemplateAPI = {
+  getTemplates: () => api.get('/meal-templates/'),
+  createTemplate: (data) => api.post('/meal-templates/', data),
+  updateTemplate: (id, data) => api.put(`/meal-templates/${id}`, data),
+  deleteTemplate: (id) => api.delete(`/meal-templates/${id}`),
+  logTemplate: (id, logDate, mealType) => api.post(`/meal-templates/${id}/log`, { log_date: logDate, meal_type: mealType }),
 };
 
 export default api;